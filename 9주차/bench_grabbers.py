@@ -0,0 +1,71 @@
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+from frame_source import GRABBERS, SyntheticSource, make_grabber
+
+# 측정할 영역 크기 (너비, 높이) - 모니터보다 큰 크기는 건너뜀
+SIZES = [(250, 100), (1280, 720), (1920, 1080), (3840, 2160)]
+FRAME_BUDGET_MS = 16.0  # 60fps 목표에서 프레임 하나에 쓸 수 있는 시간
+
+
+def measure(grabber, w, h, repeat):
+    # 모니터 1 왼쪽 위에서 (w, h) 영역을 repeat번 grab하고 BGRA 뷰로 감쌈
+    # 반환값: (grab 시간 목록(ms), grab 한 번당 새로 할당한 바이트)
+    mon = grabber.monitors[1] if len(grabber.monitors) > 1 else grabber.monitors[0]
+    area = {"left": mon["left"], "top": mon["top"], "width": w, "height": h}
+    grabber.grab(area)  # 크기별 첫 준비(공유 메모리 생성 등)는 제외
+
+    times = []
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    allocated = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        shot = grabber.grab(area)
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        times.append((time.perf_counter() - start) * 1000)
+        allocated += max(0, tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.reset_peak()
+        del shot, bgra
+    tracemalloc.stop()
+    return times, allocated / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캡처 백엔드(mss, XShm) grab 비교 벤치마크")
+    parser.add_argument("--repeat", type=int, default=60, help="크기별 반복 횟수")
+    parser.add_argument("--grabbers", default=",".join(GRABBERS), help="비교할 백엔드 (쉼표로 구분)")
+    parser.add_argument("--synthetic", action="store_true", help="화면 없이 SyntheticSource로 측정 경로만 확인")
+    args = parser.parse_args()
+
+    grabbers = []
+    if args.synthetic:
+        grabbers.append(SyntheticSource(3840, 2160, 1.0))
+    for name in args.grabbers.split(","):
+        try:
+            grabbers.append(make_grabber(name))
+        except Exception as e:
+            print(f"{name}: 사용 불가 ({e})")
+
+    print(f"목표: 프레임당 {FRAME_BUDGET_MS:.0f} ms")
+    print(f"{'백엔드':>10} | {'크기':>10} | {'p50(ms)':>8} | {'p95(ms)':>8} | {'16ms 안':>7} | {'할당/grab':>10}")
+    for grabber in grabbers:
+        mon = grabber.monitors[1] if len(grabber.monitors) > 1 else grabber.monitors[0]
+        for w, h in SIZES:
+            if w > mon["width"] or h > mon["height"]:
+                continue
+            times, allocated = measure(grabber, w, h, args.repeat)
+            p50 = statistics.median(times)
+            p95 = sorted(times)[int(len(times) * 0.95) - 1]
+            within = sum(t <= FRAME_BUDGET_MS for t in times) / len(times)
+            print(f"{grabber.name:>10} | {w:>4}x{h:<5} | {p50:8.2f} | {p95:8.2f} | {within:6.0%} | {allocated / 1024:7.0f} KB")
+        grabber.close()
+
+
+if __name__ == "__main__":
+    main()
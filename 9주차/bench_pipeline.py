@@ -0,0 +1,185 @@
+import argparse
+import functools
+import json
+import os
+import resource
+import sys
+import time
+
+# 화면 없이 실행할 수 있도록 offscreen 플랫폼 사용
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from frame_source import SyntheticSource
+from screen_capture_app import ScreenCaptureApp
+
+# 측정 조합: 영역 크기 x 화면 변화 비율 x PIP 배율
+SIZES = [(250, 100), (640, 360), (1280, 720), (1920, 1080), (3840, 2160)]
+CHANGE_RATES = [0.0, 0.25, 1.0]
+SCALES = [1.0, 0.5, 0.25]
+
+# --quick에서 사용하는 축소 조합
+QUICK_SIZES = [(250, 100), (1920, 1080)]
+QUICK_CHANGE_RATES = [0.0, 1.0]
+QUICK_SCALES = [1.0, 0.25]
+
+# 기준 결과 대비 이 비율 이상 나빠지면 회귀로 판단
+REGRESSION_TOLERANCE = 0.2
+
+
+def wait(seconds):
+    # 지정한 시간 동안 Qt 이벤트 루프 실행
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+
+
+def peak_rss_mb():
+    # 프로세스 시작 후 최대 RSS (리눅스에서 ru_maxrss는 KB 단위)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker_cpu_seconds(worker):
+    # process 백엔드의 캡처 프로세스들이 지금까지 쓴 CPU 시간 (/proc/PID/stat의 utime + stime)
+    total = 0.0
+    for process, _, _, _ in getattr(worker, "processes", []):
+        try:
+            with open(f"/proc/{process.pid}/stat", encoding="ascii") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return total
+
+
+def case_key(w, h, change_rate, scale, regions=1):
+    key = f"{w}x{h}@{change_rate}@{scale}"
+    return key if regions == 1 else f"{key}x{regions}"
+
+
+def run_case(w, h, change_rate, scale, duration, warmup, backend="thread", regions=1, fast_scaling=False):
+    # 가상 화면으로 ScreenCaptureApp을 띄우고 영역 regions개를 duration초 동안 갱신
+    # 영역끼리는 영역 폭만큼 띄워서 하나로 묶여 grab되지 않도록 함
+    # (process 백엔드는 프레임 소스를 캡처 프로세스로 넘기므로 lambda 대신 partial 사용)
+    source_factory = functools.partial(SyntheticSource, (2 * regions - 1) * w, h, change_rate)
+    window = ScreenCaptureApp(source_factory, backend, presets_path=None)
+    window.fast_scaling_check.setChecked(fast_scaling)
+    for i in range(regions):
+        area = (2 * i * w, 0, w, h)
+        window.add_region(area, window.load_engine().snapshot(area))
+    pip_windows = [pip_window for _, pip_window in window.regions.values()]
+    for pip_window in pip_windows:
+        pip_window.resize(max(1, int(w * scale)), max(1, int(h * scale)) + pip_window.control_widget.height())
+
+    wait(warmup)
+    for pip_window in pip_windows:
+        pip_window.stats.reset()
+    cpu_start = time.process_time() + worker_cpu_seconds(window.capture_worker)
+    wall_start = time.perf_counter()
+
+    wait(duration)
+
+    elapsed = time.perf_counter() - wall_start
+    cpu_time = time.process_time() + worker_cpu_seconds(window.capture_worker) - cpu_start
+    summaries = [pip_window.stats.summary() for pip_window in pip_windows]
+    worker_stats = window.capture_worker.stats()
+    window.close()
+
+    # 카운터는 모든 영역의 합, 단계별 p95는 가장 느린 영역 기준
+    def total(name):
+        return sum(summary["counters"][name] for summary in summaries)
+
+    return {
+        "size": [w, h],
+        "change_rate": change_rate,
+        "scale": scale,
+        "backend": backend,
+        "regions": regions,
+        "display_size": list(pip_windows[0].display_size()),
+        "captured_fps": total("captured") / elapsed,
+        "displayed_fps": total("displayed") / elapsed,
+        "skipped": total("skipped"),
+        "dropped": total("dropped"),
+        "queue_latency_ms": worker_stats["avg_latency_ms"],
+        "stages_p95_ms": {
+            name: max(summary["stages"][name]["p95"] for summary in summaries)
+            for name in summaries[0]["stages"]
+        },
+        "cpu_percent": cpu_time / elapsed * 100,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(results, baseline):
+    # 표시 fps가 줄었거나 CPU 사용률이 늘어난 조합을 회귀로 보고
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["displayed_fps"] < base["displayed_fps"] * (1 - REGRESSION_TOLERANCE):
+            regressions.append(f"{key}: 표시 fps {base['displayed_fps']:.1f} -> {result['displayed_fps']:.1f}")
+        if result["cpu_percent"] > base["cpu_percent"] * (1 + REGRESSION_TOLERANCE) + 1:
+            regressions.append(f"{key}: CPU {base['cpu_percent']:.1f}% -> {result['cpu_percent']:.1f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캡처-표시 파이프라인 벤치마크 (가상 프레임 소스, 화면 없이 실행)")
+    parser.add_argument("--duration", type=float, default=2.0, help="조합별 측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=0.5, help="측정 전 준비 시간(초)")
+    parser.add_argument("--quick", action="store_true", help="일부 조합만 측정")
+    parser.add_argument("--backend", choices=["thread", "process"], default="thread", help="캡처 방식")
+    parser.add_argument("--regions", type=int, default=1, help="동시에 띄울 영역 수")
+    parser.add_argument("--fast-scaling", action="store_true", help="속도 우선 축소 (grab 직후 픽셀 건너뛰기)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="결과를 기준 파일로 저장")
+    parser.add_argument("--compare", metavar="PATH", help="기준 파일과 비교하여 회귀가 있으면 실패")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    change_rates = QUICK_CHANGE_RATES if args.quick else CHANGE_RATES
+    scales = QUICK_SCALES if args.quick else SCALES
+
+    results = {}
+    print(f"{'조합':>24} | {'캡처fps':>7} | {'표시fps':>7} | {'지연ms':>6} | {'CPU%':>6} | {'RSS MB':>7}")
+    for w, h in sizes:
+        for change_rate in change_rates:
+            for scale in scales:
+                key = case_key(w, h, change_rate, scale, args.regions)
+                result = run_case(
+                    w, h, change_rate, scale, args.duration, args.warmup, args.backend, args.regions,
+                    args.fast_scaling
+                )
+                results[key] = result
+                print(
+                    f"{key:>24} | {result['captured_fps']:7.1f} | {result['displayed_fps']:7.1f} | "
+                    f"{result['queue_latency_ms']:6.2f} | {result['cpu_percent']:6.1f} | {result['peak_rss_mb']:7.1f}"
+                )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"기준 결과 저장: {args.save_baseline}")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        for line in regressions:
+            print(f"회귀: {line}")
+        if regressions:
+            exit_code = 1
+        else:
+            print("회귀 없음")
+
+    app.quit()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
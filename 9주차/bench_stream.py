@@ -0,0 +1,84 @@
+import argparse
+import socket
+import threading
+import time
+
+import numpy as np
+
+from frame_source import SyntheticSource
+from stream_server import FrameStreamServer
+
+
+def read_stream(port, region_id, duration, delay, counts, index):
+    # localhost MJPEG 클라이언트. delay초마다 조금씩만 읽어서 느린 클라이언트를 흉내 낼 수 있음
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(f"GET /region/{region_id} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    sock.settimeout(0.5)
+    end = time.perf_counter() + duration
+    tail = b""
+    while time.perf_counter() < end:
+        try:
+            data = sock.recv(65536 if delay == 0 else 4096)
+        except socket.timeout:
+            continue
+        if not data:
+            break
+        data = tail + data
+        counts[index] += data.count(b"Content-Type: image/jpeg")
+        tail = data[-32:]
+        if delay:
+            time.sleep(delay)
+    sock.close()
+
+
+def run(clients, slow, fps, duration, width, height):
+    server = FrameStreamServer(port=0)
+    source = SyntheticSource(width, height, 1.0)
+    area = {"left": 0, "top": 0, "width": width, "height": height}
+
+    counts = [0] * (clients + slow)
+    threads = [
+        threading.Thread(target=read_stream, args=(server.port, 1, duration, 0.2 if i >= clients else 0, counts, i))
+        for i in range(clients + slow)
+    ]
+    server.submit(1, np.zeros((height, width, 4), dtype=np.uint8))
+    for thread in threads:
+        thread.start()
+
+    # GUI 스레드 대신 fps만큼 바뀐 프레임을 넣음
+    submitted = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        shot = source.grab(area)
+        server.submit(1, np.frombuffer(shot.raw, dtype=np.uint8).reshape(height, width, 4))
+        submitted += 1
+        time.sleep(max(0.0, start + submitted / fps - time.perf_counter()))
+
+    for thread in threads:
+        thread.join()
+    stats = server.stats()
+    server.stop()
+    return submitted, stats, counts[:clients], counts[clients:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MJPEG 스트리밍 서버를 localhost 클라이언트로 측정")
+    parser.add_argument("--clients", default="1,4,16", help="빠른 클라이언트 수 목록 (쉼표로 구분)")
+    parser.add_argument("--slow", type=int, default=1, help="느린 클라이언트 수 (0.2초마다 4KB씩만 읽음)")
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--size", default="1280x720")
+    args = parser.parse_args()
+    width, height = map(int, args.size.split("x"))
+
+    print(f"{'클라이언트':>10} | {'제출':>5} | {'인코딩':>6} | {'인코딩 ms':>9} | {'빠른 수신(최소/최대)':>20} | {'느린 수신':>8}")
+    for clients in map(int, args.clients.split(",")):
+        submitted, stats, fast, slow = run(clients, args.slow, args.fps, args.duration, width, height)
+        print(
+            f"{clients:>7}+{args.slow:<2} | {submitted:5d} | {stats['encoded']:6d} | {stats['avg_encode_ms']:9.2f} | "
+            f"{min(fast):>9d} / {max(fast):<8d} | {', '.join(map(str, slow)) or '-':>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
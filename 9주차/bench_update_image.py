@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import time
+
+# 화면 없이 실행할 수 있도록 offscreen 플랫폼 사용
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import cv2
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPixmap
+
+# 측정할 영역 크기 (너비, 높이)
+SIZES = [(250, 100), (1280, 720), (1920, 1080), (3840, 2160)]
+
+
+def make_raw(w, h):
+    # mss ScreenShot.raw와 같은 형태의 BGRA bytearray
+    rng = np.random.default_rng(0)
+    return bytearray(rng.integers(0, 256, size=w * h * 4, dtype=np.uint8).tobytes())
+
+
+def old_path(raw, w, h):
+    # 이전 방식: np.array 복사 -> cvtColor(RGB) -> QPixmap.fromImage (프레임당 복사 3번)
+    screen_np = np.array(np.frombuffer(raw, dtype=np.uint8).reshape(h, w, 4))
+    screen_rgb = cv2.cvtColor(screen_np, cv2.COLOR_BGRA2RGB)
+    qimg = QImage(screen_rgb.data, w, h, w * 3, QImage.Format_RGB888)
+    return QPixmap.fromImage(qimg)
+
+
+def new_path(raw, w, h, buffers, index):
+    # 새 방식: 번갈아 쓰는 BGRA 버퍼에 복사 -> QImage(Format_RGB32)로 감싸기 (프레임당 복사 1번)
+    bgra = np.frombuffer(raw, dtype=np.uint8).reshape(h, w, 4)
+    buf = buffers[index % len(buffers)]
+    np.copyto(buf, bgra)
+    return QImage(buf.data, w, h, buf.strides[0], QImage.Format_RGB32)
+
+
+def measure(fn, repeat):
+    # 프레임당 소요 시간(ms)의 중앙값
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PipWindow.update_image 경로 비교 벤치마크")
+    parser.add_argument("--repeat", type=int, default=100, help="크기별 반복 횟수")
+    args = parser.parse_args()
+
+    app = QApplication([])
+
+    print(f"{'크기':>12} | {'이전(ms)':>9} | {'새 방식(ms)':>11} | {'배율':>5}")
+    for w, h in SIZES:
+        raw = make_raw(w, h)
+        buffers = [np.empty((h, w, 4), dtype=np.uint8) for _ in range(2)]
+
+        old_ms = measure(lambda i: old_path(raw, w, h), args.repeat)
+        new_ms = measure(lambda i: new_path(raw, w, h, buffers, i), args.repeat)
+        print(f"{w:>5}x{h:<6} | {old_ms:9.3f} | {new_ms:11.3f} | {old_ms / new_ms:5.1f}")
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
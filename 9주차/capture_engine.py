@@ -0,0 +1,330 @@
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+# PIP_NO_CV2=1이면 cv2를 import하지 않고 numpy로 축소 (시작 시간과 메모리를 줄이는 대신 최근접 샘플링)
+# 환경 변수라서 process 백엔드의 캡처 프로세스에도 그대로 적용됨
+if os.environ.get("PIP_NO_CV2") == "1":
+    cv2 = None
+else:
+    import cv2
+
+from change_detector import intersect_rect, union_rect
+from frame_source import create_grabber
+
+
+def scale_rect(rect, sx, sy, w, h):
+    # 원본 좌표의 영역을 배율 (sx, sy)로 옮긴 영역 (경계는 바깥쪽으로 맞추고 w, h 안으로 자름)
+    x, y, rw, rh = rect
+    x0, y0 = int(x * sx), int(y * sy)
+    x1, y1 = min(w, math.ceil((x + rw) * sx)), min(h, math.ceil((y + rh) * sy))
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class RegionGrabber:
+    # 하나의 캡처 영역에 대한 grab 상태와 BGRA 프레임 버퍼들을 유지하는 클래스
+    # 버퍼는 QImage.Format_RGB32로 바로 감쌀 수 있는 BGRA 배열이며, 색 변환 없이
+    # 바뀐 부분만 grab 결과에서 복사(또는 축소)하여 채움
+    WARMUP_FRAMES = 10  # 이 프레임 수 이후의 할당은 정상 상태(steady state) 할당으로 집계
+    SCALE_INTERPOLATION = cv2.INTER_AREA if cv2 is not None else None  # 축소 시 보간 방식 (None = numpy)
+
+    def __init__(self, sct, area):
+        x, y, w, h = area
+        self.sct = sct
+        self.area = area
+        self.monitor = {"left": x, "top": y, "width": w, "height": h}
+
+        # 모니터별로 나눈 grab 조각 [(조각 영역, 모니터 번호), ...]
+        # 여러 모니터에 걸친 영역은 조각마다 따로 grab해서 stitch_buffer에 이어 붙임
+        # (모니터 사이 빈 공간이나 화면 밖 부분은 grab하지 않고 검은색으로 남음)
+        self.pieces = split_area(area, sct.monitors)
+        self.stitch_buffer = None
+        if self.pieces != [(area, self.pieces[0][1])]:
+            self.stitch_buffer = np.zeros((h, w, 4), dtype=np.uint8)
+
+        # 다른 스레드로 프레임을 넘길 때 사용하는 버퍼 풀
+        # (읽는 쪽이 release_buffer로 돌려줄 때까지 해당 버퍼는 덮어쓰지 않음)
+        # stale_rects: 버퍼별로 최신 프레임과 달라진 영역 (None이면 최신 상태)
+        self.free_buffers = []
+        self.stale_rects = {}
+        self.pool_lock = threading.Lock()
+
+        # 통계 (frame_count: grab 횟수, alloc_count: 프레임 크기 버퍼 할당 횟수)
+        self.frame_count = 0
+        self.alloc_count = 0
+        self.steady_alloc_count = 0
+
+    def note_alloc(self):
+        self.alloc_count += 1
+        if self.frame_count >= self.WARMUP_FRAMES:
+            self.steady_alloc_count += 1
+
+    def acquire_buffer(self, h, w):
+        # 풀에서 같은 크기의 빈 버퍼를 꺼내고, 없을 때만 새로 할당
+        # 반환값: (버퍼, 채워야 하는 영역)
+        with self.pool_lock:
+            while self.free_buffers:
+                buf = self.free_buffers.pop()
+                if buf.shape[:2] == (h, w):
+                    stale = self.stale_rects[id(buf)]
+                    self.stale_rects[id(buf)] = None
+                    return buf, stale
+                # 크기가 바뀐 버퍼는 버림
+                del self.stale_rects[id(buf)]
+            buf = np.empty((h, w, 4), dtype=np.uint8)
+            self.stale_rects[id(buf)] = None
+        self.note_alloc()
+        return buf, (0, 0, w, h)
+
+    def release_buffer(self, buf):
+        # 이 grabber가 만든 버퍼만 풀로 돌려받음 (사용 중에도 바뀐 영역은 계속 누적됨)
+        with self.pool_lock:
+            if id(buf) in self.stale_rects:
+                self.free_buffers.append(buf)
+
+    def mark_changed(self, rect):
+        # 새 프레임의 바뀐 영역을 모든 대기 버퍼의 갱신 대상에 추가
+        with self.pool_lock:
+            for key, stale in self.stale_rects.items():
+                self.stale_rects[key] = union_rect(stale, rect)
+
+    def grab_bgra(self):
+        # 영역 캡처 후 ScreenShot.raw(bytearray) 위에 복사 없는 BGRA 뷰 생성
+        # 여러 모니터에 걸친 영역은 모니터별로 grab해서 stitch_buffer에 이어 붙임 (다음 grab에서 덮어씀)
+        self.frame_count += 1
+        if self.stitch_buffer is None:
+            sct_img = self.sct.grab(self.monitor)
+            h, w = sct_img.height, sct_img.width
+            return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(h, w, 4)
+
+        ax, ay = self.area[:2]
+        for (x, y, w, h), _ in self.pieces:
+            sct_img = self.sct.grab({"left": x, "top": y, "width": w, "height": h})
+            piece = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(h, w, 4)
+            np.copyto(self.stitch_buffer[y - ay:y - ay + h, x - ax:x - ax + w], piece)
+        return self.stitch_buffer
+
+    def update_buffer(self, bgra, rect, size=None):
+        # 바뀐 영역(rect, 원본 좌표)을 반영한 최신 프레임 버퍼를 만들어 반환
+        # size가 주어지면 그 크기로 축소한 프레임을 만듦
+        # 반환값: (BGRA 버퍼, 출력 좌표 기준 바뀐 영역)
+        h, w = bgra.shape[:2]
+        tw, th = size if size is not None else (w, h)
+        out_rect = scale_rect(rect, tw / w, th / h, tw, th) if size is not None else rect
+
+        self.mark_changed(out_rect)
+        buf, stale = self.acquire_buffer(th, tw)
+        if stale is not None:
+            fill_buffer(buf, bgra, stale, self.SCALE_INTERPOLATION)
+        return buf, out_rect
+
+
+def fill_buffer(buf, bgra, stale, interpolation=RegionGrabber.SCALE_INTERPOLATION):
+    # 버퍼의 stale 영역(출력 좌표)만 grab 결과에서 한 번 복사 (버퍼가 더 작으면 축소)
+    h, w = bgra.shape[:2]
+    th, tw = buf.shape[:2]
+    x, y, sw, sh = stale
+    if (tw, th) == (w, h):
+        np.copyto(buf[y:y + sh, x:x + sw], bgra[y:y + sh, x:x + sw])
+    elif interpolation is None:
+        # 출력 픽셀마다 대응하는 원본 픽셀 하나를 골라 복사 (numpy 인덱싱만 사용)
+        rows = (np.arange(y, y + sh) * 2 + 1) * h // (2 * th)
+        cols = (np.arange(x, x + sw) * 2 + 1) * w // (2 * tw)
+        buf[y:y + sh, x:x + sw] = bgra[rows[:, None], cols]
+    else:
+        ix, iy, iw, ih = scale_rect(stale, w / tw, h / th, w, h)
+        cv2.resize(
+            bgra[iy:iy + ih, ix:ix + iw], (sw, sh),
+            dst=buf[y:y + sh, x:x + sw], interpolation=interpolation
+        )
+
+
+def output_size(display_size, w, h):
+    # 표시 크기가 원본보다 작을 때만 미리 축소 (확대는 PIP 창에서 그릴 때 처리)
+    if display_size is None:
+        return None
+    dw, dh = display_size
+    if dw >= w or dh >= h or dw <= 0 or dh <= 0:
+        return None
+    return display_size
+
+
+def sampling_step(display_size, w, h):
+    # 표시 크기가 원본의 1/2 이하일 때 grab 직후 건너뛰며 읽을 픽셀 간격 (1이면 그대로 사용)
+    # bgra[::step, ::step]는 복사 없는 뷰라서 변화 감지와 축소가 줄어든 크기에서 이루어짐
+    if display_size is None:
+        return 1
+    dw, dh = display_size
+    if dw <= 0 or dh <= 0:
+        return 1
+    return max(1, min(w // dw, h // dh))
+
+
+def rect_area(rect):
+    return rect[2] * rect[3]
+
+
+def monitor_index_for(area, monitors):
+    # 영역 중심이 들어 있는 모니터 번호 (어느 모니터에도 없으면 0 = 전체 가상 화면)
+    x, y, w, h = area
+    cx, cy = x + w // 2, y + h // 2
+    for index, mon in enumerate(monitors[1:], 1):
+        if mon["left"] <= cx < mon["left"] + mon["width"] and mon["top"] <= cy < mon["top"] + mon["height"]:
+            return index
+    return 0
+
+
+def split_area(area, monitors):
+    # 영역을 모니터 경계로 나눈 조각들 [(조각 영역, 모니터 번호), ...]
+    # 한 모니터 안에 있으면 [(area, 번호)] 하나, 어느 모니터와도 겹치지 않으면 [(area, 0)]
+    # 같은 위치의 모니터(화면 복제)는 한 번만 사용
+    pieces = []
+    seen = set()
+    for index, mon in enumerate(monitors[1:], 1):
+        bounds = (mon["left"], mon["top"], mon["width"], mon["height"])
+        if bounds in seen:
+            continue
+        seen.add(bounds)
+        piece = intersect_rect(area, bounds)
+        if piece is not None:
+            pieces.append((piece, index))
+    return pieces or [(area, 0)]
+
+
+def plan_groups(areas, monitors, slack=1.25):
+    # 같은 모니터의 영역들 중 합쳐서 grab해도 손해가 크지 않은 것끼리 묶음
+    # (겹치거나 붙어 있는 영역은 bounding box 넓이가 각 넓이의 합을 크게 넘지 않음)
+    # 묶음은 모니터를 넘지 않으므로 영역은 split_area로 나눈 조각 단위로 넘김
+    # areas: {key: (x, y, w, h)} -> [(bounding box, [key, ...]), ...]
+    by_monitor = {}
+    for key, area in areas.items():
+        by_monitor.setdefault(monitor_index_for(area, monitors), []).append((area, [key]))
+
+    groups = []
+    for clusters in by_monitor.values():
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(clusters)):
+                for j in range(i + 1, len(clusters)):
+                    a, a_keys = clusters[i]
+                    b, b_keys = clusters[j]
+                    bbox = union_rect(a, b)
+                    if rect_area(bbox) <= (rect_area(a) + rect_area(b)) * slack:
+                        clusters[i] = (bbox, a_keys + b_keys)
+                        del clusters[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        groups.extend(clusters)
+    return groups
+
+
+class CaptureEngine:
+    # 캡처 백엔드(mss, XShm 등 frame_source.Grabber) 하나를 계속 유지하면서 영역별 RegionGrabber를 관리하는 클래스
+    # 여러 영역은 모니터별로 묶어서 한 번에 grab하고, 각 영역은 복사 없는 numpy 뷰로 잘라 씀
+    # 여러 모니터에 걸친 영역은 모니터별 조각으로 grab해서 영역의 stitch_buffer에 이어 붙임
+    MERGE_SLACK = 1.25
+
+    # merge_slack: 영역을 묶을 때 허용하는 bounding box 넓이 비율 (math.inf면 모니터마다 grab 한 번)
+    def __init__(self, sct=None, merge_slack=None):
+        self.sct = sct if sct is not None else create_grabber()
+        if merge_slack is not None:
+            self.MERGE_SLACK = merge_slack
+        self.grabbers = {}
+        self.groups = None  # 영역 구성이 바뀌면 다시 계산
+        self.grab_count = 0
+        
+        # 제거한 영역의 (프레임 수, 버퍼 할당 수, 정상 상태 할당 수) 합계 (stats에 계속 포함)
+        self.removed_counts = (0, 0, 0)
+
+        # 마지막 묶음의 (grab, numpy 변환) 소요 시간(초) - 단계별 계측용
+        self.last_timings = (0.0, 0.0)
+
+    def add_region(self, key, area):
+        self.grabbers[key] = RegionGrabber(self.sct, area)
+        self.groups = None
+        return self.grabbers[key]
+
+    def remove(self, key):
+        grabber = self.grabbers.pop(key, None)
+        if grabber is not None:
+            frames, allocs, steady_allocs = self.removed_counts
+            self.removed_counts = (
+                frames + grabber.frame_count,
+                allocs + grabber.alloc_count,
+                steady_allocs + grabber.steady_alloc_count,
+            )
+            self.groups = None
+
+    def snapshot(self, area):
+        # 한 번만 캡처하는 경우 (ScreenShot.raw를 그대로 감싼 BGRA 배열, 호출한 쪽이 소유)
+        # 다음 grab에서 raw를 덮어쓰는 백엔드(XShm)는 복사해서 넘김
+        # 여러 모니터에 걸친 영역은 이 스냅샷에만 쓰는 RegionGrabber의 stitch_buffer라 그대로 넘김
+        grabber = RegionGrabber(self.sct, area)
+        bgra = grabber.grab_bgra()
+        if grabber.stitch_buffer is None and getattr(self.sct, "reuses_buffers", False):
+            return bgra.copy()
+        return bgra
+
+    def grab_views(self):
+        # 묶음마다 grab을 한 번만 하고, (key, 영역의 BGRA 뷰)를 차례로 반환
+        # 여러 모니터에 걸친 영역은 모든 조각을 이어 붙인 뒤 마지막에 반환
+        if self.groups is None:
+            areas = {
+                (key, i): piece
+                for key, g in self.grabbers.items()
+                for i, (piece, _) in enumerate(g.pieces)
+            }
+            self.groups = plan_groups(areas, self.sct.monitors, self.MERGE_SLACK)
+
+        stitched = []
+        for bbox, keys in self.groups:
+            bx, by, bw, bh = bbox
+            start_time = time.perf_counter()
+            sct_img = self.sct.grab({"left": bx, "top": by, "width": bw, "height": bh})
+            grab_time = time.perf_counter()
+            self.grab_count += 1
+            bgra = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+            self.last_timings = (grab_time - start_time, time.perf_counter() - grab_time)
+
+            for key, i in keys:
+                grabber = self.grabbers[key]
+                x, y, w, h = grabber.pieces[i][0]
+                view = bgra[y - by:y - by + h, x - bx:x - bx + w]
+                if grabber.stitch_buffer is None:
+                    grabber.frame_count += 1
+                    yield key, view
+                    continue
+                ax, ay = grabber.area[:2]
+                np.copyto(grabber.stitch_buffer[y - ay:y - ay + h, x - ax:x - ax + w], view)
+                if key not in stitched:
+                    stitched.append(key)
+
+        for key in stitched:
+            grabber = self.grabbers[key]
+            grabber.frame_count += 1
+            yield key, grabber.stitch_buffer
+
+    def stats(self):
+        # 프레임 수 대비 버퍼 할당 횟수 (영역당 첫 프레임 이후에는 0이어야 함, 제거한 영역도 포함)
+        grabbers = list(self.grabbers.values())
+        removed_frames, removed_allocs, removed_steady_allocs = self.removed_counts
+        frames = removed_frames + sum(g.frame_count for g in grabbers)
+        allocs = removed_allocs + sum(g.alloc_count for g in grabbers)
+        return {
+            "regions": len(grabbers),
+            "frames": frames,
+            "grabs": self.grab_count,
+            "buffer_allocs": allocs,
+            "steady_state_allocs": removed_steady_allocs + sum(g.steady_alloc_count for g in grabbers),
+            "allocs_per_frame": allocs / frames if frames else 0.0,
+        }
+
+    def close(self):
+        self.groups = None
+        self.sct.close()
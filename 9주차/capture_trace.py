@@ -0,0 +1,446 @@
+import argparse
+import functools
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from frame_pool import FrameQueue
+from frame_source import FrameShot, Grabber
+
+# 캡처 트레이스: 실제 grab 결과(BGRA)와 시각을 저장해 두었다가 같은 캡처-표시 경로로 다시 재생
+# 파일 구조 (하나의 파일, 리틀 엔디언)
+#   헤더 (HEADER 형식 고정 길이): 매직, 인덱스 위치, 인덱스 항목 수, 메타데이터 위치, 메타데이터 길이
+#   처음 메타데이터: JSON (모니터 배치, 캡처 백엔드)
+#   레코드들: INDEX_DTYPE 항목 하나 + 그 항목이 가리키는 압축된 프레임 (grab마다 하나)
+#             같은 영역(grab 좌표)의 KEYFRAME_INTERVAL번째마다 전체 프레임(KEY), 그 사이는 직전 프레임과의
+#             XOR 차이(DELTA)를 zlib(level 1)로 압축 (직전과 같은 프레임은 길이 0인 DELTA)
+#             녹화 중 연 영역은 길이 0인 REGION 레코드로 끼워 넣음
+#   인덱스: 프레임 레코드의 INDEX_DTYPE 항목만 모은 배열 (close 때 씀)
+#   메타데이터: JSON (모니터 배치, 캡처 백엔드, 녹화 중 연 영역, close 때 씀)
+# close 전에 비정상 종료해서 헤더의 인덱스 위치가 0이면, 읽을 때 레코드를 처음부터 훑어 인덱스를 다시 만듦
+# (쓰기 스레드가 FLUSH_INTERVAL초마다 flush하므로 마지막 몇 프레임만 잃고, 잘린 마지막 레코드는 버림)
+# 읽을 때는 파일 전체를 np.memmap으로 열고, 영역마다 마지막으로 복원한 프레임에 다음 차이만 적용
+MAGIC = b"PIPTRC02"
+HEADER = struct.Struct("<8sQQQQ")
+INDEX_DTYPE = np.dtype([
+    ("time", "<f8"),     # 녹화 시작부터 grab 시작까지 (초)
+    ("offset", "<u8"),   # 파일 안 압축된 프레임 위치
+    ("length", "<u4"),   # 압축된 프레임 길이 (DELTA에서 0이면 직전 프레임과 같음)
+    ("kind", "u1"),      # KEY 또는 DELTA
+    ("left", "<i4"),
+    ("top", "<i4"),
+    ("width", "<u4"),
+    ("height", "<u4"),
+])
+KEY, DELTA, REGION = 0, 1, 2
+KEYFRAME_INTERVAL = 30  # 영역마다 이 수의 저장 프레임마다 전체 프레임 (임의 위치를 복원할 때 적용할 차이 수의 상한)
+FLUSH_INTERVAL = 1.0
+
+
+class TraceWriter:
+    # grab 결과를 트레이스 파일에 기록 (여러 TracingGrabber가 같이 씀)
+    # - grab한 스레드는 시각을 재고 버퍼에 한 번 복사만 함 (FrameQueue, 밀리면 기다리지 않고 버리고 셈)
+    # - 비교, 압축, 파일 쓰기는 쓰기 스레드에서 하므로 녹화가 기록하려는 grab 시간에 끼어들지 않음
+    def __init__(self, path, monitors, backend, max_queue=16):
+        self.path = path
+        self.meta = {"monitors": [dict(mon) for mon in monitors], "backend": backend, "regions": []}
+        meta = json.dumps(self.meta, ensure_ascii=False).encode("utf-8")
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, 0, 0, HEADER.size, len(meta)))
+        self.file.write(meta)
+        self.entries = []
+        self.pending_regions = []  # note_region으로 받아 쓰기 스레드가 REGION 레코드로 쓸 영역
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+
+        # 쓰기 스레드 쪽 상태 (영역 -> [직전 프레임, XOR 결과 버퍼, 마지막 KEY 이후 저장 수])
+        self.frames = FrameQueue(max_queue)
+        self.rect_states = {}
+
+        # 통계
+        self.key_count = 0
+        self.delta_count = 0
+        self.duplicate_count = 0
+        self.raw_bytes = 0
+        self.bytes_written = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def write(self, timestamp, monitor, raw):
+        # grab한 스레드에서 호출 (절대 기다리지 않음)
+        if not self.running:
+            return False
+        rect = (monitor["left"], monitor["top"], monitor["width"], monitor["height"])
+        return self.frames.submit(np.frombuffer(raw, dtype=np.uint8), (timestamp, rect))
+
+    def run(self):
+        last_flush = time.perf_counter()
+        while self.running or not self.frames.empty():
+            self.write_regions()
+            try:
+                (timestamp, rect), buf = self.frames.get(timeout=0.2)
+            except queue.Empty:
+                buf = None
+            if buf is not None:
+                self.encode(timestamp, rect, buf)
+                self.frames.release(buf)
+            if time.perf_counter() - last_flush >= FLUSH_INTERVAL:
+                self.file.flush()
+                last_flush = time.perf_counter()
+        self.write_regions()
+
+    def write_record(self, timestamp, kind, rect, payload):
+        # 항목 뒤에 바로 압축된 프레임을 써서, 인덱스가 없어도 처음부터 훑으며 읽을 수 있게 함
+        offset = self.file.tell() + INDEX_DTYPE.itemsize
+        entry = (timestamp, offset, len(payload), kind) + tuple(rect)
+        self.file.write(np.array([entry], dtype=INDEX_DTYPE).tobytes())
+        self.file.write(payload)
+        return entry
+
+    def write_regions(self):
+        with self.lock:
+            regions, self.pending_regions = self.pending_regions, []
+        for area in regions:
+            self.write_record(self.elapsed(), REGION, area, b"")
+
+    def encode(self, timestamp, rect, frame):
+        # KEY 또는 직전 프레임과의 XOR 차이로 압축해서 쓰고, 다음 비교를 위해 직전 프레임을 갱신
+        state = self.rect_states.get(rect)
+        if state is None or state[0].shape != frame.shape:
+            state = self.rect_states[rect] = [np.empty_like(frame), np.empty_like(frame), KEYFRAME_INTERVAL]
+        prev, delta, since_key = state
+
+        if since_key >= KEYFRAME_INTERVAL - 1:
+            kind, payload = KEY, zlib.compress(frame, 1)
+            state[2] = 0
+            self.key_count += 1
+        else:
+            np.bitwise_xor(frame, prev, out=delta)
+            if delta.any():
+                kind, payload = DELTA, zlib.compress(delta, 1)
+                state[2] += 1
+                self.delta_count += 1
+            else:
+                kind, payload = DELTA, b""
+                self.duplicate_count += 1
+        np.copyto(prev, frame)
+
+        self.entries.append(self.write_record(timestamp, kind, rect, payload))
+        self.raw_bytes += frame.nbytes
+        self.bytes_written += len(payload)
+
+    def note_region(self, area):
+        # 녹화 중 연 (또는 자른) 영역을 기록 (재생할 때 같은 영역을 열기 위함)
+        with self.lock:
+            if list(area) not in self.meta["regions"]:
+                self.meta["regions"].append(list(area))
+                self.pending_regions.append(tuple(area))
+
+    def close(self):
+        # 대기 중인 프레임을 모두 쓴 뒤 인덱스와 메타데이터를 씀
+        if not self.running:
+            return
+        self.running = False
+        self.thread.join()
+        with self.lock:
+            index = np.array(self.entries, dtype=INDEX_DTYPE)
+            index_offset = self.file.tell()
+            self.file.write(index.tobytes())
+            meta = json.dumps(self.meta, ensure_ascii=False).encode("utf-8")
+            meta_offset = self.file.tell()
+            self.file.write(meta)
+            self.file.seek(0)
+            self.file.write(HEADER.pack(MAGIC, index_offset, len(index), meta_offset, len(meta)))
+            self.file.close()
+            self.rect_states.clear()
+
+    def stats(self):
+        return {
+            "grabs": self.frames.submitted_count,
+            "dropped": self.frames.dropped_count,
+            "keyframes": self.key_count,
+            "deltas": self.delta_count,
+            "duplicates": self.duplicate_count,
+            "bytes": self.bytes_written,
+            "compression": self.raw_bytes / self.bytes_written if self.bytes_written else 0.0,
+            "seconds": self.elapsed(),
+        }
+
+
+class TracingGrabber(Grabber):
+    # 다른 캡처 백엔드를 감싸서 grab할 때마다 결과를 TraceWriter에 넘김 (나머지는 그대로 전달)
+    def __init__(self, inner, writer):
+        self.inner = inner
+        self.writer = writer
+        self.name = inner.name
+        self.reuses_buffers = inner.reuses_buffers
+        self.monitors = inner.monitors
+
+    def grab(self, monitor):
+        timestamp = self.writer.elapsed()
+        shot = self.inner.grab(monitor)
+        self.writer.write(timestamp, monitor, shot.raw)
+        return shot
+
+    def close(self):
+        self.inner.close()
+
+
+def tracing_grabber(factory, writer):
+    # 캡처 스레드에서 부르는 프레임 소스 함수 (functools.partial(tracing_grabber, factory, writer)로 넘김)
+    return TracingGrabber(factory(), writer)
+
+
+class TraceReader:
+    # 트레이스 파일을 memmap으로 열어 인덱스와 복원한 프레임을 제공
+    def __init__(self, path):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, index_offset, count, meta_offset, meta_length = HEADER.unpack(bytes(self.data[:HEADER.size]))
+        if magic != MAGIC:
+            raise ValueError(f"캡처 트레이스 파일이 아닙니다: {path}")
+        self.meta = json.loads(bytes(self.data[meta_offset:meta_offset + meta_length]).decode("utf-8"))
+        self.complete = index_offset != 0
+        if self.complete:
+            self.index = np.frombuffer(self.data, dtype=INDEX_DTYPE, count=count, offset=index_offset)
+        else:
+            self.index = self.scan(meta_offset + meta_length)
+        if not len(self.index):
+            raise ValueError(f"기록된 프레임이 없는 트레이스입니다: {path}")
+
+        # 영역별 grab 순서 (인덱스 번호 배열)와 그중 KEY의 순번, 영역마다 마지막으로 복원한 (순번, 프레임)
+        self.sequences = {}
+        for i in range(len(self.index)):
+            self.sequences.setdefault(self.rect(i), []).append(i)
+        self.sequences = {rect: np.array(sequence) for rect, sequence in self.sequences.items()}
+        self.keys = {
+            rect: np.flatnonzero(self.index["kind"][sequence] == KEY) for rect, sequence in self.sequences.items()
+        }
+        self.decoded = {}
+
+    def scan(self, position):
+        # 녹화가 끝나지 않은 트레이스: 레코드를 처음부터 훑어 인덱스와 녹화 중 연 영역을 다시 만듦
+        # 항목이 가리키는 위치가 맞지 않거나 파일 끝에서 잘린 레코드부터는 버림
+        entries = []
+        size = len(self.data)
+        while position + INDEX_DTYPE.itemsize <= size:
+            entry = np.frombuffer(self.data, dtype=INDEX_DTYPE, count=1, offset=position)[0]
+            end = position + INDEX_DTYPE.itemsize + int(entry["length"])
+            if int(entry["offset"]) != position + INDEX_DTYPE.itemsize or end > size or entry["kind"] > REGION:
+                break
+            if entry["kind"] == REGION:
+                area = [int(entry["left"]), int(entry["top"]), int(entry["width"]), int(entry["height"])]
+                if area not in self.meta.setdefault("regions", []):
+                    self.meta["regions"].append(area)
+            else:
+                entries.append(entry)
+            position = end
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def __len__(self):
+        return len(self.index)
+
+    def duration(self):
+        times = self.index["time"]
+        return float(times.max() - times.min()) if len(times) else 0.0
+
+    def rect(self, i):
+        entry = self.index[i]
+        return (int(entry["left"]), int(entry["top"]), int(entry["width"]), int(entry["height"]))
+
+    def frame(self, i):
+        # i번째 grab 결과 (BGRA)
+        # 영역마다 버퍼 하나에 복원하므로 반환한 배열은 같은 영역의 다음 frame() 호출 때 바뀜
+        # 순서대로 읽으면 직전 프레임에 차이 하나만 적용하고, 건너뛰면 앞의 KEY부터 다시 복원
+        rect = self.rect(i)
+        sequence = self.sequences[rect]
+        position = int(np.searchsorted(sequence, i))
+        keys = self.keys[rect]
+        key = int(keys[np.searchsorted(keys, position, side="right") - 1])
+
+        start, frame = key, None
+        cached = self.decoded.get(rect)
+        if cached is not None and key <= cached[0] <= position:
+            start, frame = cached[0] + 1, cached[1]
+        for j in sequence[start:position + 1]:
+            entry = self.index[j]
+            offset, length = int(entry["offset"]), int(entry["length"])
+            if length == 0:
+                continue
+            values = np.frombuffer(zlib.decompress(self.data[offset:offset + length]), dtype=np.uint8)
+            if frame is None:
+                frame = values.copy()
+            elif entry["kind"] == KEY:
+                np.copyto(frame, values)
+            else:
+                np.bitwise_xor(frame, values, out=frame)
+        self.decoded[rect] = (position, frame)
+        return frame.reshape(rect[3], rect[2], 4)
+
+    def info(self):
+        kinds = self.index["kind"]
+        return {
+            "grabs": len(self.index),
+            "complete": self.complete,
+            "keyframes": int(np.count_nonzero(kinds == KEY)),
+            "deltas": int(np.count_nonzero((kinds == DELTA) & (self.index["length"] > 0))),
+            "duplicates": int(np.count_nonzero(self.index["length"] == 0)),
+            "seconds": self.duration(),
+            "rects": len(self.sequences),
+            "file_mb": os.path.getsize(self.path) / 1e6,
+            "backend": self.meta.get("backend"),
+            "regions": self.meta.get("regions"),
+        }
+
+
+class TraceSource(Grabber):
+    # 트레이스를 캡처 백엔드처럼 재생하는 프레임 소스 (CaptureEngine에 그대로 넣을 수 있음)
+    # - 영역(grab 좌표)마다 녹화된 순서대로 다음 프레임을 돌려줌 (같은 영역 구성이면 녹화와 같은 입력)
+    # - 녹화된 영역이 없으면 그 영역을 포함하는 녹화 영역의 프레임에서 잘라서 복사
+    # - speed: 녹화 시각 기준 재생 배율 (None이면 기다리지 않고 최대 속도)
+    # - 가장 많이 grab한 영역(캡처 스레드의 묶음)을 끝까지 재생하면 finished를 켜고 done 이벤트를 알림
+    #   (끝난 뒤에는 마지막 프레임을 계속 돌려주므로 화면이 멈춘 것처럼 보임)
+    # - 프레임은 영역마다 버퍼 하나에 복원하므로 reuses_buffers = True
+    name = "trace"
+    reuses_buffers = True
+
+    def __init__(self, path, speed=1.0, done=None):
+        self.reader = TraceReader(path)
+        self.speed = speed
+        self.done = done
+        self.monitors = self.reader.meta["monitors"]
+
+        self.sequences = self.reader.sequences
+        self.end_rect = max(self.sequences, key=lambda rect: len(self.sequences[rect]))
+        self.positions = dict.fromkeys(self.sequences, 0)
+        self.start = None
+        self.base_time = float(self.reader.index["time"].min()) if len(self.reader) else 0.0
+        self.finished = False
+        self.lock = threading.Lock()
+
+    def grab(self, monitor):
+        rect = (monitor["left"], monitor["top"], monitor["width"], monitor["height"])
+        with self.lock:
+            source = rect if rect in self.sequences else self.containing_rect(rect)
+            if source is None:
+                raise OSError(f"트레이스에 없는 영역입니다: {rect}")
+            sequence = self.sequences[source]
+            position = self.positions[source]
+            if position >= len(sequence):
+                position = len(sequence) - 1
+                if source == self.end_rect:
+                    self.finish()
+            else:
+                self.positions[source] = position + 1
+            i = int(sequence[position])
+            if self.start is None:
+                self.start = time.perf_counter()
+
+        # 녹화 시각에 맞춰 기다림 (최대 속도면 바로 반환)
+        if self.speed and not self.finished:
+            delay = self.start + (float(self.reader.index["time"][i]) - self.base_time) / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        with self.lock:
+            frame = self.reader.frame(i)
+            if source != rect:
+                x, y = rect[0] - source[0], rect[1] - source[1]
+                frame = np.ascontiguousarray(frame[y:y + rect[3], x:x + rect[2]])
+        return FrameShot(frame, rect[2], rect[3])
+
+    def containing_rect(self, rect):
+        x, y, w, h = rect
+        for sx, sy, sw, sh in self.sequences:
+            if sx <= x and sy <= y and x + w <= sx + sw and y + h <= sy + sh:
+                return (sx, sy, sw, sh)
+        return None
+
+    def finish(self):
+        if not self.finished:
+            self.finished = True
+            if self.done is not None:
+                self.done.set()
+
+
+def replay(path, speed, backend, dump_dir, timeout):
+    # 트레이스를 ScreenCaptureApp의 update_capture -> PipWindow.update_image 경로로 화면 없이 재생하고 계측 결과 출력
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import multiprocessing as mp
+
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    from screen_capture_app import ScreenCaptureApp
+
+    reader = TraceReader(path)
+    regions = reader.meta.get("regions") or []
+    if not regions:
+        raise SystemExit("트레이스에 기록된 영역이 없습니다")
+    print(f"재생: {path} {reader.info()}")
+
+    app = QApplication(sys.argv[:1])
+    done = mp.get_context("spawn").Event()  # process 백엔드의 spawn 캡처 프로세스에도 전달되도록 같은 context의 이벤트 사용
+    source_factory = functools.partial(TraceSource, path, speed, done)
+    window = ScreenCaptureApp(source_factory, backend, presets_path=None, history_seconds=0)
+    window.load_engine()
+    start = time.perf_counter()
+    for area in regions:
+        area = tuple(area)
+        window.add_region(area, window.engine.snapshot(area))
+
+    def check_done():
+        if done.is_set() or time.perf_counter() - start > timeout:
+            app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(check_done)
+    timer.start(50)
+    app.exec_()
+    elapsed = time.perf_counter() - start
+    if not done.is_set():
+        print(f"제한 시간({timeout}초) 안에 재생이 끝나지 않았습니다")
+
+    print(f"재생 시간: {elapsed:.2f}초 (녹화 {reader.duration():.2f}초)")
+    for region_id, (area, pip_window) in sorted(window.regions.items()):
+        print(f"영역 {region_id} {area}: {pip_window.stats.hud_text()} | {pip_window.stats.summary()['counters']}")
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+            pip_window.stats.dump(os.path.join(dump_dir, f"region_{region_id}.json"))
+    window.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캡처 트레이스 정보 확인 및 재생")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info_parser = sub.add_parser("info", help="트레이스 요약 출력")
+    info_parser.add_argument("path")
+    replay_parser = sub.add_parser("replay", help="화면 없이 캡처-표시 경로로 재생하고 단계별 계측 출력")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--speed", default="1", help="재생 배율 (max면 기다리지 않고 최대 속도)")
+    replay_parser.add_argument("--backend", choices=["thread", "process"], default="thread")
+    replay_parser.add_argument("--dump", help="영역별 계측 결과(JSON)를 저장할 폴더")
+    replay_parser.add_argument("--timeout", type=float, default=600, help="재생 제한 시간 (초)")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print(TraceReader(args.path).info())
+    else:
+        speed = None if args.speed == "max" else float(args.speed)
+        replay(args.path, speed, args.backend, args.dump, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
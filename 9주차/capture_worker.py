@@ -0,0 +1,242 @@
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from capture_engine import CaptureEngine, output_size, sampling_step
+from change_detector import ChangeDetector, union_rect
+from frame_scheduler import AdaptiveScheduler
+from frame_stats import PipelineStats
+
+
+class FrameMailbox:
+    # 가장 최신 프레임 하나만 보관하는 단일 슬롯 우편함
+    # GUI가 가져가기 전에 새 프레임이 오면 이전 프레임은 버림 (큐에 쌓지 않음)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slot = None  # (프레임, 바뀐 영역, 넣은 시각)
+
+        # 통계
+        self.published_count = 0
+        self.delivered_count = 0
+        self.dropped_count = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def put(self, frame, rect=None):
+        # (슬롯이 비어 있었는지, 밀려난 이전 프레임)을 반환
+        with self.lock:
+            stale = self.slot
+            self.slot = (frame, rect, time.perf_counter())
+            self.published_count += 1
+            if stale is not None:
+                self.dropped_count += 1
+                return False, stale[0]
+            return True, None
+
+    def pending_rect(self):
+        # 아직 GUI가 가져가지 않은 프레임의 바뀐 영역
+        with self.lock:
+            return self.slot[1] if self.slot is not None else None
+
+    def take(self):
+        # (프레임, 바뀐 영역)을 반환하고, 새 프레임이 없으면 None 반환
+        with self.lock:
+            item = self.slot
+            self.slot = None
+        if item is None:
+            return None
+
+        frame, rect, put_time = item
+        latency = time.perf_counter() - put_time
+        self.delivered_count += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        return frame, rect
+
+    def stats(self):
+        delivered = self.delivered_count
+        return {
+            "published": self.published_count,
+            "delivered": delivered,
+            "dropped": self.dropped_count,
+            "avg_latency_ms": self.latency_total / delivered * 1000 if delivered else 0.0,
+            "max_latency_ms": self.latency_max * 1000,
+        }
+
+
+class RegionChannel:
+    # 영역 하나에 대한 변화 감지기와 우편함
+    def __init__(self, area, stats=None):
+        self.area = area
+        self.mailbox = FrameMailbox()
+        self.detector = ChangeDetector()
+        self.stats = stats if stats is not None else PipelineStats()
+
+        # PIP 창의 이미지 영역 크기 (원본보다 작으면 캡처 스레드에서 미리 축소)
+        self.display_size = None
+        self.output_size = None
+
+
+class CaptureWorker(QThread):
+    # GUI 스레드와 별도로 화면을 캡처하는 생산자 스레드
+    # 등록된 모든 영역을 한 틱에 묶어서 grab하고, 영역별 우편함에 최신 프레임을 넣음
+    # 캡처 간격은 AdaptiveScheduler가 화면 변화와 캡처 비용에 따라 정함
+    frame_ready = pyqtSignal(int)
+    capture_error = pyqtSignal(str)
+
+    def __init__(self, min_fps=3, max_fps=60, source_factory=None, parent=None):
+        super().__init__(parent)
+        # source_factory: 캡처 스레드 안에서 프레임 소스를 만드는 함수 (None이면 mss)
+        self.source_factory = source_factory
+        self.channels = {}
+        self.scheduler = AdaptiveScheduler(min_fps, max_fps)
+        self.engine = None
+        self.running = True
+
+        # 속도 우선 축소: 표시 크기가 원본의 1/2 이하면 grab 직후 건너뛰며 읽은 뷰로 처리
+        self.fast_scaling = False
+
+        # GUI 스레드에서 요청한 영역 추가/삭제 (캡처 스레드가 다음 틱에 반영)
+        self.region_lock = threading.Lock()
+        self.region_changes = []
+
+    def add_region(self, region_id, area, stats=None):
+        # stats: 단계별 계측을 기록할 PipelineStats (PIP 창과 공유)
+        with self.region_lock:
+            self.channels[region_id] = RegionChannel(area, stats)
+            self.region_changes.append((region_id, area))
+
+    def remove_region(self, region_id):
+        with self.region_lock:
+            self.channels.pop(region_id, None)
+            self.region_changes.append((region_id, None))
+
+    def apply_region_changes(self, engine):
+        with self.region_lock:
+            changes = self.region_changes
+            self.region_changes = []
+        for region_id, area in changes:
+            if area is None:
+                engine.remove(region_id)
+            else:
+                engine.add_region(region_id, area)
+
+    def run(self):
+        # mss 세션은 사용하는 스레드 안에서 생성해야 함
+        engine = CaptureEngine(self.source_factory() if self.source_factory else None)
+        self.engine = engine
+
+        try:
+            while self.running:
+                start_time = time.perf_counter()
+                self.apply_region_changes(engine)
+
+                changed = False
+                for region_id, bgra in engine.grab_views():
+                    channel = self.channels.get(region_id)
+                    if channel is None:
+                        continue
+                    grab_time, numpy_time = engine.last_timings
+                    channel.stats.record("grab", grab_time)
+                    channel.stats.record("numpy", numpy_time)
+                    channel.stats.count("captured")
+
+                    if self.fast_scaling:
+                        step = sampling_step(channel.display_size, bgra.shape[1], bgra.shape[0])
+                        if step > 1:
+                            bgra = bgra[::step, ::step]
+
+                    # 바뀐 것이 없으면 변환과 다시 그리기를 모두 건너뜀
+                    rect = channel.detector.detect(bgra)
+                    size = output_size(channel.display_size, bgra.shape[1], bgra.shape[0])
+                    if size != channel.output_size:
+                        # 표시 크기가 바뀌면 한 번만 전체 프레임을 새 크기로 다시 만듦
+                        channel.output_size = size
+                        rect = (0, 0, bgra.shape[1], bgra.shape[0])
+                    if rect is None:
+                        channel.stats.count("skipped")
+                        continue
+                    changed = True
+
+                    # 색 변환 없이 바뀐 부분만 BGRA 프레임 버퍼에 반영
+                    convert_start = time.perf_counter()
+                    grabber = engine.grabbers[region_id]
+                    frame, rect = grabber.update_buffer(bgra, rect, size)
+                    channel.stats.record("convert", time.perf_counter() - convert_start)
+
+                    # 아직 표시되지 않은 프레임이 밀려나도 그 영역이 다시 그려지도록 합침
+                    rect = union_rect(rect, channel.mailbox.pending_rect())
+
+                    # 최신 프레임만 우편함에 넣고, 밀려난 프레임의 버퍼는 풀로 반환
+                    was_empty, stale = channel.mailbox.put(frame, rect)
+                    if stale is not None:
+                        grabber.release_buffer(stale)
+                        channel.stats.count("dropped")
+                    # GUI가 아직 처리하지 않은 알림이 있으면 다시 보내지 않음
+                    if was_empty:
+                        self.frame_ready.emit(region_id)
+
+                # grab+변환 비용과 변화 여부로 다음 캡처 시각을 정하고 대기
+                work_time = time.perf_counter() - start_time
+                interval = self.scheduler.record(changed, work_time)
+                delay = start_time + interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        except Exception as e:
+            self.capture_error.emit(str(e))
+        finally:
+            engine.close()
+
+    def set_display_size(self, region_id, size):
+        # PIP 창 크기가 바뀔 때 호출 (다음 틱에 최신 크기 한 번만 반영)
+        channel = self.channels.get(region_id)
+        if channel is not None:
+            channel.display_size = size
+
+    def take_frame(self, region_id):
+        channel = self.channels.get(region_id)
+        if channel is None:
+            return None
+        return channel.mailbox.take()
+
+    def release_frame(self, region_id, frame):
+        # GUI 스레드에서 사용을 마친 버퍼를 풀로 반환
+        grabber = self.engine.grabbers.get(region_id) if self.engine is not None else None
+        if grabber is not None:
+            grabber.release_buffer(frame)
+
+    def set_fast_scaling(self, enabled):
+        self.fast_scaling = enabled
+
+    def set_fps_range(self, min_fps, max_fps):
+        self.scheduler.set_fps_range(min_fps, max_fps)
+
+    def effective_fps(self):
+        return self.scheduler.effective_fps()
+
+    def stop(self):
+        self.running = False
+        self.wait()
+
+    def stats(self):
+        # 모든 영역의 우편함/변화 감지 통계를 합산
+        channels = list(self.channels.values())
+        mailboxes = [c.mailbox.stats() for c in channels]
+        delivered = sum(m["delivered"] for m in mailboxes)
+        checked = sum(c.detector.frame_count for c in channels)
+        skipped = sum(c.detector.skipped_count for c in channels)
+        stats = {
+            "published": sum(m["published"] for m in mailboxes),
+            "delivered": delivered,
+            "dropped": sum(m["dropped"] for m in mailboxes),
+            "avg_latency_ms": sum(c.mailbox.latency_total for c in channels) / delivered * 1000 if delivered else 0.0,
+            "max_latency_ms": max((m["max_latency_ms"] for m in mailboxes), default=0.0),
+            "checked": checked,
+            "skipped": skipped,
+            "skipped_ratio": skipped / checked if checked else 0.0,
+        }
+        if self.engine is not None:
+            stats.update(self.engine.stats())
+        stats.update(self.scheduler.stats())
+        return stats
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def union_rect(a, b):
+    # 두 (x, y, w, h) 영역을 모두 포함하는 최소 영역 (None은 빈 영역으로 취급)
+    if a is None:
+        return b
+    if b is None:
+        return a
+    x0 = min(a[0], b[0])
+    y0 = min(a[1], b[1])
+    x1 = max(a[0] + a[2], b[0] + b[2])
+    y1 = max(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def intersect_rect(a, b):
+    # 두 (x, y, w, h) 영역이 겹치는 부분 (겹치지 않으면 None)
+    x0 = max(a[0], b[0])
+    y0 = max(a[1], b[1])
+    x1 = min(a[0] + a[2], b[0] + b[2])
+    y1 = min(a[1] + a[3], b[1] + b[3])
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class ChangeDetector:
+    # 이전 프레임과 비교하여 바뀐 영역(타일 단위로 맞춘 bounding box)을 찾는 클래스
+    # 모든 픽셀을 비교하되 BGRA 4바이트를 uint32 하나로 보고 비교하여 비용을 줄임
+    # (건너뛰며 샘플링하면 1px 커서나 얇은 글자 획의 변화를 놓쳐서 화면에 계속 남을 수 있음)
+    def __init__(self, tile_size=32):
+        self.tile_size = tile_size
+
+        # 미리 할당해 두는 비교용 버퍼
+        self.prev_pixels = None
+        self.diff_buffer = None
+
+        # 통계
+        self.frame_count = 0
+        self.skipped_count = 0
+
+    def reset(self):
+        # 다음 프레임은 무조건 전체 영역 변경으로 처리
+        self.prev_pixels = None
+
+    def detect(self, bgra):
+        # 바뀐 영역 (x, y, w, h)을 반환하고, 바뀐 것이 없으면 None 반환
+        h, w = bgra.shape[:2]
+        pixels = bgra.view(np.uint32)[..., 0]  # 복사 없이 (h, w) uint32로 봄
+        self.frame_count += 1
+
+        if self.prev_pixels is None or self.prev_pixels.shape != pixels.shape:
+            self.prev_pixels = np.empty(pixels.shape, dtype=np.uint32)
+            self.diff_buffer = np.empty(pixels.shape, dtype=bool)
+            np.copyto(self.prev_pixels, pixels)
+            return (0, 0, w, h)
+
+        np.not_equal(pixels, self.prev_pixels, out=self.diff_buffer)
+        rows = np.flatnonzero(self.diff_buffer.any(axis=1))
+        if not len(rows):
+            self.skipped_count += 1
+            return None
+        cols = np.flatnonzero(self.diff_buffer[rows[0]:rows[-1] + 1].any(axis=0))
+
+        # 바뀐 행 범위 밖은 이전 프레임과 같으므로 그 행들만 갱신
+        np.copyto(self.prev_pixels[rows[0]:rows[-1] + 1], pixels[rows[0]:rows[-1] + 1])
+
+        # 바뀐 픽셀의 행/열 범위를 타일 경계에 맞춤
+        tile = self.tile_size
+        x0 = (int(cols[0]) // tile) * tile
+        y0 = (int(rows[0]) // tile) * tile
+        x1 = min(w, -(-(int(cols[-1]) + 1) // tile) * tile)
+        y1 = min(h, -(-(int(rows[-1]) + 1) // tile) * tile)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def skipped_ratio(self):
+        return self.skipped_count / self.frame_count if self.frame_count else 0.0
+
+    def stats(self):
+        return {
+            "checked": self.frame_count,
+            "skipped": self.skipped_count,
+            "skipped_ratio": self.skipped_ratio(),
+        }
@@ -0,0 +1,194 @@
+import collections
+import queue
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from frame_pool import FrameQueue
+
+
+class HistoryEntry:
+    # 기록한 프레임 하나 (key가 아니면 payload는 직전 프레임과의 XOR 차이)
+    __slots__ = ("seq", "timestamp", "shape", "key", "payload", "nbytes")
+
+    def __init__(self, seq, timestamp, shape, key, payload):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.shape = shape
+        self.key = key
+        self.payload = payload
+        self.nbytes = len(payload)
+
+
+class FrameHistory:
+    # 영역 하나의 최근 프레임을 메모리에 보관하는 링 버퍼 (PIP 창의 정지/되돌려 보기용)
+    # - 바뀐 프레임만 들어오며, 별도 스레드에서 압축해서 보관 (GUI는 버퍼에 한 번 복사만 함)
+    # - compress=True면 KEYFRAME_INTERVAL 프레임마다 전체 프레임, 그 사이는 직전 프레임과의 XOR 차이를
+    #   zlib(level 1)로 압축 (가사처럼 일부만 바뀌는 화면은 차이가 대부분 0이라 작아짐)
+    # - max_bytes(압축 후 크기 합)와 max_seconds를 넘으면 오래된 것부터 key 단위 묶음으로 버림
+    #   max_bytes는 압축한 프레임만 셈: 작업용 버퍼(대기열 버퍼 최대 max_queue + 1개, 직전 프레임, XOR 버퍼,
+    #   되돌려 보기 복원 버퍼)는 영역 크기의 전체 프레임이라 따로 더 쓰며 stats()의 working_bytes로 확인
+    # - 프레임 번호(seq)는 계속 증가하므로, 버려진 번호를 요청하면 None
+    KEYFRAME_INTERVAL = 10
+
+    def __init__(self, max_seconds=30.0, max_bytes=64 * 1024 * 1024, compress=True, max_queue=4):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+        self.entries = collections.deque()
+        self.total_bytes = 0
+        self.next_seq = 0
+        self.lock = threading.Lock()
+
+        # 압축 스레드 쪽 상태 (직전 프레임과 XOR 결과를 담는 버퍼)
+        self.prev_frame = None
+        self.delta_buffer = None
+        self.since_key = 0
+
+        # 되돌려 보기에서 마지막으로 복원한 프레임 (한 칸씩 앞으로 갈 때 차이 하나만 적용)
+        self.decoded_seq = None
+        self.decoded_frame = None
+
+        # GUI -> 압축 스레드 대기열 (밀리면 GUI를 막지 않고 프레임을 버림)
+        self.frames = FrameQueue(max_queue)
+
+        # 통계
+        self.stored_count = 0
+        self.evicted_count = 0
+        self.raw_bytes = 0  # 보관 중인 프레임의 압축 전 크기 합
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, frame):
+        # GUI 스레드에서 호출 (절대 기다리지 않음, 밀리면 이 프레임은 기록하지 않음)
+        if not self.running:
+            return False
+        return self.frames.submit(frame, time.time())
+
+    def run(self):
+        while self.running:
+            try:
+                timestamp, buf = self.frames.get(timeout=0.2)
+            except queue.Empty:
+                self.evict(time.time())
+                continue
+            entry = self.encode(timestamp, buf)
+            self.frames.release(buf)
+            with self.lock:
+                self.entries.append(entry)
+                self.total_bytes += entry.nbytes
+                self.raw_bytes += buf.nbytes
+                self.stored_count += 1
+            self.evict(timestamp)
+
+    def encode(self, timestamp, frame):
+        # 전체 프레임(key) 또는 직전 프레임과의 차이로 만들고, 다음 차이 계산을 위해 직전 프레임을 갱신
+        key = (
+            not self.compress
+            or self.prev_frame is None
+            or self.prev_frame.shape != frame.shape
+            or self.since_key >= self.KEYFRAME_INTERVAL - 1
+            or not self.entries
+        )
+        if key:
+            data = frame
+            self.since_key = 0
+        else:
+            data = np.bitwise_xor(frame, self.prev_frame, out=self.delta_buffer)
+            self.since_key += 1
+        payload = zlib.compress(data, 1) if self.compress else data.tobytes()
+
+        if self.prev_frame is None or self.prev_frame.shape != frame.shape:
+            self.prev_frame = np.empty_like(frame)
+            self.delta_buffer = np.empty_like(frame)
+        np.copyto(self.prev_frame, frame)
+
+        entry = HistoryEntry(self.next_seq, timestamp, frame.shape, key, payload)
+        self.next_seq += 1
+        return entry
+
+    def evict(self, now):
+        # 예산(바이트, 초)을 넘는 동안 가장 오래된 key와 그 뒤의 차이 프레임들을 함께 버림
+        with self.lock:
+            while self.entries and (
+                self.total_bytes > self.max_bytes or self.entries[0].timestamp < now - self.max_seconds
+            ):
+                entry = self.entries.popleft()
+                self.drop(entry)
+                while self.entries and not self.entries[0].key:
+                    self.drop(self.entries.popleft())
+
+    def drop(self, entry):
+        self.total_bytes -= entry.nbytes
+        self.raw_bytes -= int(np.prod(entry.shape))
+        self.evicted_count += 1
+
+    def seq_range(self):
+        # 보관 중인 (첫 번호, 마지막 번호), 비어 있으면 None
+        with self.lock:
+            if not self.entries:
+                return None
+            return self.entries[0].seq, self.entries[-1].seq
+
+    def frame(self, seq):
+        # seq 번 프레임을 복원해서 (시각, BGRA 배열) 반환 (버려졌으면 None)
+        # 반환한 배열은 다음 frame() 호출 때 바뀔 수 있으므로 표시하는 동안만 사용
+        with self.lock:
+            if not self.entries or not self.entries[0].seq <= seq <= self.entries[-1].seq:
+                return None
+            first = self.entries[0].seq
+            index = seq - first
+            frame = None
+            start = index
+            if self.decoded_seq is not None and first <= self.decoded_seq < seq:
+                # 직전에 복원한 프레임 뒤에 key가 없으면 그 프레임에 차이만 이어서 적용
+                start = self.decoded_seq - first + 1
+                if any(self.entries[i].key for i in range(start, index + 1)):
+                    start = index
+                else:
+                    frame = self.decoded_frame
+            if frame is None:
+                while not self.entries[start].key:
+                    start -= 1
+            chain = [self.entries[i] for i in range(start, index + 1)]
+
+        for entry in chain:
+            data = zlib.decompress(entry.payload) if self.compress else entry.payload
+            values = np.frombuffer(data, dtype=np.uint8).reshape(entry.shape)
+            if entry.key:
+                frame = values.copy()
+            else:
+                np.bitwise_xor(frame, values, out=frame)
+        self.decoded_seq = seq
+        self.decoded_frame = frame
+        return chain[-1].timestamp, frame
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def working_bytes(self):
+        # 예산(max_bytes)에 들어가지 않는 작업용 버퍼들의 크기 합
+        buffers = (self.prev_frame, self.delta_buffer, self.decoded_frame)
+        return self.frames.pool.allocated_bytes + sum(buf.nbytes for buf in buffers if buf is not None)
+
+    def stats(self):
+        with self.lock:
+            span = self.entries[-1].timestamp - self.entries[0].timestamp if self.entries else 0.0
+            frames = len(self.entries)
+        return {
+            "frames": frames,
+            "span_s": span,
+            "bytes": self.total_bytes,
+            "budget_bytes": self.max_bytes,
+            "working_bytes": self.working_bytes(),
+            "compression": self.raw_bytes / self.total_bytes if self.total_bytes else 0.0,
+            "stored": self.stored_count,
+            "evicted": self.evicted_count,
+            "dropped": self.frames.dropped_count,
+        }
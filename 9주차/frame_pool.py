@@ -0,0 +1,109 @@
+import queue
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    # 프레임 복사용 버퍼를 정해진 개수(max_buffers) 안에서만 만들어 빌려주는 풀
+    # - 돌려받은 버퍼 중 같은 크기가 있으면 재사용하고, 없으면 새로 만듦
+    # - 모두 사용 중이면 None을 반환 (호출한 쪽은 기다리지 않고 프레임을 버림)
+    # - 개수가 찼는데 다른 크기 버퍼만 남아 있으면 가장 오래된 것을 버리고 새로 만듦
+    def __init__(self, max_buffers):
+        self.max_buffers = max_buffers
+        self.free_buffers = []
+        self.buffer_count = 0
+        self.allocated_bytes = 0  # 만들어 둔 버퍼들(사용 중 + 반환된 것)의 크기 합
+        self.lock = threading.Lock()
+
+    def acquire(self, shape):
+        with self.lock:
+            for i in range(len(self.free_buffers) - 1, -1, -1):
+                if self.free_buffers[i].shape == shape:
+                    return self.free_buffers.pop(i)
+            if self.buffer_count >= self.max_buffers:
+                if not self.free_buffers:
+                    return None
+                self.allocated_bytes -= self.free_buffers.pop(0).nbytes
+                self.buffer_count -= 1
+            buf = np.empty(shape, dtype=np.uint8)
+            self.buffer_count += 1
+            self.allocated_bytes += buf.nbytes
+        return buf
+
+    def release(self, buf):
+        with self.lock:
+            self.free_buffers.append(buf)
+
+    def copy(self, frame):
+        # 버퍼를 빌려 frame을 복사해서 반환 (버퍼가 없으면 None)
+        buf = self.acquire(frame.shape)
+        if buf is not None:
+            np.copyto(buf, frame)
+        return buf
+
+
+class FrameQueue:
+    # 프레임을 복사해서 작업 스레드로 넘기는 크기가 정해진 대기열 (FrameRecorder, FrameHistory, TraceWriter)
+    # - submit은 넘긴 쪽(GUI/캡처 스레드)에서 복사 한 번만 하고 절대 기다리지 않음
+    # - 대기열이나 버퍼가 모두 차 있으면 그 프레임은 버리고 dropped_count만 늘림
+    # - 작업 스레드는 get으로 (tag, 버퍼)를 받고, 다 쓴 버퍼는 release로 돌려줌
+    def __init__(self, max_queue):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.pool = FramePool(max_queue + 1)
+
+        # 통계
+        self.submitted_count = 0
+        self.dropped_count = 0
+
+    def submit(self, frame, tag=None):
+        self.submitted_count += 1
+        buf = self.pool.copy(frame)
+        if buf is None:
+            self.dropped_count += 1
+            return False
+        try:
+            self.queue.put_nowait((tag, buf))
+        except queue.Full:
+            self.pool.release(buf)
+            self.dropped_count += 1
+            return False
+        return True
+
+    def get(self, timeout=None):
+        # 대기 중인 (tag, 버퍼)를 꺼냄 (timeout 안에 없으면 queue.Empty)
+        return self.queue.get(timeout=timeout)
+
+    def release(self, buf):
+        self.pool.release(buf)
+
+    def empty(self):
+        return self.queue.empty()
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class LatestFrame:
+    # 최신 프레임 하나만 대기시키는 자리 (TextExtractor, FrameStreamServer의 영역별 상태)
+    # pending: 아직 처리하지 않은 최신 프레임 복사본 (새 프레임이 오면 덮어씀)
+    # 버퍼는 대기 중 하나와 처리 중 하나, 두 개만 사용하며 잠금은 쓰는 쪽에서 담당
+    def __init__(self):
+        self.pending = None
+        self.pool = FramePool(2)
+
+    def put(self, frame):
+        # frame을 대기 버퍼에 복사하고, 처리되지 않은 프레임을 덮어썼으면 True 반환
+        replaced = self.pending is not None
+        if replaced:
+            self.pool.release(self.pending)
+        self.pending = self.pool.copy(frame)
+        return replaced
+
+    def take(self):
+        # 대기 중인 프레임을 꺼냄 (없으면 None, 다 쓰면 release로 돌려줌)
+        buf, self.pending = self.pending, None
+        return buf
+
+    def release(self, buf):
+        self.pool.release(buf)
@@ -0,0 +1,55 @@
+import collections
+import time
+
+
+class AdaptiveScheduler:
+    # 화면 변화 여부와 측정된 캡처 비용에 따라 다음 캡처까지의 간격을 정하는 클래스
+    # 바뀌는 중에는 max_fps로 올리고, 정지 상태가 이어지면 min_fps까지 점점 낮춤
+    IDLE_BACKOFF = 1.5     # 변화 없는 프레임마다 간격을 늘리는 비율
+    COST_HEADROOM = 1.25   # 캡처 비용 대비 최소 간격 여유 (GUI 스레드 몫 남김)
+    COST_SMOOTHING = 0.2   # 캡처 비용 지수 이동 평균 가중치
+
+    def __init__(self, min_fps=3, max_fps=60):
+        self.interval = 0.0
+        self.set_fps_range(min_fps, max_fps)  # 범위 보정(1 이상, min <= max)은 set_fps_range와 같게
+        self.cost = 0.0
+
+        # 최근 1초 동안의 캡처 시각 (유효 fps 계산용)
+        self.tick_times = collections.deque()
+
+    def set_fps_range(self, min_fps, max_fps):
+        self.min_fps = max(1, min(min_fps, max_fps))
+        self.max_fps = max(self.min_fps, max_fps)
+        self.interval = min(max(self.interval, 1 / self.max_fps), 1 / self.min_fps)
+
+    def record(self, changed, work_time):
+        # 한 번의 grab+변환 결과를 반영하고 다음 간격(초)을 반환
+        now = time.perf_counter()
+        self.tick_times.append(now)
+        while self.tick_times and now - self.tick_times[0] > 1.0:
+            self.tick_times.popleft()
+
+        if self.cost == 0.0:
+            self.cost = work_time
+        else:
+            self.cost += (work_time - self.cost) * self.COST_SMOOTHING
+
+        if changed:
+            # 화면이 바뀌는 중이면 바로 최대 fps로
+            self.interval = 1 / self.max_fps
+        else:
+            # 정지 상태가 이어지면 최소 fps까지 점점 낮춤
+            self.interval = min(self.interval * self.IDLE_BACKOFF, 1 / self.min_fps)
+
+        # 처리할 수 있는 속도보다 빠르게 캡처하지 않도록 측정 비용으로 제한
+        return max(self.interval, self.cost * self.COST_HEADROOM)
+
+    def effective_fps(self):
+        return len(self.tick_times)
+
+    def stats(self):
+        return {
+            "effective_fps": self.effective_fps(),
+            "target_fps": 1 / self.interval,
+            "capture_cost_ms": self.cost * 1000,
+        }
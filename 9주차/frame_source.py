@@ -0,0 +1,119 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+
+
+class FrameShot:
+    # mss ScreenShot 중 캡처 경로에서 쓰는 속성(raw, width, height)만 가진 프레임
+    def __init__(self, raw, width, height):
+        self.raw = raw
+        self.width = width
+        self.height = height
+
+
+class Grabber:
+    # 캡처 백엔드 인터페이스 (mss와 같은 monitors / grab(monitor) / close() 형태)
+    # monitors: mss와 같은 모니터 목록 (0번은 전체 가상 화면, 물리 좌표)
+    # grab(monitor): {"left", "top", "width", "height"} 영역을 BGRA로 캡처한 프레임 (raw, width, height)
+    # reuses_buffers: True면 grab 결과의 raw를 다음 grab에서 덮어쓰므로, 보관하려면 복사해야 함
+    name = ""
+    reuses_buffers = False
+    monitors = []
+
+    def grab(self, monitor):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssGrabber(Grabber):
+    # mss를 사용하는 기본 백엔드 (grab마다 새 bytearray를 만들어 반환)
+    name = "mss"
+
+    def __init__(self):
+        from mss import mss
+
+        self.sct = mss()
+        self.monitors = self.sct.monitors
+
+    def grab(self, monitor):
+        return self.sct.grab(monitor)
+
+    def close(self):
+        self.sct.close()
+
+
+# 백엔드 이름 -> (모듈, 클래스) (필요할 때만 import)
+GRABBERS = {
+    "mss": ("frame_source", "MssGrabber"),
+    "xshm": ("xshm_grabber", "XShmGrabber"),
+}
+
+
+def auto_grabbers():
+    # 자동 선택 시 시도할 순서 (X11 세션이면 XShm 먼저, 실패하면 mss)
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        return ["xshm", "mss"]
+    return ["mss"]
+
+
+def make_grabber(name):
+    # name 백엔드 하나만 만듦 (대체 없음, 실패하면 예외)
+    module_name, class_name = GRABBERS[name]
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def create_grabber(name="auto"):
+    # name 백엔드를 만들고, 만들 수 없으면 다음 후보(마지막은 mss)로 넘어감
+    # process 백엔드의 캡처 프로세스에서도 부르므로 functools.partial(create_grabber, name)으로 넘김
+    names = auto_grabbers() if name == "auto" else [name, "mss"]
+    errors = []
+    for candidate in dict.fromkeys(names):
+        try:
+            return make_grabber(candidate)
+        except (OSError, ImportError) as e:
+            errors.append(f"{candidate}: {e}")
+            print(f"캡처 백엔드 {candidate} 사용 불가 ({e})")
+    raise OSError("사용할 수 있는 캡처 백엔드가 없습니다: " + "; ".join(errors))
+
+
+class SyntheticSource(Grabber):
+    # mss 대신 numpy로 만든 가상 화면을 제공하는 프레임 소스 (벤치마크/화면 없는 환경용)
+    # mss와 같은 monitors / grab(monitor) / close() 형태라 CaptureEngine에 그대로 넣을 수 있음
+    # change_rate: grab 중 화면이 바뀌는 비율 (0 = 정지 화면, 1 = 매번 바뀜)
+    name = "synthetic"
+
+    def __init__(self, width=3840, height=2160, change_rate=1.0, seed=0):
+        self.width = width
+        self.height = height
+        self.change_rate = change_rate
+        self.monitors = [
+            {"left": 0, "top": 0, "width": width, "height": height},
+            {"left": 0, "top": 0, "width": width, "height": height},
+        ]
+
+        rng = np.random.default_rng(seed)
+        self.screen = rng.integers(0, 256, size=(height, width, 4), dtype=np.uint8)
+        self.screen[..., 3] = 255
+        self.grab_count = 0
+
+    def advance(self):
+        # change_rate 비율에 맞춰 가사 한 줄처럼 가로 띠 하나를 바꿈
+        n = self.grab_count
+        self.grab_count += 1
+        if int((n + 1) * self.change_rate) == int(n * self.change_rate):
+            return
+        band = max(1, self.height // 20)
+        top = (n * band) % max(1, self.height - band)
+        self.screen[top:top + band, :, :3] += np.uint8(37)
+
+    def grab(self, monitor):
+        self.advance()
+        x, y = monitor["left"], monitor["top"]
+        w, h = monitor["width"], monitor["height"]
+        # mss처럼 grab마다 새 bytearray로 복사해서 반환
+        raw = bytearray(self.screen[y:y + h, x:x + w].tobytes())
+        return FrameShot(raw, w, h)
@@ -0,0 +1,85 @@
+import collections
+import csv
+import json
+import threading
+
+
+class RollingStat:
+    # 최근 size개의 측정값(ms)을 보관하고 백분위수를 계산하는 클래스
+    def __init__(self, size=600):
+        self.values = collections.deque(maxlen=size)
+        self.count = 0
+
+    def add(self, ms):
+        self.values.append(ms)
+        self.count += 1
+
+    def summary(self):
+        values = sorted(self.values)
+        if not values:
+            return {"count": self.count, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+        def percentile(p):
+            return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+        return {
+            "count": self.count,
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "max": values[-1],
+        }
+
+
+class PipelineStats:
+    # 캡처부터 화면 표시까지 단계별 소요 시간과 프레임 카운터를 모으는 클래스
+    # 캡처 스레드(grab, numpy, convert)와 GUI 스레드(qimage, paint)가 함께 기록함
+    STAGES = ("grab", "numpy", "convert", "qimage", "paint")
+    COUNTERS = ("captured", "skipped", "dropped", "displayed")
+
+    def __init__(self, size=600):
+        self.lock = threading.Lock()
+        self.stages = {name: RollingStat(size) for name in self.STAGES}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def reset(self):
+        with self.lock:
+            self.stages = {name: RollingStat(self.stages[name].values.maxlen) for name in self.STAGES}
+            self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.stages[stage].add(seconds * 1000)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def summary(self):
+        with self.lock:
+            return {
+                "stages": {name: stat.summary() for name, stat in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def hud_text(self):
+        # 컨트롤바에 표시할 짧은 요약 (단계별 p95, ms)
+        summary = self.summary()
+        stages = " ".join(f"{name} {s['p95']:.1f}" for name, s in summary["stages"].items())
+        counters = summary["counters"]
+        return f"p95 ms: {stages} | 드롭 {counters['dropped']} 생략 {counters['skipped']}"
+
+    def dump(self, path):
+        # 확장자가 .csv면 단계별 표로, 그 외에는 JSON으로 저장
+        summary = self.summary()
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "count", "p50", "p95", "p99", "max"])
+                for name, s in summary["stages"].items():
+                    writer.writerow([name, s["count"], s["p50"], s["p95"], s["p99"], s["max"]])
+                for name, value in summary["counters"].items():
+                    writer.writerow([name, value])
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
@@ -1,334 +1,749 @@
-from PyQt5.QtWidgets import QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QSlider
-from PyQt5.QtCore import Qt, QRect, QPoint
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QCursor
-
-class PipWindow(QMainWindow):
-    def __init__(self, img, parent=None):
-        super().__init__(parent)
-        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
-        self.setAttribute(Qt.WA_TranslucentBackground)
-        
-        self.img = img
-        self.opacity = 1.0
-        
-        # 원본 이미지 크기와 비율 저장
-        self.original_height, self.original_width = img.shape[:2]
-        self.aspect_ratio = self.original_width / self.original_height
-        
-        # 메인 위젯 설정
-        self.central_widget = QWidget()
-        self.setCentralWidget(self.central_widget)
-        
-        # 레이아웃 설정
-        self.layout = QVBoxLayout(self.central_widget)
-        self.layout.setContentsMargins(0, 0, 0, 0)  # 여백 제거
-        self.layout.setSpacing(0)  # 위젯 간 간격 제거
-        
-        # 이미지 레이블
-        self.img_label = QLabel()
-        self.img_label.setScaledContents(True)  # 이미지가 라벨 크기에 맞게 스케일링되도록 설정
-        self.update_image(img)
-        self.layout.addWidget(self.img_label)
-        
-        # 컨트롤 패널을 위한 위젯
-        self.control_widget = QWidget()
-        self.control_widget.setFixedHeight(40)  # 컨트롤 패널 높이 고정
-        self.control_widget.setStyleSheet("background-color: rgba(60, 60, 60, 255);")  # 배경색 추가
-        
-        control_layout = QHBoxLayout(self.control_widget)
-        control_layout.setContentsMargins(5, 5, 5, 5)  # 컨트롤 패널 내부 여백 설정
-        
-        # 투명도 슬라이더
-        self.opacity_slider = QSlider(Qt.Horizontal)
-        self.opacity_slider.setRange(10, 100)
-        self.opacity_slider.setValue(100)
-        self.opacity_slider.setFixedWidth(150)  # 버튼 너비 고정
-        self.opacity_slider.valueChanged.connect(self.change_opacity)
-        
-        # 닫기 버튼
-        self.close_btn = QPushButton("닫기")
-        self.close_btn.setFixedWidth(50)  # 버튼 너비 고정
-        self.close_btn.setStyleSheet("background-color: rgba(200,200,200,100);")  # 배경색 추가
-        self.close_btn.clicked.connect(self.close)
-        
-        # 레이아웃에 위젯 추가
-        opacity_label = QLabel("투명도:")
-        opacity_label.setStyleSheet("color: white;")  # 텍스트 색상 설정
-        control_layout.addWidget(opacity_label)
-        control_layout.addWidget(self.opacity_slider, 1)  # 슬라이더에 stretch 1 부여
-        control_layout.addStretch() 
-        control_layout.addWidget(self.close_btn)
-        
-        self.layout.addWidget(self.control_widget)
-        
-        # 드래그를 위한 변수
-        self.dragging = False
-        self.resizing = False
-        self.resize_edge = None
-        self.offset = None
-        
-        # 테두리 설정 - 더 넓게 설정하여 사용성 개선
-        self.border_width = 10  # 테두리 두께 증가 (더 쉽게 잡을 수 있도록)
-        self.visible_border_width = 2  # 실제 보이는 테두리 두께
-        self.border_color = QColor(255, 255, 255)  # 흰색 테두리
-        
-        # 리사이즈를 위한 마우스 추적 활성화
-        self.setMouseTracking(True)
-        self.central_widget.setMouseTracking(True)  # 중앙 위젯에도 마우스 추적 활성화
-        self.img_label.setMouseTracking(True)       # 이미지 라벨에도 마우스 추적 활성화
-        
-        # 초기 크기 설정 (컨트롤 패널 높이 고려)
-        control_height = self.control_widget.height()
-        self.resize(self.original_width, self.original_height + control_height)
-
-    
-    def update_image(self, img):
-        h, w, c = img.shape
-        qimg = QImage(img.data, w, h, w * c, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimg)
-        self.img_label.setPixmap(pixmap)
-    
-    def change_opacity(self, value):
-        self.opacity = value / 100
-        self.setWindowOpacity(self.opacity)
-    
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            cursor_pos = event.pos()
-            
-            # 테두리 영역인지 확인 (리사이징용)
-            edge = self.get_edge_at(cursor_pos)
-            if edge:
-                self.resizing = True
-                self.resize_edge = edge
-                self.setCursor(self.get_resize_cursor(edge))
-            else:
-                # 이미지 영역인지 확인 (드래그용)
-                img_height = self.height() - self.control_widget.height()
-                if cursor_pos.y() <= img_height:  # 이미지 영역 내에서만 드래그 가능
-                    self.dragging = True
-                    self.offset = event.pos()
-    
-    def mouseMoveEvent(self, event):
-        pos = event.pos()
-        
-        # 컨트롤 패널 위치 확인
-        control_height = self.control_widget.height()
-        img_height = self.height() - control_height
-        
-        # 컨트롤 패널 영역에서는 항상 일반 커서 사용
-        if pos.y() >= img_height:
-            if self.cursor().shape() != Qt.ArrowCursor:
-                self.setCursor(Qt.ArrowCursor)
-            return  # 컨트롤 패널에서는 추가 처리 없이 종료
-        
-        if self.resizing and self.resize_edge:
-            # 리사이징 처리
-            self.do_resize(pos)
-        elif self.dragging and self.offset:
-            # 드래그 처리
-            self.move(self.pos() + pos - self.offset)
-        else:
-            # 커서 모양 변경을 위한 처리 (테두리 위에 있을 때)
-            edge = self.get_edge_at(pos)
-            if edge:
-                cursor = self.get_resize_cursor(edge)
-                if self.cursor().shape() != cursor:
-                    self.setCursor(cursor)
-            elif self.cursor().shape() != Qt.ArrowCursor:
-                self.setCursor(Qt.ArrowCursor)
-    
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.dragging = False
-            self.resizing = False
-            self.resize_edge = None
-            self.setCursor(Qt.ArrowCursor)
-    
-    def get_edge_at(self, pos):
-        # 경계에서 테두리 너비 이내인지 확인 (픽셀 단위)
-        margin = self.border_width
-        width = self.width()
-        height = self.height()
-        
-        # 컨트롤 패널 위치 확인
-        control_height = self.control_widget.height()
-        img_height = height - control_height
-        
-        # 컨트롤 패널 영역에서는 항상 None 반환 (리사이징 비활성화)
-        if pos.y() >= img_height:
-            return None
-        
-        # 테두리 영역 검사를 더 관대하게 설정 (사용성 개선)
-        if pos.x() <= margin:  # 왼쪽 경계
-            if pos.y() <= margin:
-                return "top-left"
-            elif pos.y() >= img_height - margin:
-                return "bottom-left"
-            else:
-                return "left"
-        elif pos.x() >= width - margin:  # 오른쪽 경계
-            if pos.y() <= margin:
-                return "top-right"
-            elif pos.y() >= img_height - margin:
-                return "bottom-right"
-            else:
-                return "right"
-        elif pos.y() <= margin:  # 위쪽 경계
-            return "top"
-        elif pos.y() >= img_height - margin:  # 아래쪽 경계 (컨트롤 패널 위쪽)
-            return "bottom"
-        
-        return None
-    
-    def get_resize_cursor(self, edge):
-        # 각 모서리와 경계에 대한 커서 설정
-        if edge in ["left", "right"]:
-            return Qt.SizeHorCursor
-        elif edge in ["top", "bottom"]:
-            return Qt.SizeVerCursor
-        elif edge in ["top-left", "bottom-right"]:
-            return Qt.SizeFDiagCursor
-        elif edge in ["top-right", "bottom-left"]:
-            return Qt.SizeBDiagCursor
-        return Qt.ArrowCursor
-    
-    def do_resize(self, pos):
-        # 현재 창 정보
-        current_pos = self.pos()
-        current_size = self.size()
-        
-        # 컨트롤 패널의 높이 (고정값)
-        control_height = self.control_widget.height()
-        
-        # 새 크기와 위치 계산
-        new_pos_x = current_pos.x()
-        new_pos_y = current_pos.y()
-        new_width = current_size.width()
-        new_height = current_size.height()
-        
-        # 현재 이미지 영역 높이 (컨트롤 패널 제외)
-        img_height = new_height - control_height
-        
-        # 각 방향별 리사이징 처리
-        if "left" in self.resize_edge:
-            # 왼쪽 경계 이동
-            width_change = current_pos.x() + current_size.width() - (pos.x() + current_pos.x())
-            height_change = width_change / self.aspect_ratio
-            
-            new_pos_x = pos.x()
-            new_width = width_change
-            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
-            
-        if "right" in self.resize_edge:
-            # 오른쪽 경계 이동
-            width_change = pos.x()
-            height_change = width_change / self.aspect_ratio
-            
-            new_width = width_change
-            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
-            
-        if "top" in self.resize_edge:
-            # 위쪽 경계 이동
-            height_change = current_pos.y() + img_height - (pos.y() + current_pos.y())
-            width_change = height_change * self.aspect_ratio
-            
-            new_pos_y = pos.y()
-            new_width = width_change
-            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
-            
-        if "bottom" in self.resize_edge:
-            # 아래쪽 경계 이동 (컨트롤 패널 위치 고려)
-            height_change = pos.y() - current_pos.y()
-            width_change = height_change * self.aspect_ratio
-            
-            new_width = width_change
-            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
-        
-        # 최소 크기 제한
-        min_width = 100
-        min_img_height = min_width / self.aspect_ratio
-        min_height = min_img_height + control_height
-        
-        if new_width < min_width:
-            new_width = min_width
-            new_height = min_img_height + control_height
-        
-        # 위치와 크기 업데이트
-        if "left" in self.resize_edge or "top" in self.resize_edge:
-            # 왼쪽이나 위쪽 경계를 조정할 때만 위치 변경
-            if "left" in self.resize_edge:
-                new_pos_x = current_pos.x() + current_size.width() - new_width
-            if "top" in self.resize_edge:
-                new_pos_y = current_pos.y() + img_height - (new_height - control_height)
-            
-            self.move(new_pos_x, new_pos_y)
-        
-        # 크기 업데이트
-        self.resize(int(new_width), int(new_height))
-    
-    def paintEvent(self, event):
-        # 테두리 그리기
-        painter = QPainter(self)
-        painter.setOpacity(self.opacity)
-        
-        # 안티앨리어싱 설정
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # 이미지 영역 계산
-        img_height = self.height() - self.control_widget.height()
-        
-        # 테두리 펜 설정 - 시각적으로 보이는 테두리는 얇게 유지
-        pen = QPen(self.border_color)
-        pen.setWidth(self.visible_border_width)
-        painter.setPen(pen)
-        
-        # 이미지 영역 주변에 테두리 그리기 (실제 테두리는 얇게)
-        painter.drawRect(
-            self.visible_border_width // 2,  # 테두리 위치 조정
-            self.visible_border_width // 2, 
-            self.width() - self.visible_border_width,  # 테두리 두께 고려
-            img_height - self.visible_border_width
-        )
-        
-        # 테두리 부분이 리사이징 영역임을 나타내기 위한 시각적 표시
-        # 마우스 위치에 따라 해당 테두리를 강조할 수도 있음
-        current_edge = self.get_edge_at(self.mapFromGlobal(QCursor.pos()))
-        if current_edge:
-            highlight_pen = QPen(QColor(100, 200, 255))  # 파란색으로 강조
-            highlight_pen.setWidth(self.visible_border_width * 2)
-            painter.setPen(highlight_pen)
-            
-            # 현재 마우스가 있는 테두리 부분 강조
-            if "left" in current_edge:
-                painter.drawLine(
-                    self.visible_border_width // 2,
-                    0, 
-                    self.visible_border_width // 2,
-                    img_height
-                )
-            if "right" in current_edge:
-                painter.drawLine(
-                    self.width() - self.visible_border_width // 2,
-                    0, 
-                    self.width() - self.visible_border_width // 2,
-                    img_height
-                )
-            if "top" in current_edge:
-                painter.drawLine(
-                    0,
-                    self.visible_border_width // 2, 
-                    self.width(),
-                    self.visible_border_width // 2
-                )
-            if "bottom" in current_edge:
-                painter.drawLine(
-                    0,
-                    img_height - self.visible_border_width // 2, 
-                    self.width(),
-                    img_height - self.visible_border_width // 2
-                )
-        
-        # 이미지와 컨트롤 패널 사이에 구분선 그리기
-        painter.setPen(QPen(self.border_color, 1))
-        painter.drawLine(0, img_height, self.width(), img_height)
\ No newline at end of file
+import math
+import time
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QSlider, QSizePolicy, QFileDialog
+from PyQt5.QtCore import Qt, QRect, QPoint, QSize, QTimer, pyqtSignal
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor
+
+from frame_stats import PipelineStats
+
+class PipWindow(QMainWindow):
+    # 창이 닫힐 때 메인 창에 알림 (해당 영역 캡처 중지용)
+    closed = pyqtSignal()
+    # 이미지 영역 크기가 바뀔 때 알림 (캡처 스레드에서 표시 크기로 미리 축소하기 위함)
+    display_size_changed = pyqtSignal(int, int)
+    # 이미지 위에서 고른 자르기 영역 (표시 중인 이미지 기준 비율 x, y, w, h)과 자르기 해제
+    crop_selected = pyqtSignal(float, float, float, float)
+    crop_reset = pyqtSignal()
+    
+    def __init__(self, img, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        
+        self.img = img
+        self.frame = None         # 표시 중인 프레임 (frame_buffer를 감싼 QImage)
+        self.frame_buffer = None  # frame이 가리키는 BGRA 배열 (표시하는 동안 보관)
+        self.scaled_frame = None  # 창 크기에 맞게 변환해 둔 프레임 (크기가 바뀔 때만 다시 만듦)
+        self.scaled_key = None
+        self.opacity = 1.0
+        
+        # OCR로 추출한 텍스트 (텍스트 모드일 때 이미지 아래쪽에 자막처럼 표시)
+        self.text = ""
+        self.text_mode = False
+        
+        # 자르기 모드에서 드래그 중인 영역 (이미지 영역 좌표)
+        self.crop_start = None
+        self.crop_end = None
+        
+        # 단계별 계측 (캡처 스레드와 공유)
+        self.stats = PipelineStats()
+        
+        # 최근 프레임 기록 (FrameHistory, 정지 중에는 실시간 프레임 대신 기록의 seq 번 프레임을 표시)
+        self.history = None
+        self.paused = False
+        self.paused_at = 0.0
+        self.history_seq = None
+        self.history_frame = None   # 표시 중인 기록 프레임 (history_buffer를 감싼 QImage)
+        self.history_buffer = None
+        
+        # 원본 이미지 크기와 비율 저장
+        self.original_height, self.original_width = img.shape[:2]
+        self.aspect_ratio = self.original_width / self.original_height
+        
+        # 메인 위젯 설정
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+        
+        # 레이아웃 설정
+        self.layout = QVBoxLayout(self.central_widget)
+        self.layout.setContentsMargins(0, 0, 0, 0)  # 여백 제거
+        self.layout.setSpacing(0)  # 위젯 간 간격 제거
+        
+        # 이미지 영역 (이미지는 paintEvent에서 직접 그리고, 이 위젯은 자리만 차지함)
+        self.img_area = QWidget()
+        self.update_image(img)
+        self.layout.addWidget(self.img_area, 1)
+        
+        # 컨트롤 패널을 위한 위젯
+        self.control_widget = QWidget()
+        self.control_widget.setFixedHeight(40)  # 컨트롤 패널 높이 고정
+        self.control_widget.setStyleSheet("background-color: rgba(60, 60, 60, 255);")  # 배경색 추가
+        
+        control_layout = QHBoxLayout(self.control_widget)
+        control_layout.setContentsMargins(5, 5, 5, 5)  # 컨트롤 패널 내부 여백 설정
+        
+        # 투명도 슬라이더
+        self.opacity_slider = QSlider(Qt.Horizontal)
+        self.opacity_slider.setRange(10, 100)
+        self.opacity_slider.setValue(100)
+        self.opacity_slider.setFixedWidth(150)  # 버튼 너비 고정
+        self.opacity_slider.valueChanged.connect(self.change_opacity)
+        
+        # 닫기 버튼
+        self.close_btn = QPushButton("닫기")
+        self.close_btn.setFixedWidth(50)  # 버튼 너비 고정
+        self.close_btn.setStyleSheet("background-color: rgba(200,200,200,100);")  # 배경색 추가
+        self.close_btn.clicked.connect(self.close)
+        
+        # 성능 HUD (단계별 p95 시간과 드롭 수 표시, 기본은 숨김)
+        self.hud_label = QLabel()
+        self.hud_label.setStyleSheet("color: white; font-size: 9px;")
+        self.hud_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Preferred)  # 창 최소 너비에 영향 없도록
+        self.hud_label.hide()
+        
+        self.hud_btn = QPushButton("HUD")
+        self.hud_btn.setCheckable(True)
+        self.hud_btn.setFixedWidth(45)
+        self.hud_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        self.hud_btn.toggled.connect(self.toggle_hud)
+        
+        # 계측 결과 저장 버튼 (HUD를 켰을 때만 표시)
+        self.dump_btn = QPushButton("저장")
+        self.dump_btn.setFixedWidth(45)
+        self.dump_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        self.dump_btn.clicked.connect(self.dump_stats)
+        self.dump_btn.hide()
+        
+        # 자르기 버튼 (켠 뒤 이미지 위를 드래그하면 그 부분만 캡처), 원본 버튼 (자른 상태에서만 표시)
+        self.crop_btn = QPushButton("자르기")
+        self.crop_btn.setCheckable(True)
+        self.crop_btn.setFixedWidth(50)
+        self.crop_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        
+        self.reset_crop_btn = QPushButton("원본")
+        self.reset_crop_btn.setFixedWidth(45)
+        self.reset_crop_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        self.reset_crop_btn.clicked.connect(self.crop_reset.emit)
+        self.reset_crop_btn.hide()
+        
+        # 추출한 텍스트 복사 버튼 (텍스트 모드일 때만 표시)
+        self.copy_btn = QPushButton("복사")
+        self.copy_btn.setFixedWidth(45)
+        self.copy_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        self.copy_btn.clicked.connect(self.copy_text)
+        self.copy_btn.hide()
+        
+        # 정지 버튼 (기록이 있을 때만 표시), 정지 중에는 투명도 슬라이더 자리에 되돌려 보기 슬라이더 표시
+        self.pause_btn = QPushButton("정지")
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.setFixedWidth(45)
+        self.pause_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        self.pause_btn.toggled.connect(self.set_paused)
+        self.pause_btn.hide()
+        
+        self.prev_btn = QPushButton("◀")
+        self.prev_btn.setFixedWidth(25)
+        self.prev_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        self.prev_btn.clicked.connect(lambda: self.step_history(-1))
+        
+        self.next_btn = QPushButton("▶")
+        self.next_btn.setFixedWidth(25)
+        self.next_btn.setStyleSheet("background-color: rgba(200,200,200,100);")
+        self.next_btn.clicked.connect(lambda: self.step_history(1))
+        
+        self.history_slider = QSlider(Qt.Horizontal)
+        self.history_slider.valueChanged.connect(self.show_history)
+        
+        self.history_label = QLabel()
+        self.history_label.setStyleSheet("color: white;")
+        
+        self.hud_timer = QTimer(self)
+        self.hud_timer.timeout.connect(self.update_hud)
+        
+        # 레이아웃에 위젯 추가
+        self.opacity_label = QLabel("투명도:")
+        self.opacity_label.setStyleSheet("color: white;")  # 텍스트 색상 설정
+        control_layout.addWidget(self.opacity_label)
+        control_layout.addWidget(self.opacity_slider, 1)  # 슬라이더에 stretch 1 부여
+        control_layout.addWidget(self.prev_btn)
+        control_layout.addWidget(self.history_slider, 1)
+        control_layout.addWidget(self.next_btn)
+        control_layout.addWidget(self.history_label)
+        control_layout.addStretch() 
+        control_layout.addWidget(self.hud_label, 2)
+        control_layout.addWidget(self.pause_btn)
+        control_layout.addWidget(self.crop_btn)
+        control_layout.addWidget(self.reset_crop_btn)
+        control_layout.addWidget(self.hud_btn)
+        control_layout.addWidget(self.dump_btn)
+        control_layout.addWidget(self.copy_btn)
+        control_layout.addWidget(self.close_btn)
+        
+        self.layout.addWidget(self.control_widget)
+        self.show_history_controls(False)
+        
+        # 드래그를 위한 변수
+        self.dragging = False
+        self.resizing = False
+        self.resize_edge = None
+        self.offset = None
+        
+        # 테두리 설정 - 더 넓게 설정하여 사용성 개선
+        self.border_width = 10  # 테두리 두께 증가 (더 쉽게 잡을 수 있도록)
+        self.visible_border_width = 2  # 실제 보이는 테두리 두께
+        self.border_color = QColor(255, 255, 255)  # 흰색 테두리
+        
+        # 테두리, 구분선, 테두리 강조를 미리 그려 둔 층 (창 크기, 강조할 테두리, 투명도가 바뀔 때만 다시 그림)
+        self.hover_edge = None  # 마우스가 올라가 있는 테두리 (마우스 이벤트에서 갱신)
+        self.chrome = None
+        self.chrome_key = None
+        
+        # 리사이즈를 위한 마우스 추적 활성화
+        self.setMouseTracking(True)
+        self.central_widget.setMouseTracking(True)  # 중앙 위젯에도 마우스 추적 활성화
+        self.img_area.setMouseTracking(True)        # 이미지 영역에도 마우스 추적 활성화
+        
+        # 초기 크기 설정 (컨트롤 패널 높이 고려)
+        control_height = self.control_widget.height()
+        ratio = self.devicePixelRatioF()
+        self.resize(round(self.original_width / ratio), round(self.original_height / ratio) + control_height)
+
+    
+    def update_image(self, img, dirty_rect=None):
+        # BGRA 배열을 복사 없이 QImage(Format_RGB32)로 감싸서 표시
+        # QImage는 배열 메모리를 그대로 가리키므로 다음 프레임이 올 때까지 배열을 보관하고,
+        # 그 전에 보관하던 배열을 반환함 (호출한 쪽에서 버퍼 풀로 돌려줌)
+        start_time = time.perf_counter()
+        h, w = img.shape[:2]
+        previous = self.frame_buffer
+        same_size = self.frame is not None and self.frame.width() == w and self.frame.height() == h
+        
+        self.frame_buffer = img
+        self.frame = QImage(img.data, w, h, img.strides[0], QImage.Format_RGB32)
+        self.stats.record("qimage", time.perf_counter() - start_time)
+        self.stats.count("displayed")
+        
+        # 정지 중에는 실시간 프레임을 받아 두기만 하고 다시 그리지 않음 (슬라이더 범위만 갱신)
+        if self.paused:
+            self.update_history_range()
+            return previous
+        
+        # 프레임이 이미지 영역과 같은 크기(물리 픽셀)면 바뀐 영역만 다시 그림
+        target = self.image_rect()
+        if dirty_rect is not None and same_size and (w, h) == self.display_size():
+            ratio = self.devicePixelRatioF()
+            x, y, dw, dh = dirty_rect
+            x0, y0 = math.floor(x / ratio), math.floor(y / ratio)
+            self.update(QRect(x0, y0, math.ceil((x + dw) / ratio) - x0, math.ceil((y + dh) / ratio) - y0))
+        else:
+            self.update(target)
+        return previous
+    
+    def image_rect(self):
+        # 컨트롤 패널을 제외한 이미지 영역
+        control_height = self.control_widget.height() if hasattr(self, "control_widget") else 0
+        return QRect(0, 0, self.width(), self.height() - control_height)
+    
+    def display_size(self):
+        # 이미지 영역의 물리 픽셀 크기 (고해상도 배율에서는 창 크기 * devicePixelRatio)
+        rect = self.image_rect()
+        ratio = self.devicePixelRatioF()
+        return round(rect.width() * ratio), round(rect.height() * ratio)
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # 크기가 바뀐 뒤 첫 프레임에서만 다시 축소하도록 알림
+        self.display_size_changed.emit(*self.display_size())
+    
+    def shown_frame(self):
+        # 정지 중이면 기록에서 고른 프레임, 아니면 실시간 프레임
+        if self.paused and self.history_frame is not None:
+            return self.history_frame
+        return self.frame
+    
+    def scaled_image(self, target):
+        # 프레임 크기가 이미지 영역의 물리 픽셀 크기와 같으면 그대로 사용
+        # (devicePixelRatio를 지정해서 고해상도 배율에서도 1:1 픽셀로 그려짐)
+        frame = self.shown_frame()
+        ratio = self.devicePixelRatioF()
+        size = QSize(*self.display_size())
+        if frame.size() == size:
+            frame.setDevicePixelRatio(ratio)
+            return frame
+        
+        # 다르면 (프레임, 크기)가 바뀔 때만 한 번 변환해서 캐시
+        key = (frame.cacheKey(), size.width(), size.height())
+        if key != self.scaled_key:
+            self.scaled_frame = frame.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self.scaled_frame.setDevicePixelRatio(ratio)
+            self.scaled_key = key
+        return self.scaled_frame
+    
+    def toggle_hud(self, checked):
+        self.hud_label.setVisible(checked)
+        self.dump_btn.setVisible(checked)
+        if checked:
+            self.update_hud()
+            self.hud_timer.start(500)
+        else:
+            self.hud_timer.stop()
+    
+    def update_hud(self):
+        text = self.stats.hud_text()
+        if self.history is not None:
+            s = self.history.stats()
+            text += (
+                f" | 기록 {s['frames']}장 {s['span_s']:.0f}s "
+                f"{s['bytes'] / 1048576:.1f}/{s['budget_bytes'] / 1048576:.0f}MB x{s['compression']:.1f} "
+                f"(+작업 버퍼 {s['working_bytes'] / 1048576:.1f}MB)"
+            )
+        self.hud_label.setText(text)
+    
+    def set_history(self, history):
+        # 영역의 프레임 기록을 연결하면 정지 버튼 표시 (None이면 숨김)
+        if history is None:
+            self.pause_btn.setChecked(False)
+        self.history = history
+        self.pause_btn.setVisible(history is not None)
+    
+    def show_history_controls(self, visible):
+        self.opacity_label.setVisible(not visible)
+        self.opacity_slider.setVisible(not visible)
+        for widget in (self.prev_btn, self.history_slider, self.next_btn, self.history_label):
+            widget.setVisible(visible)
+    
+    def set_paused(self, paused):
+        # 정지하면 가장 최근 기록 프레임부터 보여 주고, 다시 누르면 실시간 표시로 돌아감
+        if paused and (self.history is None or self.history.seq_range() is None):
+            self.pause_btn.setChecked(False)
+            return
+        self.paused = paused
+        self.paused_at = time.time()
+        self.show_history_controls(paused)
+        if paused:
+            self.history_seq = None
+            self.update_history_range()
+            self.history_slider.setValue(self.history_slider.maximum())
+            self.show_history(self.history_slider.value())
+        else:
+            self.history_frame = self.history_buffer = None
+            self.update(self.image_rect())
+    
+    def update_history_range(self):
+        # 정지 중에도 기록은 계속 쌓이고 오래된 것은 버려지므로 슬라이더 범위를 맞춤
+        seq_range = self.history.seq_range() if self.history is not None else None
+        if seq_range is not None:
+            self.history_slider.setRange(*seq_range)
+    
+    def step_history(self, delta):
+        self.update_history_range()
+        self.history_slider.setValue(self.history_slider.value() + delta)
+    
+    def show_history(self, seq):
+        if not self.paused or seq == self.history_seq:
+            return
+        item = self.history.frame(seq)
+        if item is None:
+            return
+        timestamp, buffer = item
+        h, w = buffer.shape[:2]
+        self.history_seq = seq
+        self.history_buffer = buffer
+        self.history_frame = QImage(buffer.data, w, h, buffer.strides[0], QImage.Format_RGB32)
+        self.history_label.setText(f"-{max(0.0, self.paused_at - timestamp):.1f}s")
+        self.update(self.image_rect())
+    
+    def keyPressEvent(self, event):
+        # 스페이스: 정지/재개, 정지 중 왼쪽/오른쪽 화살표: 한 프레임씩 이동
+        if event.key() == Qt.Key_Space and self.pause_btn.isVisible():
+            self.pause_btn.toggle()
+        elif self.paused and event.key() in (Qt.Key_Left, Qt.Key_Right):
+            self.step_history(-1 if event.key() == Qt.Key_Left else 1)
+        else:
+            super().keyPressEvent(event)
+    
+    def dump_stats(self):
+        # 계측 결과를 JSON 또는 CSV 파일로 저장
+        path, _ = QFileDialog.getSaveFileName(self, "계측 결과 저장", "pip_stats.json", "JSON (*.json);;CSV (*.csv)")
+        if path:
+            self.stats.dump(path)
+    
+    def set_source_size(self, width, height, image_size):
+        # 캡처 영역이 바뀌었을 때 (자르기/해제) 비율을 다시 잡고 이미지 영역을 image_size(물리 픽셀)로 맞춤
+        self.original_width, self.original_height = width, height
+        self.aspect_ratio = width / height
+        ratio = self.devicePixelRatioF()
+        self.resize(max(1, round(image_size[0] / ratio)), max(1, round(image_size[1] / ratio)) + self.control_widget.height())
+    
+    def set_cropped(self, cropped):
+        self.reset_crop_btn.setVisible(cropped)
+    
+    def crop_rect(self):
+        # 드래그 중인 자르기 영역 (이미지 영역 안으로 제한)
+        return QRect(self.crop_start, self.crop_end).normalized().intersected(self.image_rect())
+    
+    def set_text_mode(self, enabled):
+        self.text_mode = enabled
+        self.copy_btn.setVisible(enabled)
+        self.update(self.image_rect())
+    
+    def set_text(self, text):
+        # 텍스트 띠가 있는 부분만 다시 그림
+        self.text = text
+        if self.text_mode:
+            self.update(self.text_rect())
+    
+    def text_rect(self):
+        # 이미지 영역 아래쪽 두 줄 높이의 띠
+        target = self.image_rect()
+        height = min(target.height(), self.fontMetrics().height() * 2 + 8)
+        return QRect(0, target.bottom() - height + 1, target.width(), height)
+    
+    def copy_text(self):
+        if self.text:
+            QApplication.clipboard().setText(self.text)
+    
+    def change_opacity(self, value):
+        self.opacity = value / 100
+        self.setWindowOpacity(self.opacity)
+    
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            cursor_pos = event.pos()
+            
+            # 자르기 모드에서는 이미지 위 드래그로 자를 영역 선택
+            if self.crop_btn.isChecked() and self.image_rect().contains(cursor_pos):
+                self.crop_start = self.crop_end = cursor_pos
+                return
+            
+            # 테두리 영역인지 확인 (리사이징용)
+            edge = self.get_edge_at(cursor_pos)
+            if edge:
+                self.resizing = True
+                self.resize_edge = edge
+                self.setCursor(self.get_resize_cursor(edge))
+            else:
+                # 이미지 영역인지 확인 (드래그용)
+                img_height = self.height() - self.control_widget.height()
+                if cursor_pos.y() <= img_height:  # 이미지 영역 내에서만 드래그 가능
+                    self.dragging = True
+                    self.offset = event.pos()
+    
+    def mouseMoveEvent(self, event):
+        pos = event.pos()
+        
+        if self.crop_start is not None:
+            # 이전/현재 자르기 영역 테두리 부분만 다시 그림
+            old_rect = self.crop_rect()
+            self.crop_end = pos
+            self.update(old_rect.united(self.crop_rect()).adjusted(-2, -2, 2, 2))
+            return
+        
+        # 컨트롤 패널 위치 확인
+        control_height = self.control_widget.height()
+        img_height = self.height() - control_height
+        
+        # 컨트롤 패널 영역에서는 항상 일반 커서 사용
+        if pos.y() >= img_height:
+            if self.cursor().shape() != Qt.ArrowCursor:
+                self.setCursor(Qt.ArrowCursor)
+            if not self.resizing:
+                self.set_hover_edge(None)
+            return  # 컨트롤 패널에서는 추가 처리 없이 종료
+        
+        if self.resizing and self.resize_edge:
+            # 리사이징 처리
+            self.do_resize(pos)
+        elif self.dragging and self.offset:
+            # 드래그 처리
+            self.move(self.pos() + pos - self.offset)
+        else:
+            # 커서 모양 변경을 위한 처리 (테두리 위에 있을 때)
+            edge = self.get_edge_at(pos)
+            self.set_hover_edge(edge)
+            if edge:
+                cursor = self.get_resize_cursor(edge)
+                if self.cursor().shape() != cursor:
+                    self.setCursor(cursor)
+            elif self.cursor().shape() != Qt.ArrowCursor:
+                self.setCursor(Qt.ArrowCursor)
+    
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self.crop_start is not None:
+            # 이미지 대비 비율로 알리고 자르기 모드 종료 (너무 작은 영역은 무시)
+            rect = self.crop_rect()
+            target = self.image_rect()
+            self.crop_start = self.crop_end = None
+            self.crop_btn.setChecked(False)
+            self.update(rect.adjusted(-2, -2, 2, 2))
+            if rect.width() > 10 and rect.height() > 10:
+                self.crop_selected.emit(
+                    rect.x() / target.width(), rect.y() / target.height(),
+                    rect.width() / target.width(), rect.height() / target.height()
+                )
+            return
+        if event.button() == Qt.LeftButton:
+            self.dragging = False
+            self.resizing = False
+            self.resize_edge = None
+            self.setCursor(Qt.ArrowCursor)
+            self.set_hover_edge(self.get_edge_at(event.pos()))
+    
+    def leaveEvent(self, event):
+        if not self.resizing:
+            self.set_hover_edge(None)
+        super().leaveEvent(event)
+    
+    def set_hover_edge(self, edge):
+        # 강조할 테두리가 바뀌었을 때만 테두리 부분을 다시 그림
+        if edge == self.hover_edge:
+            return
+        self.hover_edge = edge
+        for band in self.chrome_bands()[:4]:
+            self.update(band)
+    
+    def chrome_bands(self):
+        # 테두리 층에서 무언가 그려지는 띠 (위, 아래, 왼쪽, 오른쪽 테두리와 구분선)
+        width = self.width()
+        img_height = self.image_rect().height()
+        band = self.visible_border_width * 2
+        return [
+            QRect(0, 0, width, band),
+            QRect(0, img_height - band, width, band),
+            QRect(0, 0, band, img_height),
+            QRect(width - band, 0, band, img_height),
+            QRect(0, img_height - 1, width, 3),
+        ]
+    
+    def get_edge_at(self, pos):
+        # 경계에서 테두리 너비 이내인지 확인 (픽셀 단위)
+        margin = self.border_width
+        width = self.width()
+        height = self.height()
+        
+        # 컨트롤 패널 위치 확인
+        control_height = self.control_widget.height()
+        img_height = height - control_height
+        
+        # 컨트롤 패널 영역에서는 항상 None 반환 (리사이징 비활성화)
+        if pos.y() >= img_height:
+            return None
+        
+        # 테두리 영역 검사를 더 관대하게 설정 (사용성 개선)
+        if pos.x() <= margin:  # 왼쪽 경계
+            if pos.y() <= margin:
+                return "top-left"
+            elif pos.y() >= img_height - margin:
+                return "bottom-left"
+            else:
+                return "left"
+        elif pos.x() >= width - margin:  # 오른쪽 경계
+            if pos.y() <= margin:
+                return "top-right"
+            elif pos.y() >= img_height - margin:
+                return "bottom-right"
+            else:
+                return "right"
+        elif pos.y() <= margin:  # 위쪽 경계
+            return "top"
+        elif pos.y() >= img_height - margin:  # 아래쪽 경계 (컨트롤 패널 위쪽)
+            return "bottom"
+        
+        return None
+    
+    def get_resize_cursor(self, edge):
+        # 각 모서리와 경계에 대한 커서 설정
+        if edge in ["left", "right"]:
+            return Qt.SizeHorCursor
+        elif edge in ["top", "bottom"]:
+            return Qt.SizeVerCursor
+        elif edge in ["top-left", "bottom-right"]:
+            return Qt.SizeFDiagCursor
+        elif edge in ["top-right", "bottom-left"]:
+            return Qt.SizeBDiagCursor
+        return Qt.ArrowCursor
+    
+    def do_resize(self, pos):
+        # 현재 창 정보
+        current_pos = self.pos()
+        current_size = self.size()
+        
+        # 컨트롤 패널의 높이 (고정값)
+        control_height = self.control_widget.height()
+        
+        # 새 크기와 위치 계산
+        new_pos_x = current_pos.x()
+        new_pos_y = current_pos.y()
+        new_width = current_size.width()
+        new_height = current_size.height()
+        
+        # 현재 이미지 영역 높이 (컨트롤 패널 제외)
+        img_height = new_height - control_height
+        
+        # 각 방향별 리사이징 처리
+        if "left" in self.resize_edge:
+            # 왼쪽 경계 이동
+            width_change = current_pos.x() + current_size.width() - (pos.x() + current_pos.x())
+            height_change = width_change / self.aspect_ratio
+            
+            new_pos_x = pos.x()
+            new_width = width_change
+            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
+            
+        if "right" in self.resize_edge:
+            # 오른쪽 경계 이동
+            width_change = pos.x()
+            height_change = width_change / self.aspect_ratio
+            
+            new_width = width_change
+            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
+            
+        if "top" in self.resize_edge:
+            # 위쪽 경계 이동
+            height_change = current_pos.y() + img_height - (pos.y() + current_pos.y())
+            width_change = height_change * self.aspect_ratio
+            
+            new_pos_y = pos.y()
+            new_width = width_change
+            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
+            
+        if "bottom" in self.resize_edge:
+            # 아래쪽 경계 이동 (컨트롤 패널 위치 고려)
+            height_change = pos.y() - current_pos.y()
+            width_change = height_change * self.aspect_ratio
+            
+            new_width = width_change
+            new_height = height_change + control_height  # 컨트롤 패널 높이 추가
+        
+        # 최소 크기 제한
+        min_width = 100
+        min_img_height = min_width / self.aspect_ratio
+        min_height = min_img_height + control_height
+        
+        if new_width < min_width:
+            new_width = min_width
+            new_height = min_img_height + control_height
+        
+        # 위치와 크기 업데이트
+        if "left" in self.resize_edge or "top" in self.resize_edge:
+            # 왼쪽이나 위쪽 경계를 조정할 때만 위치 변경
+            if "left" in self.resize_edge:
+                new_pos_x = current_pos.x() + current_size.width() - new_width
+            if "top" in self.resize_edge:
+                new_pos_y = current_pos.y() + img_height - (new_height - control_height)
+            
+            self.move(new_pos_x, new_pos_y)
+        
+        # 크기 업데이트
+        self.resize(int(new_width), int(new_height))
+    
+    def paintEvent(self, event):
+        start_time = time.perf_counter()
+        painter = QPainter(self)
+        
+        # 이미지 그리기 (미리 크기를 맞춘 프레임이라 여기서는 다시 스케일링하지 않음)
+        target = self.image_rect()
+        if self.shown_frame() is not None and not target.isEmpty():
+            painter.drawImage(target.topLeft(), self.scaled_image(target))
+        
+        # 자르기 모드에서 드래그 중인 영역 표시
+        if self.crop_start is not None:
+            painter.setPen(QPen(QColor(255, 220, 0), 1, Qt.DashLine))
+            painter.drawRect(self.crop_rect())
+        
+        # 추출한 텍스트를 반투명 띠 위에 표시
+        if self.text_mode and self.text:
+            text_rect = self.text_rect()
+            painter.fillRect(text_rect, QColor(0, 0, 0, 160))
+            painter.setPen(QColor(255, 255, 255))
+            painter.drawText(text_rect.adjusted(6, 2, -6, -2), Qt.AlignCenter | Qt.TextWordWrap, self.text)
+        
+        # 테두리, 구분선, 테두리 강조는 캐시해 둔 층에서 다시 그릴 부분과 겹치는 띠만 옮겨 그림
+        # (이미지 안쪽만 바뀐 프레임에서는 아무것도 그리지 않음)
+        chrome = self.chrome_layer()
+        ratio = chrome.devicePixelRatioF()
+        for band in self.chrome_bands():
+            rect = band.intersected(event.rect())
+            if not rect.isEmpty():
+                source = QRect(
+                    round(rect.x() * ratio), round(rect.y() * ratio),
+                    round(rect.width() * ratio), round(rect.height() * ratio)
+                )
+                painter.drawPixmap(rect, chrome, source)
+        painter.end()
+        
+        self.stats.record("paint", time.perf_counter() - start_time)
+    
+    def chrome_layer(self):
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), self.image_rect().height(), self.hover_edge, self.opacity, ratio)
+        if key == self.chrome_key:
+            return self.chrome
+        
+        chrome = QPixmap(round(self.width() * ratio), round(self.height() * ratio))
+        chrome.setDevicePixelRatio(ratio)
+        chrome.fill(Qt.transparent)
+        painter = QPainter(chrome)
+        
+        # 테두리 그리기
+        painter.setOpacity(self.opacity)
+        
+        # 안티앨리어싱 설정
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        # 이미지 영역 계산
+        img_height = self.image_rect().height()
+        
+        # 테두리 펜 설정 - 시각적으로 보이는 테두리는 얇게 유지
+        pen = QPen(self.border_color)
+        pen.setWidth(self.visible_border_width)
+        painter.setPen(pen)
+        
+        # 이미지 영역 주변에 테두리 그리기 (실제 테두리는 얇게)
+        painter.drawRect(
+            self.visible_border_width // 2,  # 테두리 위치 조정
+            self.visible_border_width // 2, 
+            self.width() - self.visible_border_width,  # 테두리 두께 고려
+            img_height - self.visible_border_width
+        )
+        
+        # 마우스가 올라가 있는 테두리를 강조해서 리사이징 영역임을 표시
+        current_edge = self.hover_edge
+        if current_edge:
+            highlight_pen = QPen(QColor(100, 200, 255))  # 파란색으로 강조
+            highlight_pen.setWidth(self.visible_border_width * 2)
+            painter.setPen(highlight_pen)
+            
+            # 현재 마우스가 있는 테두리 부분 강조
+            if "left" in current_edge:
+                painter.drawLine(
+                    self.visible_border_width // 2,
+                    0, 
+                    self.visible_border_width // 2,
+                    img_height
+                )
+            if "right" in current_edge:
+                painter.drawLine(
+                    self.width() - self.visible_border_width // 2,
+                    0, 
+                    self.width() - self.visible_border_width // 2,
+                    img_height
+                )
+            if "top" in current_edge:
+                painter.drawLine(
+                    0,
+                    self.visible_border_width // 2, 
+                    self.width(),
+                    self.visible_border_width // 2
+                )
+            if "bottom" in current_edge:
+                painter.drawLine(
+                    0,
+                    img_height - self.visible_border_width // 2, 
+                    self.width(),
+                    img_height - self.visible_border_width // 2
+                )
+        
+        # 이미지와 컨트롤 패널 사이에 구분선 그리기
+        painter.setPen(QPen(self.border_color, 1))
+        painter.drawLine(0, img_height, self.width(), img_height)
+        painter.end()
+        
+        self.chrome = chrome
+        self.chrome_key = key
+        return chrome
+    
+    def closeEvent(self, event):
+        self.closed.emit()
+        super().closeEvent(event)
\ No newline at end of file
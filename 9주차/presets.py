@@ -0,0 +1,146 @@
+import json
+import os
+
+# 영역 프리셋과 마지막 세션을 저장하는 설정 파일
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".pip_capture_presets.json")
+
+
+def monitor_identity(area, monitors):
+    # 영역이 들어 있는 모니터의 번호와 배치 (다음 실행 때 같은 모니터인지 확인하는 용도)
+    from capture_engine import monitor_index_for
+
+    index = monitor_index_for(area, monitors)
+    mon = monitors[index]
+    return {"index": index, "left": mon["left"], "top": mon["top"], "width": mon["width"], "height": mon["height"]}
+
+
+def covered_by_monitors(area, monitors):
+    # 영역이 모니터들로 빈틈없이 덮이는지 확인 (여러 모니터에 걸친 영역도 허용)
+    # 모니터 목록에 전체 가상 화면(monitors[0])만 있으면 그것을 모니터 하나로 봄
+    from capture_engine import split_area
+
+    if len(monitors) < 2:
+        monitors = monitors * 2
+    x, y, w, h = area
+    if w <= 0 or h <= 0:
+        return False
+    pieces = [piece for piece, index in split_area(area, monitors) if index]
+    return sum(pw * ph for _, _, pw, ph in pieces) == w * h
+
+
+def is_int(value):
+    # JSON에서 읽은 값이 정수인지 확인 (true/false는 제외)
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def read_region(region):
+    # 저장된 영역 항목 하나를 확인해서 {"area", "monitor", "geometry", "opacity"}로 정리해 반환
+    # 손으로 고쳤거나 예전 형식이라 area가 정수 4개가 아니면 None (건너뛸 항목)
+    # monitor, geometry, opacity는 없거나 형식이 다르면 없는 것으로 봄
+    if not isinstance(region, dict):
+        return None
+    area = region.get("area")
+    if not (isinstance(area, list) and len(area) == 4 and all(is_int(v) for v in area)):
+        return None
+
+    monitor = region.get("monitor")
+    keys = ("index", "left", "top", "width", "height")
+    if not (isinstance(monitor, dict) and all(is_int(monitor.get(key)) for key in keys)):
+        monitor = None
+    geometry = region.get("geometry")
+    if not (isinstance(geometry, list) and len(geometry) == 4 and all(is_int(v) for v in geometry)):
+        geometry = None
+    opacity = region.get("opacity")
+    if not (isinstance(opacity, (int, float)) and not isinstance(opacity, bool) and 0 <= opacity <= 1):
+        opacity = 1.0
+    return {"area": tuple(area), "monitor": monitor, "geometry": geometry and tuple(geometry), "opacity": opacity}
+
+
+def read_session(session):
+    # 세션의 영역 항목들을 read_region으로 확인해서 (정리한 항목 목록, 건너뛴 항목 수) 반환
+    # 세션이나 regions가 형식에 맞지 않으면 영역이 없는 것으로 봄
+    regions = session.get("regions") if isinstance(session, dict) else None
+    if not isinstance(regions, list):
+        return [], 0
+    entries = [read_region(region) for region in regions]
+    valid = [entry for entry in entries if entry is not None]
+    return valid, len(entries) - len(valid)
+
+
+def validate_area(region, monitors):
+    # 저장한 영역을 현재 모니터 배치에 맞춰 확인하고, 사용할 수 있는 캡처 영역을 반환 (없으면 None)
+    # - 같은 번호의 모니터가 같은 크기로 있으면 그 모니터의 현재 위치 기준으로 옮김 (배치만 바뀐 경우)
+    # - 같은 크기의 모니터가 다른 번호로 있으면 그 모니터로 옮김
+    # - 옮긴 영역이 모니터들(여러 개에 걸쳐도 됨)로 빈틈없이 덮일 때만 사용 (화면 밖으로 나가면 None)
+    # region은 read_region으로 정리한 항목
+    x, y, w, h = region["area"]
+    saved = region.get("monitor")
+    candidates = []
+    if saved is not None:
+        index = saved["index"]
+        if 0 < index < len(monitors):
+            candidates.append(monitors[index])
+        candidates.extend(mon for mon in monitors[1:] if mon not in candidates)
+        for mon in candidates:
+            if (mon["width"], mon["height"]) == (saved["width"], saved["height"]):
+                x += mon["left"] - saved["left"]
+                y += mon["top"] - saved["top"]
+                break
+
+    if covered_by_monitors((x, y, w, h), monitors):
+        return (x, y, w, h)
+    return None
+
+
+class PresetStore:
+    # 이름 붙인 세션 프리셋과 마지막 세션을 JSON 파일 하나에 보관하는 클래스
+    # 세션: {"regions": [{"area", "monitor", "geometry", "opacity"}, ...], "min_fps", "max_fps"}
+    # path가 None이면 파일 없이 메모리에만 보관 (벤치마크용)
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.presets = {}
+        self.last_session = None
+        self.load()
+
+    def load(self):
+        # 파일이 없거나 깨져 있거나 JSON 객체가 아니면 빈 상태로 시작
+        if self.path is None:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        presets = data.get("presets")
+        last_session = data.get("last_session")
+        self.presets = presets if isinstance(presets, dict) else {}
+        self.last_session = last_session if isinstance(last_session, dict) else None
+
+    def save(self):
+        if self.path is None:
+            return
+        data = {"presets": self.presets, "last_session": self.last_session}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def names(self):
+        return sorted(self.presets)
+
+    def get(self, name):
+        return self.presets.get(name)
+
+    def put(self, name, session):
+        self.presets[name] = session
+        self.save()
+
+    def remove(self, name):
+        if self.presets.pop(name, None) is not None:
+            self.save()
+
+    def set_last_session(self, session):
+        self.last_session = session
+        self.save()
@@ -0,0 +1,320 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from capture_engine import CaptureEngine, RegionGrabber, fill_buffer, output_size, sampling_step, scale_rect
+from change_detector import ChangeDetector, union_rect
+from frame_scheduler import AdaptiveScheduler
+from frame_stats import PipelineStats
+from shm_ring import SharedFrameRing
+
+
+class ProcessRegion:
+    # 캡처 프로세스 안에서 영역 하나의 상태 (공유 메모리 링, 변화 감지기, 슬롯별 갱신 대상)
+    def __init__(self, ring):
+        self.ring = ring
+        self.detector = ChangeDetector()
+        self.display_size = None
+        self.output_size = None
+        # stale_rects: 슬롯별로 최신 프레임과 달라진 영역 (출력 좌표, None이면 최신 상태)
+        w, h = ring.width, ring.height
+        self.stale_rects = [(0, 0, w, h)] * ring.slots
+        # 슬롯이 모자라 버린 프레임의 바뀐 영역 (다음에 보내는 프레임에 합침)
+        self.pending_rect = None
+
+
+def capture_process_main(commands, ready_queue, fps_value, source_factory, min_fps, max_fps):
+    # 캡처 프로세스의 메인 루프 (Qt 없이 grab, 변화 감지, 버퍼 갱신을 모두 이 프로세스에서 처리)
+    # commands: GUI 프로세스에서 오는 명령 ("add", "remove", "size", "fps", "fast", "stop")
+    # ready_queue: 새 프레임이 준비된 영역 번호를 GUI 프로세스로 알림 (프레임 자체는 공유 메모리로 전달)
+    engine = CaptureEngine(source_factory() if source_factory else None)
+    scheduler = AdaptiveScheduler(min_fps, max_fps)
+    regions = {}
+    fast_scaling = False
+    running = True
+
+    try:
+        while running:
+            start_time = time.perf_counter()
+
+            # 쌓인 명령을 모두 반영
+            while True:
+                try:
+                    command = commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command[0] == "add":
+                    _, region_id, area, ring_name, slots = command
+                    ring = SharedFrameRing.attach(ring_name, area[2], area[3], slots)
+                    regions[region_id] = ProcessRegion(ring)
+                    engine.add_region(region_id, area)
+                elif command[0] == "remove":
+                    region = regions.pop(command[1], None)
+                    if region is not None:
+                        region.ring.close()
+                    engine.remove(command[1])
+                elif command[0] == "size":
+                    region = regions.get(command[1])
+                    if region is not None:
+                        region.display_size = command[2]
+                elif command[0] == "fps":
+                    scheduler.set_fps_range(command[1], command[2])
+                elif command[0] == "fast":
+                    fast_scaling = command[1]
+                elif command[0] == "stop":
+                    running = False
+            if not running:
+                break
+
+            changed = False
+            for region_id, bgra in engine.grab_views():
+                region = regions[region_id]
+                ring = region.ring
+                grab_time, numpy_time = engine.last_timings
+                ring.count("captured")
+
+                if fast_scaling:
+                    step = sampling_step(region.display_size, bgra.shape[1], bgra.shape[0])
+                    if step > 1:
+                        bgra = bgra[::step, ::step]
+
+                rect = region.detector.detect(bgra)
+                h, w = bgra.shape[:2]
+                size = output_size(region.display_size, w, h)
+                if size != region.output_size:
+                    region.output_size = size
+                    rect = (0, 0, w, h)
+                if rect is None:
+                    ring.count("skipped")
+                    continue
+                changed = True
+
+                # 바뀐 영역을 출력 좌표로 옮겨 모든 슬롯의 갱신 대상에 추가
+                convert_start = time.perf_counter()
+                tw, th = size if size is not None else (w, h)
+                out_rect = scale_rect(rect, tw / w, th / h, tw, th) if size is not None else rect
+                if rect == (0, 0, w, h):
+                    region.stale_rects = [(0, 0, tw, th)] * ring.slots
+                else:
+                    region.stale_rects = [union_rect(stale, out_rect) for stale in region.stale_rects]
+                out_rect = union_rect(out_rect, region.pending_rect)
+
+                # GUI가 모든 슬롯을 쥐고 있으면 이 프레임은 버림
+                slot = ring.acquire_slot()
+                if slot is None:
+                    region.pending_rect = out_rect
+                    ring.count("dropped")
+                    continue
+
+                stale = region.stale_rects[slot]
+                if stale is not None:
+                    fill_buffer(ring.frame_view(slot, tw, th), bgra, stale, RegionGrabber.SCALE_INTERPOLATION)
+                    region.stale_rects[slot] = None
+                region.pending_rect = None
+                convert_time = time.perf_counter() - convert_start
+
+                # 이전 프레임을 GUI가 이미 가져갔을 때만 알림 (가져가지 않았으면 다음 take에서 함께 처리)
+                if ring.publish(slot, tw, th, out_rect, grab_time, numpy_time, convert_time):
+                    ready_queue.put(region_id)
+
+            work_time = time.perf_counter() - start_time
+            interval = scheduler.record(changed, work_time)
+            fps_value.value = scheduler.effective_fps()
+            delay = start_time + interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    except Exception as e:
+        ready_queue.put(("error", str(e)))
+    finally:
+        for region in regions.values():
+            region.ring.close()
+        # 종료하기 전에 이 프로세스 캡처 엔진의 버퍼 할당 통계를 GUI 프로세스로 보냄
+        ready_queue.put(("stats", engine.stats()))
+        engine.close()
+
+
+class ProcessCaptureWorker(QThread):
+    # CaptureWorker와 같은 인터페이스로, 캡처를 별도 프로세스들에서 수행하는 백엔드
+    # - 영역마다 shared_memory 링 버퍼를 만들고, 영역 수가 가장 적은 캡처 프로세스에 배정
+    # - 캡처 프로세스가 grab/변화 감지/버퍼 갱신을 하므로 GUI 프로세스의 GIL과 경쟁하지 않음
+    # - 이 스레드는 프레임 준비 알림만 받아서 frame_ready 시그널로 바꿔 줌 (프레임은 복사 없이 링에서 읽음)
+    frame_ready = pyqtSignal(int)
+    capture_error = pyqtSignal(str)
+
+    RING_SLOTS = 4
+
+    def __init__(self, min_fps=3, max_fps=60, source_factory=None, processes=None, parent=None):
+        super().__init__(parent)
+        # source_factory는 캡처 프로세스로 전달되므로 pickle 가능해야 함 (lambda 불가)
+        # 프로세스 수는 CPU 수와 영역 수 중 작은 값을 기본으로 씀 (영역이 늘면 프로세스도 늘어남)
+        self.source_factory = source_factory
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.max_processes = processes or max(1, mp.cpu_count() - 1)
+        self.fast_scaling = False
+
+        self.context = mp.get_context("spawn")
+        self.ready_queue = self.context.Queue()
+        self.processes = []  # (프로세스, 명령 큐, 유효 fps 값, 영역 번호 집합)
+        self.rings = {}
+        self.region_process = {}
+        self.region_stats = {}
+        self.reported = {}  # 영역별로 PipelineStats에 이미 반영한 링 카운터
+        self.region_lock = threading.Lock()
+        self.engine_stats = []  # 종료한 캡처 프로세스들이 보낸 캡처 엔진 통계
+
+        # 통계 (전달 지연은 캡처 프로세스가 슬롯을 넘긴 시각부터 GUI가 가져간 시각까지)
+        self.delivered_count = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start_process(self):
+        commands = self.context.Queue()
+        fps_value = self.context.Value("i", 0, lock=False)
+        process = self.context.Process(
+            target=capture_process_main,
+            args=(commands, self.ready_queue, fps_value, self.source_factory, self.min_fps, self.max_fps),
+            daemon=True,
+        )
+        process.start()
+        commands.put(("fast", self.fast_scaling))
+        entry = (process, commands, fps_value, set())
+        self.processes.append(entry)
+        return entry
+
+    def add_region(self, region_id, area, stats=None):
+        with self.region_lock:
+            ring = SharedFrameRing.create(area[2], area[3], self.RING_SLOTS)
+            self.rings[region_id] = ring
+            self.region_stats[region_id] = stats if stats is not None else PipelineStats()
+            self.reported[region_id] = dict.fromkeys(SharedFrameRing.COUNTERS, 0)
+
+            # 영역이 가장 적은 프로세스에 배정하고, 모두 차 있으면 새 프로세스 시작
+            entry = min(self.processes, key=lambda p: len(p[3]), default=None)
+            if entry is None or (entry[3] and len(self.processes) < self.max_processes):
+                entry = self.start_process()
+            entry[3].add(region_id)
+            self.region_process[region_id] = entry
+            entry[1].put(("add", region_id, area, ring.name, ring.slots))
+
+    def remove_region(self, region_id):
+        with self.region_lock:
+            entry = self.region_process.pop(region_id, None)
+            if entry is None:
+                return
+            entry[3].discard(region_id)
+            entry[1].put(("remove", region_id))
+            self.region_stats.pop(region_id, None)
+            self.reported.pop(region_id, None)
+            self.rings.pop(region_id).close(unlink=True)
+
+    def run(self):
+        # 캡처 프로세스가 보낸 알림을 GUI 스레드로 전달 (None을 받으면 종료)
+        while True:
+            message = self.ready_queue.get()
+            if message is None:
+                break
+            if isinstance(message, tuple):
+                if message[0] == "stats":
+                    self.engine_stats.append(message[1])
+                else:
+                    self.capture_error.emit(message[1])
+            else:
+                self.frame_ready.emit(message)
+
+    def set_display_size(self, region_id, size):
+        entry = self.region_process.get(region_id)
+        if entry is not None:
+            entry[1].put(("size", region_id, size))
+
+    def take_frame(self, region_id):
+        with self.region_lock:
+            ring = self.rings.get(region_id)
+            if ring is None:
+                return None
+            item = ring.take()
+            stats = self.region_stats[region_id]
+            reported = self.reported[region_id]
+            counters = ring.counters()
+
+        # 캡처 프로세스가 센 카운터와 단계별 시간을 GUI 쪽 PipelineStats에 반영
+        for name, value in counters.items():
+            if value > reported[name]:
+                stats.count(name, value - reported[name])
+                reported[name] = value
+        if item is None:
+            return None
+        frame, rect, grab_time, numpy_time, convert_time, latency = item
+        stats.record("grab", grab_time)
+        stats.record("numpy", numpy_time)
+        stats.record("convert", convert_time)
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.delivered_count += 1
+        return frame, rect
+
+    def release_frame(self, region_id, frame):
+        ring = self.rings.get(region_id)
+        if ring is not None:
+            ring.release(frame)
+        # 영역을 지우거나 다시 만들기 전에 받은 프레임이면 남겨 둔 이전 링에 돌려줌
+        for ring in list(SharedFrameRing.retained):
+            ring.release(frame)
+
+    def set_fast_scaling(self, enabled):
+        self.fast_scaling = enabled
+        for entry in self.processes:
+            entry[1].put(("fast", enabled))
+
+    def set_fps_range(self, min_fps, max_fps):
+        self.min_fps, self.max_fps = min_fps, max_fps
+        for entry in self.processes:
+            entry[1].put(("fps", min_fps, max_fps))
+
+    def effective_fps(self):
+        # 프로세스마다 스케줄러가 따로 있으므로 가장 높은 값을 표시
+        return max((entry[2].value for entry in self.processes), default=0)
+
+    def stop(self):
+        # 캡처 프로세스에 종료 명령을 보내고 기다린 뒤, 알림 스레드와 공유 메모리를 정리
+        for process, commands, _, _ in self.processes:
+            commands.put(("stop",))
+        for process, _, _, _ in self.processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.ready_queue.put(None)
+        self.wait()
+
+        with self.region_lock:
+            for ring in self.rings.values():
+                ring.close(unlink=True)
+            self.rings = {}
+            self.region_process = {}
+
+    def stats(self):
+        delivered = self.delivered_count
+        counters = dict.fromkeys(SharedFrameRing.COUNTERS, 0)
+        for reported in self.reported.values():
+            for name, value in reported.items():
+                counters[name] += value
+        stats = {
+            "processes": len(self.processes),
+            "delivered": delivered,
+            "dropped": counters["dropped"],
+            "avg_latency_ms": self.latency_total / delivered * 1000 if delivered else 0.0,
+            "max_latency_ms": self.latency_max * 1000,
+            "checked": counters["captured"],
+            "skipped": counters["skipped"],
+            "skipped_ratio": counters["skipped"] / counters["captured"] if counters["captured"] else 0.0,
+        }
+        # 캡처 엔진 통계는 stop으로 캡처 프로세스들이 끝난 뒤에만 있음 (프로세스별 합계)
+        if self.engine_stats:
+            for name in ("regions", "frames", "grabs", "buffer_allocs", "steady_state_allocs"):
+                stats[name] = sum(engine_stats[name] for engine_stats in self.engine_stats)
+            stats["allocs_per_frame"] = stats["buffer_allocs"] / stats["frames"] if stats["frames"] else 0.0
+        return stats
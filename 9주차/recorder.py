@@ -0,0 +1,85 @@
+import os
+import queue
+import threading
+import time
+
+from frame_pool import FrameQueue
+
+
+class FrameRecorder:
+    # PIP 영역에 표시되는 프레임을 별도 스레드에서 이미지 시퀀스로 저장하는 클래스
+    # - 바뀐 프레임만 한 번 인코딩해서 frame_XXXXXX.png로 저장
+    # - 새 프레임이 없는 동안에는 timeline.csv에 직전 파일을 가리키는 행만 추가 (다시 인코딩하지 않음)
+    # - 대기열과 버퍼 수가 정해져 있어, 저장이 밀리면 GUI를 막지 않고 프레임을 버리고 개수를 셈
+    def __init__(self, directory, fps=10, max_queue=8, image_ext=".png"):
+        self.directory = directory
+        self.interval = 1 / fps
+        self.image_ext = image_ext
+        os.makedirs(directory, exist_ok=True)
+
+        self.frames = FrameQueue(max_queue)
+
+        # 통계
+        self.written_count = 0
+        self.failed_count = 0  # 디스크가 가득 찼거나 경로가 잘못되어 저장하지 못한 프레임
+        self.duplicate_count = 0
+
+        self.start_time = time.perf_counter()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, frame):
+        # GUI 스레드에서 호출 (절대 기다리지 않음)
+        # frame은 캡처 버퍼 풀의 배열이라 곧 재사용되므로 녹화용 버퍼로 한 번 복사해서 넘김
+        if not self.running:
+            return False
+        return self.frames.submit(frame, time.perf_counter() - self.start_time)
+
+    def run(self):
+        # cv2는 녹화를 시작할 때 GUI 스레드를 막지 않도록 저장 스레드에서 import
+        import cv2
+
+        timeline_path = os.path.join(self.directory, "timeline.csv")
+        last_file = None
+        with open(timeline_path, "w", encoding="utf-8") as timeline:
+            timeline.write("timestamp_ms,file\n")
+            while self.running or not self.frames.empty():
+                try:
+                    timestamp, buf = self.frames.get(timeout=self.interval)
+                except queue.Empty:
+                    # 새 프레임이 없으면 직전 파일을 현재 시각에 한 번 더 기록
+                    if last_file is not None and self.running:
+                        timestamp = time.perf_counter() - self.start_time
+                        timeline.write(f"{timestamp * 1000:.1f},{last_file}\n")
+                        self.duplicate_count += 1
+                    continue
+
+                # 저장에 실패한 프레임은 timeline.csv에 쓰지 않고 개수만 셈
+                file = f"frame_{self.written_count:06d}{self.image_ext}"
+                try:
+                    written = cv2.imwrite(os.path.join(self.directory, file), buf[..., :3])
+                except cv2.error:
+                    written = False
+                self.frames.release(buf)
+                if not written:
+                    self.failed_count += 1
+                    continue
+                last_file = file
+                self.written_count += 1
+                timeline.write(f"{timestamp * 1000:.1f},{last_file}\n")
+
+    def stop(self):
+        # 남은 프레임을 모두 저장한 뒤 종료
+        self.running = False
+        self.thread.join()
+
+    def stats(self):
+        return {
+            "submitted": self.frames.submitted_count,
+            "written": self.written_count,
+            "failed": self.failed_count,
+            "duplicates": self.duplicate_count,
+            "dropped": self.frames.dropped_count,
+            "queued": self.frames.qsize(),
+        }
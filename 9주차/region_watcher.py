@@ -0,0 +1,279 @@
+import argparse
+import math
+import os
+import random
+import shlex
+import shutil
+import subprocess
+import time
+
+import numpy as np
+
+from capture_engine import CaptureEngine
+from frame_source import SyntheticSource, create_grabber
+from presets import DEFAULT_PATH, PresetStore, read_session, validate_area
+
+SAMPLE_SIZE = 64  # 비교용으로 건너뛰며 읽을 때 긴 변의 샘플 수
+HASH_SIZE = 8     # difference hash 크기 (HASH_SIZE * HASH_SIZE 비트)
+
+
+def sample_gray(bgra, size=SAMPLE_SIZE):
+    # 긴 변이 size 정도가 되도록 건너뛰며 읽은 뷰(복사 없음)에서 밝기 (B + 2G + R) / 4 계산
+    h, w = bgra.shape[:2]
+    step = max(1, max(h, w) // size)
+    sample = bgra[::step, ::step]
+    gray = sample[..., 1].astype(np.int16)
+    gray <<= 1
+    gray += sample[..., 0]
+    gray += sample[..., 2]
+    gray >>= 2
+    return gray
+
+
+def difference_hash(gray, hash_size=HASH_SIZE):
+    # 가로로 이웃한 밝기 비교 (hash_size x (hash_size + 1) 격자에서 최근접 샘플링, bool 배열)
+    h, w = gray.shape
+    rows = np.linspace(0, h - 1, hash_size).astype(np.intp)
+    cols = np.linspace(0, w - 1, hash_size + 1).astype(np.intp)
+    grid = gray[np.ix_(rows, cols)]
+    return grid[:, 1:] > grid[:, :-1]
+
+
+class Watch:
+    # 감시할 영역 하나와 알림 조건
+    # - 기준 프레임(처음 프레임 또는 마지막으로 알린 프레임)과 비교해서 바뀐 정도가 넘으면 알림
+    # - hash_distance가 없으면 밝기가 pixel_delta보다 많이 바뀐 샘플의 비율이 threshold 이상일 때
+    # - hash_distance가 있으면 difference hash가 hash_distance 비트 이상 다를 때 (작은 노이즈, 배경 변화에 둔감)
+    # - 알린 뒤 cooldown초 동안은 다시 알리지 않음 (그동안 바뀐 것은 기준과 계속 비교되므로 놓치지 않음)
+    def __init__(self, name, area, threshold=0.02, pixel_delta=24, hash_distance=None, cooldown=1.0):
+        self.name = name
+        self.area = area
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.hash_distance = hash_distance
+        self.cooldown = cooldown
+
+        self.baseline = None
+        self.baseline_hash = None
+        self.last_fire = -math.inf
+
+        # 통계
+        self.check_count = 0
+        self.fire_count = 0
+        self.last_score = 0.0
+
+    def check(self, bgra, now):
+        # 알려야 하면 바뀐 정도(0~1)를 반환, 아니면 None
+        gray = sample_gray(bgra)
+        self.check_count += 1
+        if self.baseline is None or self.baseline.shape != gray.shape:
+            self.baseline = gray
+            self.baseline_hash = difference_hash(gray)
+            return None
+
+        if self.hash_distance is not None:
+            current_hash = difference_hash(gray)
+            distance = int(np.count_nonzero(current_hash != self.baseline_hash))
+            score = distance / current_hash.size
+            changed = distance >= self.hash_distance
+        else:
+            diff = np.abs(gray - self.baseline)
+            score = np.count_nonzero(diff > self.pixel_delta) / diff.size
+            changed = score >= self.threshold
+        self.last_score = score
+
+        if not changed or now - self.last_fire < self.cooldown:
+            return None
+        self.baseline = gray
+        self.baseline_hash = difference_hash(gray)
+        self.last_fire = now
+        self.fire_count += 1
+        return score
+
+
+class CommandAction:
+    # 알림마다 외부 명령 실행 (기다리지 않음)
+    # 영역 이름, 바뀐 정도, 영역 좌표는 환경 변수 PIP_WATCH_NAME, PIP_WATCH_SCORE, PIP_WATCH_AREA로 전달
+    # 같은 영역의 이전 명령이 아직 실행 중이면 이번 알림은 건너뜀
+    def __init__(self, command):
+        self.args = shlex.split(command)
+        self.running = {}
+        self.skipped_count = 0
+
+    def __call__(self, watch, score):
+        process = self.running.get(watch.name)
+        if process is not None and process.poll() is None:
+            self.skipped_count += 1
+            return
+        env = dict(os.environ)
+        env["PIP_WATCH_NAME"] = str(watch.name)
+        env["PIP_WATCH_SCORE"] = f"{score:.4f}"
+        env["PIP_WATCH_AREA"] = ",".join(map(str, watch.area))
+        self.running[watch.name] = subprocess.Popen(self.args, env=env)
+
+
+def notify_action(watch, score):
+    # 데스크톱 알림 (notify-send가 있을 때만 사용)
+    subprocess.Popen(["notify-send", "화면 영역 변화", f"{watch.name}: {score:.0%} 바뀜"])
+
+
+def print_action(watch, score):
+    print(f"{time.strftime('%H:%M:%S')} {watch.name} {tuple(watch.area)} 변화 {score:.1%}", flush=True)
+
+
+class RegionWatcher:
+    # PIP 창 없이 여러 영역의 변화만 감시하는 클래스 (CaptureEngine의 캡처 경로를 그대로 사용)
+    # - 모든 영역을 모니터마다 한 번의 grab으로 묶고 (merge_slack = inf), 영역은 복사 없는 뷰로 잘라 씀
+    # - 영역마다 긴 변 SAMPLE_SIZE 정도로 건너뛰며 읽은 밝기만 비교하므로 영역 크기와 관계없이 비용이 작음
+    # - 버퍼 갱신, 축소, QImage 변환, 그리기가 없어서 수십 개 영역도 PIP 창 하나보다 적은 CPU로 감시 가능
+    def __init__(self, sct=None, interval=0.2):
+        self.engine = CaptureEngine(sct, merge_slack=math.inf)
+        self.interval = interval
+        self.watches = {}
+        self.actions = []
+
+        # 통계
+        self.tick_count = 0
+        self.tick_time = 0.0
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+
+    def add(self, watch):
+        self.watches[watch.name] = watch
+        self.engine.add_region(watch.name, watch.area)
+
+    def remove(self, name):
+        if self.watches.pop(name, None) is not None:
+            self.engine.remove(name)
+
+    def on_change(self, action):
+        # action(watch, score): 알림마다 호출 (감시 스레드에서 바로 호출되므로 오래 걸리는 일은 하지 않음)
+        self.actions.append(action)
+
+    def tick(self):
+        # 모든 영역을 한 번씩 grab해서 확인하고, 알린 영역 이름 목록을 반환
+        start = time.perf_counter()
+        now = time.monotonic()
+        fired = []
+        for name, view in self.engine.grab_views():
+            watch = self.watches[name]
+            score = watch.check(view, now)
+            if score is None:
+                continue
+            fired.append(name)
+            for action in self.actions:
+                action(watch, score)
+        self.tick_count += 1
+        self.tick_time += time.perf_counter() - start
+        return fired
+
+    def run(self, duration=None):
+        # interval마다 tick (밀리면 건너뛰지 않고 바로 다음 tick), duration초가 지나면 종료
+        end = time.perf_counter() + duration if duration is not None else math.inf
+        next_tick = time.perf_counter()
+        while next_tick < end:
+            self.tick()
+            next_tick = max(next_tick + self.interval, time.perf_counter())
+            time.sleep(max(0.0, min(next_tick, end) - time.perf_counter()))
+
+    def close(self):
+        self.engine.close()
+
+    def stats(self):
+        wall = time.perf_counter() - self.wall_start
+        return {
+            "regions": len(self.watches),
+            "ticks": self.tick_count,
+            "grabs": self.engine.grab_count,
+            "avg_tick_ms": self.tick_time / self.tick_count * 1000 if self.tick_count else 0.0,
+            "cpu_percent": (time.process_time() - self.cpu_start) / wall * 100 if wall > 0 else 0.0,
+            "alerts": {name: watch.fire_count for name, watch in self.watches.items()},
+        }
+
+
+def parse_region(text):
+    # "x,y,w,h" 또는 "x,y,w,h:이름"
+    area, _, name = text.partition(":")
+    values = tuple(int(v) for v in area.split(","))
+    if len(values) != 4:
+        raise argparse.ArgumentTypeError(f"영역은 x,y,w,h 형식이어야 합니다: {text}")
+    return values, name or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PIP 창 없이 화면 영역의 변화만 감시해서 알림")
+    parser.add_argument("--region", type=parse_region, action="append", default=[],
+                        help="감시할 영역 x,y,w,h[:이름] (여러 번 지정 가능)")
+    parser.add_argument("--preset", help="이 이름의 프리셋에 저장된 영역들을 감시")
+    parser.add_argument("--last", action="store_true", help="마지막 세션의 영역들을 감시")
+    parser.add_argument("--interval", type=float, default=0.2, help="확인 간격 (초)")
+    parser.add_argument("--threshold", type=float, default=0.02, help="알릴 바뀐 샘플 비율 (0~1)")
+    parser.add_argument("--pixel-delta", type=int, default=24, help="바뀐 샘플로 볼 밝기 차이 (0~255)")
+    parser.add_argument("--hash-distance", type=int, default=None,
+                        help=f"비율 대신 difference hash({HASH_SIZE * HASH_SIZE}비트)가 이만큼 다를 때 알림")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="같은 영역을 다시 알리기까지 최소 간격 (초)")
+    parser.add_argument("--command", help="알릴 때 실행할 명령 (PIP_WATCH_NAME, PIP_WATCH_SCORE, PIP_WATCH_AREA 전달)")
+    parser.add_argument("--notify", action="store_true", help="데스크톱 알림 표시 (notify-send)")
+    parser.add_argument("--grabber", choices=["auto", "mss", "xshm"], default="auto", help="캡처 백엔드")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="화면 대신 SyntheticSource에서 무작위 영역 N개를 감시 (CPU 사용량 측정용)")
+    parser.add_argument("--duration", type=float, default=None, help="이 시간(초)만 감시하고 통계 출력")
+    args = parser.parse_args()
+    if not (args.region or args.preset or args.last or args.synthetic):
+        parser.error("--region, --preset, --last, --synthetic 중 하나로 감시할 영역을 지정하세요")
+
+    if args.synthetic:
+        sct = SyntheticSource(1920, 1080, change_rate=0.5)
+        rng = random.Random(0)
+        args.region += [
+            ((rng.randrange(0, 1920 - 300), rng.randrange(0, 1080 - 60), 300, 60), None)
+            for _ in range(args.synthetic)
+        ]
+    else:
+        sct = create_grabber(args.grabber)
+
+    regions = list(args.region)
+    if args.preset or args.last:
+        store = PresetStore(DEFAULT_PATH)
+        session = store.last_session if args.last else store.get(args.preset)
+        if session is None:
+            parser.error("저장된 프리셋/세션이 없습니다")
+        entries, invalid = read_session(session)
+        if invalid:
+            print(f"형식이 잘못된 영역 항목 {invalid}개를 건너뜀")
+        for region in entries:
+            area = validate_area(region, sct.monitors)
+            if area is None:
+                print(f"현재 모니터 배치에 맞지 않는 영역을 건너뜀: {region['area']}")
+            else:
+                regions.append((area, None))
+    if not regions:
+        parser.error("현재 모니터 배치에서 감시할 수 있는 영역이 없습니다")
+
+    watcher = RegionWatcher(sct, args.interval)
+    for index, (area, name) in enumerate(regions, 1):
+        watcher.add(Watch(
+            name or f"영역 {index}", area, args.threshold, args.pixel_delta, args.hash_distance, args.cooldown
+        ))
+    if not args.synthetic:
+        watcher.on_change(print_action)
+    if args.command:
+        watcher.on_change(CommandAction(args.command))
+    if args.notify:
+        if shutil.which("notify-send"):
+            watcher.on_change(notify_action)
+        else:
+            print("notify-send가 없어 데스크톱 알림은 사용하지 않습니다")
+
+    print(f"캡처 백엔드: {sct.name} | 영역 {len(regions)}개 | {args.interval}초마다 확인")
+    try:
+        watcher.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"감시 통계: {watcher.stats()}")
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,153 +1,777 @@
-import sys
-import cv2
-import numpy as np
-from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QCheckBox
-from PyQt5.QtCore import QTimer, Qt, QRect
-from mss import mss
-
-from selection_overlay import SelectionOverlay
-from pip_window import PipWindow
-
-class ScreenCaptureApp(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        
-        self.setWindowTitle("화면 영역 PIP 도구")
-        self.setGeometry(100, 100, 400, 200)
-        
-        # 메인 위젯 설정
-        self.central_widget = QWidget()
-        self.setCentralWidget(self.central_widget)
-        
-        # 레이아웃 설정
-        self.layout = QVBoxLayout(self.central_widget)
-        
-        # 상태 레이블
-        self.status_label = QLabel("시작하려면 '영역 선택' 버튼을 클릭하세요.")
-        self.layout.addWidget(self.status_label)
-        
-        # 버튼 레이아웃
-        button_layout = QHBoxLayout()
-        
-        # 영역 선택 버튼
-        self.select_area_btn = QPushButton("영역 선택")
-        self.select_area_btn.clicked.connect(self.select_area)
-        button_layout.addWidget(self.select_area_btn)
-        
-        # 자동 업데이트 체크박스
-        self.auto_update_check = QCheckBox("자동 업데이트")
-        self.auto_update_check.setChecked(True)
-        button_layout.addWidget(self.auto_update_check)
-        
-        # 레이아웃에 버튼 레이아웃 추가
-        self.layout.addLayout(button_layout)
-        
-        # 캡처 영역 정보 초기화
-        self.capture_area = None
-        self.capture_img = None
-        self.pip_window = None
-        
-        # 스크린 캡처 라이브러리 초기화 및 모니터 정보 가져오기
-        self.sct = mss()
-        self.monitor_info = self.sct.monitors[0]  # 전체 화면 사용
-        
-        # 자동 업데이트 타이머
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_capture)
-    
-    def select_area(self):
-        self.hide()  # 메인 윈도우 숨기기
-        
-        QTimer.singleShot(500, self.start_area_selection)
-    
-    def start_area_selection(self):
-        # 투명한 오버레이로 영역 선택
-        self.overlay = SelectionOverlay(self.monitor_info)
-        self.overlay.set_callback(self.on_area_selected)
-        self.overlay.show()
-    
-    def on_area_selected(self, rect):
-        # 선택한 영역의 좌표 가져오기
-        x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
-        
-        # 영역이 충분히 큰지 확인
-        if w > 250 and h > 100:
-            # 캡처 영역 저장 (시스템 좌표계 사용)
-            self.capture_area = (x, y, w, h)
-            
-            # 디버그 정보 출력
-            print(f"선택한 영역: x={x}, y={y}, w={w}, h={h}")
-            
-            try:
-                # 선택한 영역 캡처
-                with mss() as sct:
-                    # 캡처 영역 설정 (절대 좌표 사용)
-                    monitor = {"left": x, "top": y, "width": w, "height": h}
-                    # 영역 캡처
-                    sct_img = sct.grab(monitor)
-                    
-                    # 이미지를 numpy 배열로 변환
-                    screen_np = np.array(sct_img)
-                    # BGRA에서 RGB로 변환
-                    self.capture_img = cv2.cvtColor(screen_np, cv2.COLOR_BGRA2RGB)
-                
-                # PIP 창 생성
-                if self.pip_window:
-                    self.pip_window.close()
-                
-                self.pip_window = PipWindow(self.capture_img)
-                self.pip_window.show()
-                
-                # 자동 업데이트 시작
-                if self.auto_update_check.isChecked():
-                    self.update_timer.start(16)  # 16ms 간격으로 업데이트
-                
-                self.status_label.setText(f"선택한 영역: ({x}, {y}, {w}, {h})")
-            except Exception as e:
-                self.status_label.setText(f"오류 발생: {str(e)}")
-                print(f"캡처 오류: {str(e)}")
-        else:
-            self.status_label.setText("선택한 영역이 너무 작습니다.")
-        
-        self.show()  # 메인 윈도우 다시 표시
-    
-    def update_capture(self):
-        if self.capture_area and self.pip_window and self.auto_update_check.isChecked():
-            x, y, w, h = self.capture_area
-            
-            try:
-                # 화면 캡처 (MSS 사용)
-                with mss() as sct:
-                    # 캡처 영역 설정 (절대 좌표 사용)
-                    monitor = {"left": x, "top": y, "width": w, "height": h}
-                    # 영역 캡처
-                    sct_img = sct.grab(monitor)
-                    
-                    # 이미지를 numpy 배열로 변환
-                    screen_np = np.array(sct_img)
-                    # BGRA에서 RGB로 변환
-                    screen_rgb = cv2.cvtColor(screen_np, cv2.COLOR_BGRA2RGB)
-                
-                # PIP 창 업데이트
-                self.pip_window.update_image(screen_rgb)
-            except Exception as e:
-                print(f"업데이트 오류: {str(e)}")
-                # 오류 발생 시 타이머 중지
-                self.update_timer.stop()
-                self.status_label.setText(f"업데이트 오류: {str(e)}")
-    
-    def closeEvent(self, event):
-        if self.pip_window:
-            self.pip_window.close()
-        
-        if self.update_timer.isActive():
-            self.update_timer.stop()
-        
-        super().closeEvent(event)
-
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = ScreenCaptureApp()
-    window.show()
-    sys.exit(app.exec_())
+import argparse
+import functools
+import importlib.util
+import os
+import sys
+import time
+
+import startup_profile
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QCheckBox, QSpinBox, QListWidget, QListWidgetItem, QLineEdit, QComboBox, QInputDialog
+from PyQt5.QtCore import QTimer, Qt, QRect
+
+from pip_window import PipWindow
+from presets import DEFAULT_PATH, PresetStore, covered_by_monitors, is_int, monitor_identity, read_session, validate_area
+
+# numpy, cv2, mss와 캡처/녹화/OCR 모듈은 창을 먼저 띄우기 위해 처음 필요할 때 import함
+startup_profile.mark("PyQt5 및 창 모듈 import")
+
+class ScreenCaptureApp(QMainWindow):
+    # source_factory: 프레임 소스를 만드는 함수 (None이면 grabber 백엔드, 벤치마크에서는 SyntheticSource)
+    # backend: 캡처 방식 ("thread" = 캡처 스레드, "process" = 캡처 프로세스 + 공유 메모리)
+    # presets_path: 프리셋과 마지막 세션을 저장할 파일 (None이면 저장하지 않음)
+    # grabber: 캡처 백엔드 ("auto", "mss", "xshm" - 만들 수 없으면 mss로 대체)
+    # history_seconds, history_mb: 영역마다 PIP 창에서 되돌려 볼 최근 프레임 기록의 길이와 압축한 프레임의 메모리 상한 (0이면 기록 안 함)
+    # stream_port, stream_host: 영역들을 MJPEG(HTTP)로 보내는 스트리밍 서버의 포트와 주소 (포트가 None이면 서버 없음)
+    # trace_path: 실제 grab 결과를 기록할 캡처 트레이스 파일 (None이면 기록 안 함, thread 백엔드만)
+    def __init__(self, source_factory=None, backend="thread", presets_path=DEFAULT_PATH, grabber="auto",
+                 history_seconds=30, history_mb=64, stream_port=None, stream_host="127.0.0.1", trace_path=None):
+        super().__init__()
+        self.source_factory = source_factory
+        self.backend = backend
+        self.grabber = grabber
+        self.history_seconds = history_seconds
+        self.history_mb = history_mb
+        self.trace_path = trace_path
+        self.trace_writer = None
+        self.presets = PresetStore(presets_path)
+        
+        self.setWindowTitle("화면 영역 PIP 도구")
+        self.setGeometry(100, 100, 400, 200)
+        
+        # 메인 위젯 설정
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+        
+        # 레이아웃 설정
+        self.layout = QVBoxLayout(self.central_widget)
+        
+        # 상태 레이블
+        self.status_label = QLabel("시작하려면 '영역 선택' 버튼을 클릭하세요.")
+        self.layout.addWidget(self.status_label)
+        
+        # 캡처 상태 레이블 (유효 fps 등 0.5초마다 갱신, 위의 상태 레이블의 메시지는 덮어쓰지 않음)
+        self.capture_status_label = QLabel()
+        self.layout.addWidget(self.capture_status_label)
+        
+        # 버튼 레이아웃
+        button_layout = QHBoxLayout()
+        
+        # 영역 선택 버튼
+        self.select_area_btn = QPushButton("영역 선택")
+        self.select_area_btn.clicked.connect(self.select_area)
+        button_layout.addWidget(self.select_area_btn)
+        
+        # 자동 업데이트 체크박스
+        self.auto_update_check = QCheckBox("자동 업데이트")
+        self.auto_update_check.setChecked(True)
+        self.auto_update_check.toggled.connect(self.on_auto_update_toggled)
+        button_layout.addWidget(self.auto_update_check)
+        
+        # 녹화 버튼 (PIP 영역에 표시되는 프레임을 파일로 저장)
+        self.record_btn = QPushButton("녹화 시작")
+        self.record_btn.setCheckable(True)
+        self.record_btn.toggled.connect(self.on_record_toggled)
+        button_layout.addWidget(self.record_btn)
+        
+        # 레이아웃에 버튼 레이아웃 추가
+        self.layout.addLayout(button_layout)
+        
+        # fps 범위 설정 (화면 변화가 없으면 최소 fps까지 낮추고, 바뀌면 최대 fps로 올림)
+        fps_layout = QHBoxLayout()
+        
+        self.min_fps_spin = QSpinBox()
+        self.min_fps_spin.setRange(1, 60)
+        self.min_fps_spin.setValue(3)
+        self.min_fps_spin.valueChanged.connect(self.on_fps_range_changed)
+        
+        self.max_fps_spin = QSpinBox()
+        self.max_fps_spin.setRange(1, 144)
+        self.max_fps_spin.setValue(60)
+        self.max_fps_spin.valueChanged.connect(self.on_fps_range_changed)
+        
+        fps_layout.addWidget(QLabel("최소 fps:"))
+        fps_layout.addWidget(self.min_fps_spin)
+        fps_layout.addWidget(QLabel("최대 fps:"))
+        fps_layout.addWidget(self.max_fps_spin)
+        
+        # 속도 우선 축소 (PIP 창이 원본의 1/2 이하면 grab 직후 픽셀을 건너뛰며 읽어서 처리량을 줄임)
+        self.fast_scaling_check = QCheckBox("속도 우선 축소")
+        self.fast_scaling_check.toggled.connect(self.on_fast_scaling_toggled)
+        fps_layout.addWidget(self.fast_scaling_check)
+        self.layout.addLayout(fps_layout)
+        
+        # 활성 영역 목록 (선택 후 닫기 버튼으로 영역별로 닫을 수 있음)
+        self.region_list = QListWidget()
+        self.layout.addWidget(self.region_list)
+        
+        self.close_region_btn = QPushButton("선택한 영역 닫기")
+        self.close_region_btn.clicked.connect(self.close_selected_region)
+        self.layout.addWidget(self.close_region_btn)
+        
+        # 영역 프리셋 (캡처 영역, 모니터, PIP 창 위치/크기, 투명도, fps 범위를 이름으로 저장)
+        preset_layout = QHBoxLayout()
+        
+        self.preset_combo = QComboBox()
+        self.preset_combo.addItems(self.presets.names())
+        preset_layout.addWidget(self.preset_combo, 1)
+        
+        self.load_preset_btn = QPushButton("불러오기")
+        self.load_preset_btn.clicked.connect(self.load_preset)
+        preset_layout.addWidget(self.load_preset_btn)
+        
+        self.save_preset_btn = QPushButton("프리셋 저장")
+        self.save_preset_btn.clicked.connect(self.save_preset)
+        preset_layout.addWidget(self.save_preset_btn)
+        
+        self.delete_preset_btn = QPushButton("삭제")
+        self.delete_preset_btn.clicked.connect(self.delete_preset)
+        preset_layout.addWidget(self.delete_preset_btn)
+        
+        self.layout.addLayout(preset_layout)
+        
+        # 가사 텍스트 추출 (OCR, pytesseract가 있을 때만 사용 가능)
+        self.ocr_check = QCheckBox("가사 텍스트 추출 (OCR)")
+        ocr_available = importlib.util.find_spec("pytesseract") is not None
+        self.ocr_check.setEnabled(ocr_available)
+        if not ocr_available:
+            self.ocr_check.setToolTip("pytesseract와 tesseract를 설치하면 사용할 수 있습니다.")
+        self.ocr_check.toggled.connect(self.on_ocr_toggled)
+        self.layout.addWidget(self.ocr_check)
+        
+        # 추출한 가사 검색 (결과를 더블 클릭하면 클립보드로 복사)
+        self.text_search_edit = QLineEdit()
+        self.text_search_edit.setPlaceholderText("추출한 가사 검색")
+        self.text_search_edit.textChanged.connect(self.on_text_search)
+        self.layout.addWidget(self.text_search_edit)
+        
+        self.text_results = QListWidget()
+        self.text_results.itemDoubleClicked.connect(
+            lambda item: QApplication.clipboard().setText(item.data(Qt.UserRole))
+        )
+        self.layout.addWidget(self.text_results)
+        
+        # 캡처 영역 정보 초기화 (영역 번호 -> (캡처 영역, PIP 창))
+        self.regions = {}
+        self.full_areas = {}  # 자른 영역의 원래 선택 영역 (영역 번호 -> 캡처 영역)
+        self.next_region_id = 1
+        
+        # 녹화 중인 영역 (영역 번호 -> FrameRecorder)
+        self.recorders = {}
+        self.recording_dir = None
+        
+        # 영역별 최근 프레임 기록 (영역 번호 -> FrameHistory)
+        self.histories = {}
+        
+        # 스크린 캡처 라이브러리와 캡처 엔진 (처음 영역을 선택할 때 load_engine에서 생성)
+        self.sct = None
+        self.monitor_info = None
+        self.engine = None
+        
+        # 자동 업데이트용 캡처 스레드 (GUI 스레드와 분리)
+        self.capture_worker = None
+        
+        # OCR 스레드 (텍스트 추출을 켰을 때만 실행)
+        self.text_extractor = None
+        
+        # 스트리밍 서버 (다른 기기의 브라우저에서 영역을 볼 수 있게 함, --stream-port를 줬을 때만 실행)
+        self.stream_server = None
+        if stream_port is not None:
+            FrameStreamServer = startup_profile.load("stream_server").FrameStreamServer
+            self.stream_server = FrameStreamServer(stream_host, stream_port)
+            print(f"스트리밍 서버: {self.stream_server.url()}")
+        
+        # 시작 계측용 (첫 프레임을 표시했는지)
+        self.first_frame_pending = True
+        
+        # 유효 fps 표시 갱신 타이머
+        self.status_timer = QTimer()
+        self.status_timer.timeout.connect(self.update_status)
+        self.status_timer.start(500)
+    
+    def load_engine(self):
+        # numpy/cv2/mss와 캡처 엔진을 처음 한 번만 import하고 생성 (시작 시간 단축)
+        if self.engine is None:
+            # 무거운 모듈을 하나씩 import해서 --profile-startup에서 모듈별 시간을 볼 수 있게 함
+            modules = ["numpy", "frame_source", "capture_engine"]
+            if os.environ.get("PIP_NO_CV2") != "1":
+                modules.insert(1, "cv2")
+            for name in modules:
+                startup_profile.load(name)
+            create_grabber = startup_profile.load("frame_source").create_grabber
+            source_factory = self.source_factory or functools.partial(create_grabber, self.grabber)
+            
+            # 스크린 캡처 백엔드 초기화 및 모니터 정보 가져오기
+            self.sct = source_factory()
+            self.monitor_info = self.sct.monitors[0]  # 전체 화면 사용
+            
+            # 캡처 스레드/프로세스도 여기서 실제로 고른 백엔드를 쓰도록 고정 (자동 선택을 반복하지 않음)
+            if self.source_factory is None:
+                self.source_factory = functools.partial(create_grabber, self.sct.name)
+            print(f"캡처 백엔드: {getattr(self.sct, 'name', type(self.sct).__name__)}")
+            
+            # OCR 스레드가 원본 해상도로 다시 grab할 때 쓰는 백엔드 (트레이스에는 기록하지 않음)
+            self.ocr_source_factory = self.source_factory
+            
+            # 트레이스 기록: 이 창과 캡처 스레드의 grab 결과를 모두 같은 파일에 기록
+            if self.trace_path:
+                capture_trace = startup_profile.load("capture_trace")
+                self.trace_writer = capture_trace.TraceWriter(self.trace_path, self.sct.monitors, self.sct.name)
+                self.sct = capture_trace.TracingGrabber(self.sct, self.trace_writer)
+                self.source_factory = functools.partial(capture_trace.tracing_grabber, self.source_factory, self.trace_writer)
+                print(f"캡처 트레이스 기록: {self.trace_path}")
+            
+            # 캡처 엔진 (캡처 백엔드와 영역별 버퍼를 계속 유지)
+            self.engine = startup_profile.load("capture_engine").CaptureEngine(self.sct)
+            startup_profile.mark("캡처 엔진 준비")
+        return self.engine
+    
+    def load_screen_map(self):
+        # Qt 화면(논리 좌표, 배율)과 mss 모니터(물리 좌표)를 짝지음 (모니터 배치가 바뀔 수 있어 쓸 때마다 만듦)
+        ScreenMap = startup_profile.load("screen_map").ScreenMap
+        return ScreenMap.from_qt(QApplication.screens(), self.load_engine().sct.monitors)
+    
+    def select_area(self):
+        self.load_engine()
+        self.hide()  # 메인 윈도우 숨기기
+        
+        QTimer.singleShot(500, self.start_area_selection)
+    
+    def start_area_selection(self):
+        # 화면을 한 번 캡처한 정지 화면 위에서 영역 선택 (움직일 때마다 실제 화면을 다시 합성하지 않음)
+        SelectionOverlay = startup_profile.load("selection_overlay").SelectionOverlay
+        # 정지 화면은 모니터별로 grab해서 이어 붙이고, 오버레이가 화면별 배율에 맞춰 그림
+        mon = self.monitor_info
+        screenshot = self.engine.snapshot((mon["left"], mon["top"], mon["width"], mon["height"]))
+        self.overlay = SelectionOverlay(self.monitor_info, screenshot, self.load_screen_map())
+        self.overlay.set_callback(self.on_area_selected)
+        self.overlay.show()
+    
+    def on_area_selected(self, rect):
+        # 선택한 영역의 좌표 가져오기
+        x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
+        
+        # 영역이 충분히 큰지 확인
+        if w > 250 and h > 100:
+            # 캡처 영역 (시스템 좌표계 사용)
+            area = (x, y, w, h)
+            
+            # 디버그 정보 출력
+            print(f"선택한 영역: x={x}, y={y}, w={w}, h={h}")
+            
+            try:
+                # 선택한 영역 캡처 (절대 좌표 사용)
+                capture_img = self.load_engine().snapshot(area)
+                self.add_region(area, capture_img)
+                self.status_label.setText(f"선택한 영역: ({x}, {y}, {w}, {h})")
+            except Exception as e:
+                self.status_label.setText(f"오류 발생: {str(e)}")
+                print(f"캡처 오류: {str(e)}")
+        else:
+            self.status_label.setText("선택한 영역이 너무 작습니다.")
+        
+        self.show()  # 메인 윈도우 다시 표시
+    
+    def add_region(self, area, capture_img):
+        region_id = self.next_region_id
+        self.next_region_id += 1
+        
+        # PIP 창 생성 (창을 닫으면 해당 영역만 정리)
+        pip_window = PipWindow(capture_img)
+        pip_window.closed.connect(lambda: self.remove_region(region_id))
+        pip_window.display_size_changed.connect(
+            lambda w, h: self.on_display_size_changed(region_id, w, h)
+        )
+        pip_window.crop_selected.connect(
+            lambda fx, fy, fw, fh: self.on_crop_selected(region_id, fx, fy, fw, fh)
+        )
+        pip_window.crop_reset.connect(lambda: self.on_crop_reset(region_id))
+        pip_window.set_text_mode(self.text_extractor is not None)
+        pip_window.show()
+        self.regions[region_id] = (area, pip_window)
+        if self.trace_writer:
+            self.trace_writer.note_region(area)
+        
+        # 영역 목록에 추가
+        item = QListWidgetItem(self.region_label(region_id, area))
+        item.setData(Qt.UserRole, region_id)
+        self.region_list.addItem(item)
+        
+        # 녹화 중이면 새 영역도 녹화
+        if self.recording_dir:
+            self.start_region_recorder(region_id)
+        
+        # PIP 창에서 정지하고 되돌려 볼 수 있도록 바뀐 프레임을 기록
+        if self.history_seconds > 0 and self.history_mb > 0:
+            FrameHistory = startup_profile.load("frame_history").FrameHistory
+            history = FrameHistory(self.history_seconds, self.history_mb * 1024 * 1024)
+            history.submit(capture_img)
+            self.histories[region_id] = history
+            pip_window.set_history(history)
+        
+        # 스트리밍 중이면 접속한 클라이언트가 바로 볼 수 있게 첫 프레임을 넣어 둠
+        if self.stream_server:
+            self.stream_server.submit(region_id, capture_img)
+        
+        # 자동 업데이트 시작
+        if self.auto_update_check.isChecked():
+            self.start_capture_worker()
+            self.capture_worker.add_region(region_id, area, pip_window.stats)
+            self.capture_worker.set_display_size(region_id, pip_window.display_size())
+        return region_id
+    
+    def region_label(self, region_id, area):
+        x, y, w, h = area
+        label = f"영역 {region_id}: ({x}, {y}, {w}, {h})"
+        return label + " 자름" if region_id in self.full_areas else label
+    
+    def set_region_area(self, region_id, area):
+        # 선택 오버레이를 다시 띄우지 않고 영역의 캡처 범위만 바꿈 (자르기/해제)
+        pip_window = self.regions[region_id][1]
+        self.regions[region_id] = (area, pip_window)
+        if self.trace_writer:
+            self.trace_writer.note_region(area)
+        if self.capture_worker:
+            self.capture_worker.remove_region(region_id)
+            self.capture_worker.add_region(region_id, area, pip_window.stats)
+            self.capture_worker.set_display_size(region_id, pip_window.display_size())
+        
+        for row in range(self.region_list.count()):
+            item = self.region_list.item(row)
+            if item.data(Qt.UserRole) == region_id:
+                item.setText(self.region_label(region_id, area))
+    
+    def on_crop_selected(self, region_id, fx, fy, fw, fh):
+        # PIP 창에서 고른 비율 영역을 현재 캡처 영역 안의 좌표로 바꿔서 그 부분만 캡처
+        # (작아진 만큼 grab, 변화 감지, 축소 비용이 모두 줄어듦)
+        (x, y, w, h), pip_window = self.regions[region_id]
+        crop = (x + round(fx * w), y + round(fy * h), max(16, round(fw * w)), max(16, round(fh * h)))
+        self.full_areas.setdefault(region_id, (x, y, w, h))
+        
+        # 자른 부분이 지금과 같은 배율로 보이도록 PIP 창 크기를 줄임
+        iw, ih = pip_window.display_size()
+        pip_window.set_source_size(crop[2], crop[3], (round(fw * iw), round(fh * ih)))
+        pip_window.set_cropped(True)
+        self.set_region_area(region_id, crop)
+    
+    def on_crop_reset(self, region_id):
+        full = self.full_areas.pop(region_id, None)
+        entry = self.regions.get(region_id)
+        if full is None or entry is None:
+            return
+        (_, _, w, _), pip_window = entry
+        scale = pip_window.display_size()[0] / w
+        pip_window.set_source_size(full[2], full[3], (round(full[2] * scale), round(full[3] * scale)))
+        pip_window.set_cropped(False)
+        self.set_region_area(region_id, full)
+    
+    def remove_region(self, region_id):
+        entry = self.regions.pop(region_id, None)
+        if entry is None:
+            return
+        self.full_areas.pop(region_id, None)
+        
+        # 남은 영역이 없으면 캡처 스레드 중지, 있으면 이 영역만 제외
+        if not self.regions:
+            self.stop_capture_worker()
+        elif self.capture_worker:
+            self.capture_worker.remove_region(region_id)
+        
+        recorder = self.recorders.pop(region_id, None)
+        if recorder:
+            recorder.stop()
+        
+        history = self.histories.pop(region_id, None)
+        if history:
+            entry[1].set_history(None)
+            history.stop()
+        
+        if self.stream_server:
+            self.stream_server.remove_region(region_id)
+        
+        if self.text_extractor:
+            self.text_extractor.remove_region(region_id)
+        
+        # 영역 목록에서 제거
+        for row in range(self.region_list.count()):
+            if self.region_list.item(row).data(Qt.UserRole) == region_id:
+                self.region_list.takeItem(row)
+                break
+        
+        entry[1].close()
+    
+    def close_selected_region(self):
+        item = self.region_list.currentItem()
+        if item:
+            self.remove_region(item.data(Qt.UserRole))
+    
+    def current_session(self):
+        # 지금 열려 있는 영역과 설정을 프리셋 형식으로 반환
+        regions = []
+        for area, pip_window in self.regions.values():
+            geometry = pip_window.geometry()
+            regions.append({
+                "area": list(area),
+                "monitor": monitor_identity(area, self.sct.monitors),
+                "geometry": [geometry.x(), geometry.y(), geometry.width(), geometry.height()],
+                "opacity": pip_window.opacity,
+            })
+        return {"regions": regions, "min_fps": self.min_fps_spin.value(), "max_fps": self.max_fps_spin.value()}
+    
+    def restore_session(self, session):
+        # 선택 오버레이 없이 저장한 영역들을 바로 캡처 시작 (현재 영역은 모두 닫음)
+        # 지금 모니터 배치에서 grab할 수 없는 영역과 형식이 잘못된 항목(손으로 고친 파일 등)은 건너뜀
+        for region_id in list(self.regions):
+            self.remove_region(region_id)
+        
+        if isinstance(session, dict):
+            if is_int(session.get("min_fps")):
+                self.min_fps_spin.setValue(session["min_fps"])
+            if is_int(session.get("max_fps")):
+                self.max_fps_spin.setValue(session["max_fps"])
+        
+        monitors = self.load_engine().sct.monitors
+        screen_map = self.load_screen_map()
+        regions, invalid = read_session(session)
+        restored = skipped = 0
+        for region in regions:
+            area = validate_area(region, monitors)
+            if area is None:
+                skipped += 1
+                continue
+            region_id = self.add_region(area, self.engine.snapshot(area))
+            pip_window = self.regions[region_id][1]
+            
+            # PIP 창은 모니터들 안에 온전히 들어갈 때만 저장한 위치로 옮김 (여러 모니터에 걸쳐도 됨, 크기는 그대로 적용)
+            # 창 위치는 Qt 논리 좌표라 물리 좌표로 바꿔서 모니터와 비교
+            x, y, w, h = region["geometry"] or (0, 0, 0, 0)
+            if w > 0 and h > 0:
+                if covered_by_monitors(screen_map.to_physical((x, y, w, h)), monitors):
+                    pip_window.setGeometry(x, y, w, h)
+                else:
+                    pip_window.resize(w, h)
+            pip_window.opacity_slider.setValue(int(region["opacity"] * 100))
+            restored += 1
+        
+        text = f"영역 {restored}개 복원"
+        if skipped:
+            text += f" (모니터 배치가 달라 {skipped}개 건너뜀)"
+        if invalid:
+            text += f" (형식이 잘못된 항목 {invalid}개 건너뜀)"
+        self.status_label.setText(text)
+        return restored
+    
+    def restore_last_session(self):
+        if self.presets.last_session:
+            self.restore_session(self.presets.last_session)
+        else:
+            self.status_label.setText("저장된 세션이 없습니다.")
+    
+    def save_preset(self):
+        if not self.regions:
+            self.status_label.setText("저장할 영역이 없습니다.")
+            return
+        name, ok = QInputDialog.getText(self, "프리셋 저장", "프리셋 이름:", text=self.preset_combo.currentText())
+        name = name.strip()
+        if ok and name:
+            self.presets.put(name, self.current_session())
+            self.preset_combo.clear()
+            self.preset_combo.addItems(self.presets.names())
+            self.preset_combo.setCurrentText(name)
+            self.status_label.setText(f"프리셋 저장: {name}")
+    
+    def load_preset(self):
+        session = self.presets.get(self.preset_combo.currentText())
+        if session:
+            self.restore_session(session)
+    
+    def delete_preset(self):
+        name = self.preset_combo.currentText()
+        if name:
+            self.presets.remove(name)
+            self.preset_combo.removeItem(self.preset_combo.currentIndex())
+    
+    def start_capture_worker(self):
+        if self.capture_worker:
+            return
+        
+        # 캡처 스레드 시작 (모든 영역을 한 번에 grab, 최신 프레임만 GUI로 전달)
+        # process 백엔드는 캡처 프로세스에서 grab/변환하고 공유 메모리로 프레임을 넘김
+        if self.backend == "process":
+            worker_class = startup_profile.load("process_worker").ProcessCaptureWorker
+        else:
+            worker_class = startup_profile.load("capture_worker").CaptureWorker
+        self.capture_worker = worker_class(
+            self.min_fps_spin.value(), self.max_fps_spin.value(), self.source_factory
+        )
+        self.capture_worker.set_fast_scaling(self.fast_scaling_check.isChecked())
+        self.capture_worker.frame_ready.connect(self.update_capture, Qt.QueuedConnection)
+        self.capture_worker.capture_error.connect(self.on_capture_error, Qt.QueuedConnection)
+        self.capture_worker.start()
+    
+    def stop_capture_worker(self):
+        if self.capture_worker:
+            self.capture_worker.stop()
+            print(f"캡처 스레드 통계: {self.capture_worker.stats()}")
+            self.capture_worker = None
+    
+    def on_record_toggled(self, checked):
+        if checked:
+            self.start_recording()
+        else:
+            self.stop_recording()
+    
+    def start_recording(self):
+        # recordings/시각/region_번호 폴더에 영역별로 저장
+        self.recording_dir = os.path.join("recordings", time.strftime("%Y%m%d_%H%M%S"))
+        for region_id in self.regions:
+            self.start_region_recorder(region_id)
+        self.record_btn.setText("녹화 중지")
+        self.status_label.setText(f"녹화 중: {self.recording_dir}")
+    
+    def start_region_recorder(self, region_id):
+        FrameRecorder = startup_profile.load("recorder").FrameRecorder
+        recorder = FrameRecorder(os.path.join(self.recording_dir, f"region_{region_id}"))
+        self.recorders[region_id] = recorder
+        
+        # 현재 표시 중인 프레임부터 저장
+        pip_window = self.regions[region_id][1]
+        if pip_window.frame_buffer is not None:
+            recorder.submit(pip_window.frame_buffer)
+    
+    def stop_recording(self):
+        written = failed = dropped = 0
+        for recorder in self.recorders.values():
+            recorder.stop()
+            stats = recorder.stats()
+            written += stats["written"]
+            failed += stats["failed"]
+            dropped += stats["dropped"]
+        self.recorders = {}
+        
+        if self.recording_dir:
+            text = f"녹화 저장: {self.recording_dir} (저장 {written}, 버림 {dropped})"
+            if failed:
+                text += f" - 저장 실패 {failed}개 (디스크 공간과 경로를 확인하세요)"
+            self.status_label.setText(text)
+        self.recording_dir = None
+        self.record_btn.setText("녹화 시작")
+    
+    def on_ocr_toggled(self, checked):
+        if checked:
+            self.start_text_extractor()
+        else:
+            self.stop_text_extractor()
+    
+    def start_text_extractor(self):
+        if self.text_extractor:
+            return
+        self.load_engine()  # OCR 스레드도 실제로 고른 캡처 백엔드를 쓰도록 먼저 정함
+        TextExtractor = startup_profile.load("text_extractor").TextExtractor
+        self.text_extractor = TextExtractor(source_factory=self.ocr_source_factory)
+        self.text_extractor.text_ready.connect(self.on_text_ready, Qt.QueuedConnection)
+        self.text_extractor.extract_error.connect(self.on_extract_error, Qt.QueuedConnection)
+        self.text_extractor.start()
+        
+        # 현재 표시 중인 프레임부터 추출
+        for region_id, (area, pip_window) in self.regions.items():
+            pip_window.set_text_mode(True)
+            if pip_window.frame_buffer is not None:
+                self.text_extractor.submit(region_id, pip_window.frame_buffer, area)
+    
+    def stop_text_extractor(self):
+        if self.text_extractor:
+            self.text_extractor.stop()
+            print(f"OCR 통계: {self.text_extractor.stats()}")
+            self.text_extractor = None
+        for _, pip_window in self.regions.values():
+            pip_window.set_text_mode(False)
+    
+    def on_text_ready(self, region_id, text):
+        entry = self.regions.get(region_id)
+        if entry:
+            entry[1].set_text(text)
+        if self.text_search_edit.text():
+            self.on_text_search(self.text_search_edit.text())
+    
+    def on_extract_error(self, message):
+        print(f"OCR 오류: {message}")
+        self.ocr_check.setChecked(False)
+        self.status_label.setText(f"OCR 오류: {message}")
+    
+    def on_text_search(self, query):
+        self.text_results.clear()
+        if not self.text_extractor:
+            return
+        for timestamp, region_id, text in self.text_extractor.search(query):
+            item = QListWidgetItem(f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] 영역 {region_id}: {text}")
+            item.setData(Qt.UserRole, text)
+            self.text_results.addItem(item)
+    
+    def on_display_size_changed(self, region_id, w, h):
+        # PIP 창 크기에 맞게 캡처 스레드에서 미리 축소
+        if self.capture_worker:
+            self.capture_worker.set_display_size(region_id, (w, h))
+    
+    def on_auto_update_toggled(self, checked):
+        if checked and self.regions:
+            self.start_capture_worker()
+            for region_id, (area, pip_window) in self.regions.items():
+                self.capture_worker.add_region(region_id, area, pip_window.stats)
+                self.capture_worker.set_display_size(region_id, pip_window.display_size())
+        elif not checked:
+            self.stop_capture_worker()
+    
+    def on_fast_scaling_toggled(self, checked):
+        if self.capture_worker:
+            self.capture_worker.set_fast_scaling(checked)
+    
+    def on_fps_range_changed(self):
+        if self.capture_worker:
+            self.capture_worker.set_fps_range(self.min_fps_spin.value(), self.max_fps_spin.value())
+    
+    def update_status(self):
+        # 실제로 캡처되고 있는 초당 프레임 수 표시 (캡처 스레드가 없으면 비움)
+        if not self.capture_worker:
+            self.capture_status_label.clear()
+        else:
+            fps = self.capture_worker.effective_fps()
+            text = f"활성 영역: {len(self.regions)}개 | 유효 fps: {fps}"
+            if self.recorders:
+                dropped = sum(r.frames.dropped_count for r in self.recorders.values())
+                text += f" | 녹화 중 (버림 {dropped})"
+            if self.stream_server:
+                text += f" | 스트리밍 {self.stream_server.port} (시청 {len(self.stream_server.clients())})"
+            self.capture_status_label.setText(text)
+    
+    def update_capture(self, region_id):
+        # 캡처 스레드가 보낸 최신 프레임을 GUI 스레드에서 표시
+        worker = self.capture_worker
+        if not worker:
+            return
+        
+        item = worker.take_frame(region_id)
+        if item is None:
+            return
+        
+        # 바뀐 영역만 PIP 창에 반영하고, 더 이상 표시하지 않는 이전 버퍼를 풀로 반환
+        frame, rect = item
+        entry = self.regions.get(region_id)
+        previous = entry[1].update_image(frame, rect) if entry else frame
+        if self.first_frame_pending:
+            self.first_frame_pending = False
+            startup_profile.mark("첫 프레임 표시")
+            startup_profile.report("첫 프레임 표시까지")
+        
+        # 녹화 중이면 저장 스레드로 전달 (대기열이 차 있으면 버림)
+        recorder = self.recorders.get(region_id)
+        if recorder:
+            recorder.submit(frame)
+        
+        # 되돌려 보기용 기록 (압축은 기록 스레드에서 하므로 여기서는 복사만 함)
+        history = self.histories.get(region_id)
+        if history:
+            history.submit(frame)
+        
+        # 스트리밍 중이면 인코딩 스레드로 전달 (영역당 최신 프레임 하나만 대기, 인코딩은 시청자 수와 무관하게 한 번)
+        if self.stream_server:
+            self.stream_server.submit(region_id, frame)
+        
+        # 텍스트 추출 중이면 바뀐 프레임을 OCR 스레드로 전달 (영역당 최신 프레임 하나만 대기, OCR은 원본 해상도로 다시 grab)
+        if self.text_extractor and entry:
+            self.text_extractor.submit(region_id, frame, entry[0])
+
+        if previous is not None:
+            worker.release_frame(region_id, previous)
+    
+    def on_capture_error(self, message):
+        print(f"업데이트 오류: {message}")
+        # 오류 발생 시 캡처 스레드 중지
+        self.stop_capture_worker()
+        self.status_label.setText(f"업데이트 오류: {message}")
+    
+    def closeEvent(self, event):
+        # 다음 실행 때 --restore로 이어서 쓸 수 있도록 마지막 세션 저장
+        if self.regions:
+            self.presets.set_last_session(self.current_session())
+        
+        # 캡처 스레드를 먼저 멈춰서 영역을 지우기 전의 통계(캡처 엔진의 버퍼 할당 포함)를 출력
+        self.stop_capture_worker()
+        
+        # 모든 PIP 창 닫기
+        for region_id in list(self.regions):
+            self.remove_region(region_id)
+        
+        self.stop_recording()
+        self.stop_text_extractor()
+        self.status_timer.stop()
+        if self.stream_server:
+            print(f"스트리밍 통계: {self.stream_server.stats()}")
+            self.stream_server.stop()
+            self.stream_server = None
+        
+        # 스냅샷용 캡처 엔진 정리 (자동 업데이트의 grab은 캡처 스레드/프로세스의 엔진에서 하므로 통계는 위에서 출력)
+        if self.engine is not None:
+            self.engine.close()
+        
+        # 캡처 스레드가 멈춘 뒤 트레이스의 인덱스를 씀
+        if self.trace_writer:
+            self.trace_writer.close()
+            print(f"캡처 트레이스 통계: {self.trace_writer.stats()}")
+            self.trace_writer = None
+        
+        super().closeEvent(event)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="화면 영역 PIP 도구")
+    parser.add_argument("--backend", choices=["thread", "process"], default="thread",
+                        help="캡처 방식 (process: 여러 캡처 프로세스 + 공유 메모리)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="메인 창 표시와 첫 프레임까지의 단계별 시간, 지연 import 시간 출력")
+    parser.add_argument("--restore", action="store_true",
+                        help="영역 선택 없이 마지막 세션의 영역들로 바로 캡처 시작")
+    parser.add_argument("--no-cv2", action="store_true",
+                        help="cv2 없이 numpy로 축소 (캡처 프로세스에도 환경 변수로 전달됨)")
+    parser.add_argument("--grabber", choices=["auto", "mss", "xshm"], default="auto",
+                        help="캡처 백엔드 (auto: X11이면 XShm, 실패하면 mss)")
+    parser.add_argument("--history-seconds", type=float, default=30,
+                        help="PIP 창에서 되돌려 볼 수 있는 최근 기록 길이 (초, 0이면 기록 안 함)")
+    parser.add_argument("--history-mb", type=float, default=64,
+                        help="영역 하나의 기록이 쓰는 메모리 상한 (압축한 프레임만 셈, 작업용 전체 프레임 버퍼 몇 개는 별도)")
+    parser.add_argument("--stream-port", type=int, default=None,
+                        help="영역들을 이 포트에서 MJPEG(HTTP)로 스트리밍 (브라우저에서 http://주소:포트/)")
+    parser.add_argument("--stream-host", default="127.0.0.1",
+                        help="스트리밍 서버 주소 (다른 기기에서 보려면 0.0.0.0)")
+    parser.add_argument("--record-trace", metavar="PATH",
+                        help="실제 grab 결과와 시각을 캡처 트레이스로 기록 (capture_trace.py replay로 재생, thread 백엔드만)")
+    args, qt_args = parser.parse_known_args()
+    if args.record_trace and args.backend != "thread":
+        parser.error("--record-trace는 thread 백엔드에서만 사용할 수 있습니다")
+    startup_profile.enabled = args.profile_startup
+    if args.no_cv2:
+        os.environ["PIP_NO_CV2"] = "1"
+
+    # 고해상도 배율 사용 (125%/150%도 반올림하지 않고 그대로, 캡처 좌표는 ScreenMap으로 변환)
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+    if hasattr(QApplication, "setHighDpiScaleFactorRoundingPolicy"):
+        QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
+    app = QApplication(sys.argv[:1] + qt_args)
+    startup_profile.mark("QApplication 생성")
+    window = ScreenCaptureApp(backend=args.backend, grabber=args.grabber,
+                              history_seconds=args.history_seconds, history_mb=args.history_mb,
+                              stream_port=args.stream_port, stream_host=args.stream_host,
+                              trace_path=args.record_trace)
+    startup_profile.mark("메인 창 생성")
+    window.show()
+    
+    # 이벤트 루프가 돌기 시작한 시점 = 메인 창이 처음 그려진 시점
+    def on_first_show():
+        startup_profile.mark("메인 창 표시")
+        startup_profile.report("메인 창 표시까지")
+    
+    QTimer.singleShot(0, on_first_show)
+    if args.restore:
+        QTimer.singleShot(0, window.restore_last_session)
+    sys.exit(app.exec_())
@@ -0,0 +1,98 @@
+import math
+
+from change_detector import intersect_rect, union_rect
+
+
+class ScreenMap:
+    # Qt 논리 좌표(창 위치, 오버레이의 마우스 좌표)와 mss 물리 좌표(캡처 영역) 사이의 변환
+    # 고해상도 배율(125%, 150% 등)에서 Qt 좌표는 화면마다 배율(devicePixelRatio)로 나눈 값이라,
+    # 화면마다 물리 = 물리 원점 + (논리 - 논리 원점) * 배율 로 따로 계산해야 함
+    # screens: [(논리 영역 (x, y, w, h), 배율, 물리 영역 (x, y, w, h)), ...]
+    def __init__(self, screens):
+        self.screens = screens
+
+    @classmethod
+    def identity(cls, monitors):
+        # 논리 좌표 = 물리 좌표 (배율 1, Qt 화면 정보가 mss 모니터와 맞지 않을 때도 사용)
+        screens = []
+        for mon in monitors[1:] or monitors:
+            rect = (mon["left"], mon["top"], mon["width"], mon["height"])
+            screens.append((rect, 1.0, rect))
+        return cls(screens)
+
+    @classmethod
+    def from_qt(cls, qt_screens, monitors):
+        # QScreen 목록과 mss 모니터를 짝지음
+        # 물리 크기(논리 크기 * 배율)가 같은 모니터 중 원점이 가장 가까운 것을 고름
+        # (Qt5는 화면 원점을 물리 좌표 그대로 두거나 전체 배율만큼 나누므로 두 경우를 모두 비교)
+        # 짝이 없는 화면이 있으면 Qt와 mss가 다른 화면을 보고 있는 것이므로 배율 없이 사용
+        unused = list(monitors[1:])
+        screens = []
+        for screen in qt_screens:
+            g = screen.geometry()
+            ratio = screen.devicePixelRatio()
+            logical = (g.x(), g.y(), g.width(), g.height())
+            width, height = round(g.width() * ratio), round(g.height() * ratio)
+            candidates = [
+                mon for mon in unused
+                if abs(mon["width"] - width) <= 1 and abs(mon["height"] - height) <= 1
+            ]
+            if not candidates:
+                return cls.identity(monitors)
+            mon = min(candidates, key=lambda m: min(
+                abs(m["left"] - g.x()) + abs(m["top"] - g.y()),
+                abs(m["left"] - g.x() * ratio) + abs(m["top"] - g.y() * ratio),
+            ))
+            unused.remove(mon)
+            screens.append((logical, ratio, (mon["left"], mon["top"], mon["width"], mon["height"])))
+        return cls(screens) if screens else cls.identity(monitors)
+
+    def logical_bounds(self):
+        # 모든 화면을 덮는 논리 좌표 영역 (선택 오버레이 창 크기)
+        bounds = None
+        for logical, _, _ in self.screens:
+            bounds = union_rect(bounds, logical)
+        return bounds
+
+    def screen_at(self, x, y):
+        # 논리 좌표 (x, y)가 들어 있는 화면 (없으면 가장 가까운 화면)
+        def distance(screen):
+            sx, sy, sw, sh = screen[0]
+            dx = max(sx - x, 0, x - (sx + sw - 1))
+            dy = max(sy - y, 0, y - (sy + sh - 1))
+            return dx + dy
+        return min(self.screens, key=distance)
+
+    def to_physical_point(self, x, y):
+        (lx, ly, _, _), ratio, (px, py, _, _) = self.screen_at(x, y)
+        return px + (x - lx) * ratio, py + (y - ly) * ratio
+
+    def to_logical_point(self, x, y):
+        # 물리 좌표 (x, y)를 그 점이 들어 있는 화면 기준으로 논리 좌표로 바꿈
+        for (lx, ly, _, _), ratio, (px, py, pw, ph) in self.screens:
+            if px <= x < px + pw and py <= y < py + ph:
+                return lx + (x - px) / ratio, ly + (y - py) / ratio
+        return x, y
+
+    def to_physical(self, rect):
+        # 논리 좌표 영역을 캡처할 물리 좌표 영역으로 바꿈
+        # 여러 화면에 걸친 영역은 화면마다 잘라서 바꾼 뒤 합침 (배율이 다르면 조각 크기가 달라짐)
+        area = None
+        for logical, ratio, physical in self.screens:
+            piece = intersect_rect(rect, logical)
+            if piece is None:
+                continue
+            x, y, w, h = piece
+            lx, ly = logical[:2]
+            px, py = physical[:2]
+            x0, y0 = px + math.floor((x - lx) * ratio), py + math.floor((y - ly) * ratio)
+            x1, y1 = px + math.ceil((x + w - lx) * ratio), py + math.ceil((y + h - ly) * ratio)
+            mapped = intersect_rect((x0, y0, x1 - x0, y1 - y0), physical)
+            area = union_rect(area, mapped)
+        if area is None:
+            # 어느 화면과도 겹치지 않으면 가장 가까운 화면의 배율로 바꿈
+            x, y, w, h = rect
+            _, ratio, _ = self.screen_at(x, y)
+            px, py = self.to_physical_point(x, y)
+            area = (math.floor(px), math.floor(py), math.ceil(w * ratio), math.ceil(h * ratio))
+        return area
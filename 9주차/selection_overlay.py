@@ -1,113 +1,277 @@
-import sys
-from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QRect, QPoint
-from PyQt5.QtGui import QPainter, QPen, QColor, QCursor
-
-class SelectionOverlay(QWidget):
-    def __init__(self, monitor_info, parent=None):
-        super().__init__(parent)
-        # 투명한 전체 화면 오버레이 설정
-        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
-        self.setAttribute(Qt.WA_TranslucentBackground)
-        
-        # 모니터 정보 저장
-        self.monitor_info = monitor_info
-        
-        # 현재 화면의 전체 가상 화면 크기 설정
-        screen_geo = QRect(
-            self.monitor_info['left'],
-            self.monitor_info['top'],
-            self.monitor_info['width'],
-            self.monitor_info['height']
-        )
-        self.setGeometry(screen_geo)
-        
-        # 영역 선택을 위한 변수
-        self.start_point = None
-        self.end_point = None
-        self.selecting = False
-        self.selected_rect = None
-        
-        # 화면을 어둡게 만들기 위한 오버레이 색상
-        self.overlay_color = QColor(0, 0, 0, 100)  # 반투명 검은색
-        self.border_color = QColor(255, 255, 255)  # 흰색 테두리
-        
-        # 선택 완료 시 호출될 콜백 함수
-        self.selection_callback = None
-        
-        # 커서 설정
-        self.setCursor(Qt.CrossCursor)
-        
-        # ESC 키로 취소할 수 있도록 키보드 포커스 설정
-        self.setFocusPolicy(Qt.StrongFocus)
-    
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        
-        # 전체 화면을 반투명한 오버레이로 덮기
-        painter.fillRect(self.rect(), self.overlay_color)
-        
-        # 선택 영역이 있으면 그리기
-        if self.selecting and self.start_point and self.end_point:
-            # 선택 영역 계산
-            selection_rect = self.calculate_rect(self.start_point, self.end_point)
-            
-            # 선택 영역은 투명하게
-            painter.setCompositionMode(QPainter.CompositionMode_Clear)
-            painter.fillRect(selection_rect, Qt.transparent)
-            
-            # 선택 영역 테두리 그리기
-            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-            painter.setPen(QPen(self.border_color, 2, Qt.SolidLine))
-            painter.drawRect(selection_rect)
-            
-            # 선택 영역 정보 표시
-            text = f"{selection_rect.width()} x {selection_rect.height()}"
-            painter.setPen(Qt.white)
-            painter.drawText(selection_rect.bottomRight() + QPoint(10, 10), text)
-    
-    def calculate_rect(self, start, end):
-        return QRect(min(start.x(), end.x()), 
-                    min(start.y(), end.y()),
-                    abs(start.x() - end.x()),
-                    abs(start.y() - end.y()))
-    
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.start_point = event.pos()
-            self.end_point = event.pos()
-            self.selecting = True
-            self.update()
-    
-    def mouseMoveEvent(self, event):
-        if self.selecting:
-            self.end_point = event.pos()
-            self.update()
-    
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton and self.selecting:
-            self.end_point = event.pos()
-            self.selecting = False
-            self.selected_rect = self.calculate_rect(self.start_point, self.end_point)
-            
-            # 선택 영역이 유효하면 콜백 호출
-            if self.selected_rect.width() > 10 and self.selected_rect.height() > 10:
-                if self.selection_callback:
-                    # 선택한 영역의 좌표를 시스템 좌표에 맞게 변환
-                    adjusted_rect = QRect(
-                        self.selected_rect.x() + self.monitor_info['left'],
-                        self.selected_rect.y() + self.monitor_info['top'],
-                        self.selected_rect.width(),
-                        self.selected_rect.height()
-                    )
-                    self.selection_callback(adjusted_rect)
-            
-            self.close()
-    
-    def keyPressEvent(self, event):
-        # ESC 키를 눌러 선택 취소
-        if event.key() == Qt.Key_Escape:
-            self.close()
-    
-    def set_callback(self, callback):
-        self.selection_callback = callback
\ No newline at end of file
+import sys
+import numpy as np
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QRect, QPoint, QSize
+from PyQt5.QtGui import QPainter, QPen, QColor, QCursor, QImage, QRegion
+
+from screen_map import ScreenMap
+
+class SelectionOverlay(QWidget):
+    # 화면을 한 번 캡처한 정지 화면 위에서 영역을 선택하는 전체 화면 창
+    # - 배경(어둡게 한 정지 화면)은 열 때 한 번만 만들고, 마우스가 움직이면 바뀐 부분만 다시 그림
+    # - 커서 근처에 픽셀 단위 돋보기를 표시하고, 모니터 경계와 화면 속 경계(창 테두리 등)에 붙음
+    # - 창은 Qt 논리 좌표로 모든 화면을 덮고, 정지 화면과 선택 결과는 screen_map으로 화면별 물리 좌표와 맞춤
+    # - screenshot이 없으면 예전처럼 반투명 창으로 동작
+    SNAP_DISTANCE = 8     # 이 거리(px) 안에 경계가 있으면 선택 모서리를 붙임 (Alt를 누르면 끔)
+    SNAP_SPAN = 40        # 경계를 찾을 때 커서 위아래(또는 좌우)로 살펴보는 길이(px)
+    SNAP_THRESHOLD = 24   # 경계로 볼 이웃 픽셀 간 평균 밝기 차이
+    LOUPE_PIXELS = 15     # 돋보기에 보여줄 원본 픽셀 수 (가로/세로)
+    LOUPE_ZOOM = 8        # 돋보기 확대 배율
+    
+    def __init__(self, monitor_info, screenshot=None, screen_map=None, parent=None):
+        super().__init__(parent)
+        # 전체 화면 오버레이 설정 (정지 화면을 그릴 때는 불투명 창이라 합성 비용이 없음)
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        if screenshot is None:
+            self.setAttribute(Qt.WA_TranslucentBackground)
+        
+        # 모니터 정보 저장 (monitor_info: 정지 화면의 물리 좌표 영역)
+        self.monitor_info = monitor_info
+        if screen_map is None:
+            screen_map = ScreenMap.identity([monitor_info])
+        self.screen_map = screen_map
+        
+        # 현재 화면의 전체 가상 화면 크기 설정 (논리 좌표)
+        screen_geo = QRect(*screen_map.logical_bounds())
+        self.origin = screen_geo.topLeft()
+        self.setGeometry(screen_geo)
+        
+        # 영역 선택을 위한 변수
+        self.start_point = None
+        self.end_point = None
+        self.selecting = False
+        self.selected_rect = None
+        self.cursor_pos = None  # 돋보기 위치
+        
+        # 화면을 어둡게 만들기 위한 오버레이 색상
+        self.overlay_color = QColor(0, 0, 0, 100)  # 반투명 검은색
+        self.border_color = QColor(255, 255, 255)  # 흰색 테두리
+        
+        # 정지 화면 (screenshot: 가상 화면 전체의 BGRA 배열, QImage가 메모리를 가리키므로 보관)
+        self.screenshot = screenshot
+        self.background = None  # 원본 밝기의 정지 화면 (선택 영역 안쪽)
+        self.dimmed = None      # 어둡게 한 정지 화면 (선택 영역 바깥쪽)
+        self.source_image = None
+        if screenshot is not None:
+            h, w = screenshot.shape[:2]
+            self.source_image = QImage(screenshot.data, w, h, screenshot.strides[0], QImage.Format_RGB32)
+            self.background = self.source_image
+            scaled = any(logical != physical for logical, _, physical in screen_map.screens)
+            if scaled or (w, h) != (screen_geo.width(), screen_geo.height()):
+                self.background = self.logical_background(screen_geo)
+            self.dimmed = self.background.copy()
+            painter = QPainter(self.dimmed)
+            painter.fillRect(self.dimmed.rect(), self.overlay_color)
+            painter.end()
+            self.setMouseTracking(True)  # 누르지 않아도 돋보기 표시
+        
+        # 붙일 모니터 경계 (오버레이 좌표)
+        self.snap_xs = []
+        self.snap_ys = []
+        for (x, y, w, h), _, _ in screen_map.screens:
+            self.snap_xs += [x - self.origin.x(), x + w - self.origin.x()]
+            self.snap_ys += [y - self.origin.y(), y + h - self.origin.y()]
+        
+        # 선택 완료 시 호출될 콜백 함수
+        self.selection_callback = None
+        
+        # 커서 설정
+        self.setCursor(Qt.CrossCursor)
+        
+        # ESC 키로 취소할 수 있도록 키보드 포커스 설정
+        self.setFocusPolicy(Qt.StrongFocus)
+    
+    def logical_background(self, screen_geo):
+        # 물리 좌표 정지 화면을 화면마다 그 화면의 배율로 줄여서 논리 좌표 크기의 배경으로 만듦
+        background = QImage(screen_geo.size(), QImage.Format_RGB32)
+        background.fill(Qt.black)
+        painter = QPainter(background)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        left, top = self.monitor_info['left'], self.monitor_info['top']
+        for (x, y, w, h), _, (px, py, pw, ph) in self.screen_map.screens:
+            target = QRect(x - self.origin.x(), y - self.origin.y(), w, h)
+            painter.drawImage(target, self.source_image, QRect(px - left, py - top, pw, ph))
+        painter.end()
+        return background
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        
+        if self.dimmed is not None:
+            # 다시 그릴 부분만 어두운 정지 화면으로 덮기
+            painter.drawImage(event.rect(), self.dimmed, event.rect())
+        else:
+            # 전체 화면을 반투명한 오버레이로 덮기
+            painter.fillRect(self.rect(), self.overlay_color)
+        
+        # 선택 영역이 있으면 그리기
+        if self.selecting and self.start_point and self.end_point:
+            # 선택 영역 계산
+            selection_rect = self.calculate_rect(self.start_point, self.end_point)
+            
+            if self.background is not None:
+                # 선택 영역은 원래 밝기의 정지 화면으로
+                painter.drawImage(selection_rect, self.background, selection_rect)
+            else:
+                # 선택 영역은 투명하게
+                painter.setCompositionMode(QPainter.CompositionMode_Clear)
+                painter.fillRect(selection_rect, Qt.transparent)
+                painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            
+            # 선택 영역 테두리 그리기
+            painter.setPen(QPen(self.border_color, 2, Qt.SolidLine))
+            painter.drawRect(selection_rect)
+            
+            # 선택 영역 정보 표시 (캡처될 물리 픽셀 크기)
+            _, _, w, h = self.capture_area(selection_rect)
+            text = f"{w} x {h}"
+            painter.setPen(Qt.white)
+            painter.drawText(self.label_rect(selection_rect), Qt.AlignLeft | Qt.AlignVCenter, text)
+        
+        if self.cursor_pos is not None and self.source_image is not None:
+            self.draw_loupe(painter, self.cursor_pos)
+        painter.end()
+    
+    def draw_loupe(self, painter, pos):
+        # 커서 주변 원본 픽셀을 확대해서 그리고, 가운데 픽셀의 좌표와 색을 표시
+        rect = self.loupe_rect(pos)
+        n, zoom = self.LOUPE_PIXELS, self.LOUPE_ZOOM
+        view = QRect(rect.x(), rect.y(), n * zoom, n * zoom)
+        sx, sy = self.source_point(pos)
+        painter.fillRect(rect, QColor(30, 30, 30))
+        painter.drawImage(view, self.source_image, QRect(sx - n // 2, sy - n // 2, n, n))
+        
+        painter.setPen(QPen(QColor(255, 60, 60), 1))
+        painter.drawRect(view.x() + n // 2 * zoom, view.y() + n // 2 * zoom, zoom, zoom)
+        painter.setPen(QPen(self.border_color, 1))
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+        
+        b, g, r = self.screenshot[sy, sx, :3]
+        info = f"{sx + self.monitor_info['left']}, {sy + self.monitor_info['top']}  #{r:02X}{g:02X}{b:02X}"
+        painter.drawText(QRect(rect.x(), view.bottom() + 1, rect.width(), rect.bottom() - view.bottom()), Qt.AlignCenter, info)
+    
+    def source_point(self, pos):
+        # 오버레이 좌표를 정지 화면 픽셀 좌표로 변환 (화면 밖이면 가장자리로)
+        h, w = self.screenshot.shape[:2]
+        x, y = self.screen_map.to_physical_point(pos.x() + self.origin.x(), pos.y() + self.origin.y())
+        return (min(w - 1, max(0, int(x) - self.monitor_info['left'])),
+                min(h - 1, max(0, int(y) - self.monitor_info['top'])))
+    
+    def capture_area(self, rect):
+        # 오버레이 좌표의 선택 영역을 캡처할 물리 좌표 영역 (x, y, w, h)으로 변환
+        return self.screen_map.to_physical((rect.x() + self.origin.x(), rect.y() + self.origin.y(),
+                                            rect.width(), rect.height()))
+    
+    def label_rect(self, selection_rect):
+        return QRect(selection_rect.bottomRight() + QPoint(8, 4), QSize(110, 20))
+    
+    def loupe_rect(self, pos):
+        # 커서 오른쪽 아래에 두고, 화면 밖으로 나가면 반대쪽으로 옮김
+        size = self.LOUPE_PIXELS * self.LOUPE_ZOOM
+        rect = QRect(pos + QPoint(20, 20), QSize(size, size + 20))
+        if rect.right() > self.width():
+            rect.moveRight(pos.x() - 20)
+        if rect.bottom() > self.height():
+            rect.moveBottom(pos.y() - 20)
+        return rect
+    
+    def dirty_region(self):
+        # 현재 상태에서 배경 위에 덧그린 부분 (선택 영역, 크기 표시, 돋보기)
+        region = QRegion()
+        if self.selecting and self.start_point and self.end_point:
+            selection_rect = self.calculate_rect(self.start_point, self.end_point)
+            region += selection_rect.adjusted(-2, -2, 2, 2)
+            region += self.label_rect(selection_rect)
+        if self.cursor_pos is not None and self.source_image is not None:
+            region += self.loupe_rect(self.cursor_pos).adjusted(-1, -1, 1, 1)
+        return region
+    
+    def refresh(self, old_region):
+        # 상태를 바꾸기 전(old_region)과 후에 덧그린 부분만 다시 그림 (정지 화면이 없으면 전체)
+        if self.dimmed is None:
+            self.update()
+        else:
+            self.update(old_region + self.dirty_region())
+    
+    def snap(self, pos, modifiers):
+        # 가까운 모니터 경계, 없으면 정지 화면에서 찾은 경계로 좌표를 붙임
+        if self.screenshot is None or modifiers & Qt.AltModifier:
+            return pos
+        x = self.snap_axis(pos.x(), pos.y(), self.snap_xs, vertical=True)
+        y = self.snap_axis(pos.y(), pos.x(), self.snap_ys, vertical=False)
+        return QPoint(x, y)
+    
+    def snap_axis(self, value, other, edges, vertical):
+        # value 축에서 가장 가까운 경계 좌표 (SNAP_DISTANCE 안에 없으면 value 그대로)
+        d = self.SNAP_DISTANCE
+        near = [e for e in edges if abs(e - value) <= d]
+        if near:
+            return min(near, key=lambda e: abs(e - value))
+        
+        # 커서 주변 띠(정지 화면 픽셀 좌표)에서 이웃 픽셀 간 밝기 차이가 가장 큰 위치를 경계로 봄
+        h, w = self.screenshot.shape[:2]
+        length = w if vertical else h
+        other_length = h if vertical else w
+        sx, sy = self.source_point(QPoint(value, other) if vertical else QPoint(other, value))
+        center, o = (sx, sy) if vertical else (sy, sx)
+        lo, hi = max(0, center - d - 1), min(length, center + d + 2)
+        o0, o1 = max(0, o - self.SNAP_SPAN // 2), min(other_length, o + self.SNAP_SPAN // 2)
+        if hi - lo < 2 or o1 <= o0:
+            return value
+        strip = self.screenshot[o0:o1, lo:hi, :3] if vertical else self.screenshot[lo:hi, o0:o1, :3].transpose(1, 0, 2)
+        diffs = np.abs(np.diff(strip.astype(np.int16), axis=1)).mean(axis=(0, 2))
+        best = int(diffs.argmax())
+        if diffs[best] < self.SNAP_THRESHOLD:
+            return value
+        
+        # 찾은 경계(물리 좌표)를 다시 오버레이 좌표로
+        edge = lo + best + 1
+        if vertical:
+            x, _ = self.screen_map.to_logical_point(edge + self.monitor_info['left'], sy + self.monitor_info['top'])
+            return int(round(x)) - self.origin.x()
+        _, y = self.screen_map.to_logical_point(sx + self.monitor_info['left'], edge + self.monitor_info['top'])
+        return int(round(y)) - self.origin.y()
+    
+    def calculate_rect(self, start, end):
+        return QRect(min(start.x(), end.x()),
+                    min(start.y(), end.y()),
+                    abs(start.x() - end.x()),
+                    abs(start.y() - end.y()))
+    
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            old_region = self.dirty_region()
+            self.start_point = self.snap(event.pos(), event.modifiers())
+            self.end_point = self.start_point
+            self.selecting = True
+            self.refresh(old_region)
+    
+    def mouseMoveEvent(self, event):
+        old_region = self.dirty_region()
+        self.cursor_pos = event.pos()
+        if self.selecting:
+            self.end_point = self.snap(event.pos(), event.modifiers())
+        self.refresh(old_region)
+    
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self.selecting:
+            self.end_point = self.snap(event.pos(), event.modifiers())
+            self.selecting = False
+            self.selected_rect = self.calculate_rect(self.start_point, self.end_point)
+            
+            # 선택 영역이 유효하면 콜백 호출
+            if self.selected_rect.width() > 10 and self.selected_rect.height() > 10:
+                if self.selection_callback:
+                    # 선택한 영역의 좌표를 캡처할 물리 좌표에 맞게 변환 (화면마다 배율 적용)
+                    adjusted_rect = QRect(*self.capture_area(self.selected_rect))
+                    self.selection_callback(adjusted_rect)
+            
+            self.close()
+    
+    def keyPressEvent(self, event):
+        # ESC 키를 눌러 선택 취소
+        if event.key() == Qt.Key_Escape:
+            self.close()
+    
+    def set_callback(self, callback):
+        self.selection_callback = callback
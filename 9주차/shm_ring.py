@@ -0,0 +1,151 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from change_detector import union_rect
+
+
+class SharedFrameRing:
+    # 캡처 프로세스와 GUI 프로세스가 함께 쓰는 영역 하나의 프레임 링 버퍼 (shared_memory)
+    # 앞부분은 슬롯별 상태 헤더(int64), 뒷부분은 슬롯별 BGRA 프레임 데이터
+    # 슬롯 상태는 한쪽만 바꾸도록 나눠서 잠금 없이 사용함
+    # - 캡처 프로세스: FREE -> WRITING -> READY
+    # - GUI 프로세스: READY -> READING -> FREE (더 새 프레임이 있으면 READY -> FREE로 버림)
+    FREE, WRITING, READY, READING = range(4)
+    FIELDS = ("state", "seq", "width", "height", "x", "y", "w", "h", "grab_us", "numpy_us", "convert_us", "put_us")
+    COUNTERS = ("captured", "skipped", "dropped")
+
+    # close()했지만 아직 표시 중인 슬롯이 있어서 매핑을 남겨 둔 링
+    retained = set()
+
+    def __init__(self, shm, width, height, slots):
+        self.shm = shm
+        self.name = shm.name
+        self.width = width
+        self.height = height
+        self.slots = slots
+
+        # 헤더 (마지막 행은 캡처 프로세스가 올리는 COUNTERS 카운터)
+        self.header_bytes = -(-(slots + 1) * len(self.FIELDS) * 8 // 64) * 64
+        self.slot_bytes = -(-width * height * 4 // 64) * 64
+        self.header = np.ndarray((slots + 1, len(self.FIELDS)), dtype=np.int64, buffer=shm.buf)
+        self.field = {name: i for i, name in enumerate(self.FIELDS)}
+
+        # 슬롯 데이터의 시작 주소 (GUI가 돌려준 배열이 어느 슬롯인지 찾을 때 사용)
+        base = np.frombuffer(shm.buf, dtype=np.uint8, count=1).__array_interface__["data"][0]
+        self.slot_addresses = [base + self.header_bytes + i * self.slot_bytes for i in range(slots)]
+        self.seq = 0
+
+    @classmethod
+    def create(cls, width, height, slots=4):
+        header_bytes = -(-(slots + 1) * len(cls.FIELDS) * 8 // 64) * 64
+        slot_bytes = -(-width * height * 4 // 64) * 64
+        shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * slot_bytes)
+        ring = cls(shm, width, height, slots)
+        ring.header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, width, height, slots=4):
+        return cls(shared_memory.SharedMemory(name=name), width, height, slots)
+
+    def get(self, slot, name):
+        return int(self.header[slot, self.field[name]])
+
+    def set(self, slot, name, value):
+        self.header[slot, self.field[name]] = value
+
+    def frame_view(self, slot, w, h):
+        # 슬롯 데이터를 (h, w, 4) BGRA 배열로 복사 없이 감쌈
+        offset = self.header_bytes + slot * self.slot_bytes
+        return np.ndarray((h, w, 4), dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    # ---- 캡처 프로세스 쪽 ----
+
+    def acquire_slot(self):
+        # 비어 있는 슬롯을 WRITING으로 바꿔서 반환 (없으면 None)
+        for slot in range(self.slots):
+            if self.get(slot, "state") == self.FREE:
+                self.set(slot, "state", self.WRITING)
+                return slot
+        return None
+
+    def publish(self, slot, w, h, rect, grab_time, numpy_time, convert_time):
+        # 다 쓴 슬롯을 READY로 바꿈. 그 전에 READY 슬롯이 없었으면 True (GUI에 알려야 함)
+        was_empty = all(self.get(i, "state") != self.READY for i in range(self.slots))
+        self.seq += 1
+        row = self.header[slot]
+        row[self.field["seq"]] = self.seq
+        row[self.field["width"]] = w
+        row[self.field["height"]] = h
+        row[self.field["x"]:self.field["h"] + 1] = rect
+        row[self.field["grab_us"]] = int(grab_time * 1e6)
+        row[self.field["numpy_us"]] = int(numpy_time * 1e6)
+        row[self.field["convert_us"]] = int(convert_time * 1e6)
+        row[self.field["put_us"]] = time.monotonic_ns() // 1000
+        self.set(slot, "state", self.READY)
+        return was_empty
+
+    def count(self, name, n=1):
+        self.header[self.slots, self.COUNTERS.index(name)] += n
+
+    # ---- GUI 프로세스 쪽 ----
+
+    def take(self):
+        # 가장 최신 READY 슬롯을 READING으로 바꾸고, 더 오래된 READY 슬롯은 버림
+        # 반환값: (BGRA 배열, 다시 그릴 영역, grab 초, numpy 변환 초, 버퍼 갱신 초, 전달 지연 초) 또는 None
+        ready = [slot for slot in range(self.slots) if self.get(slot, "state") == self.READY]
+        if not ready:
+            return None
+        ready.sort(key=lambda slot: self.get(slot, "seq"))
+        newest = ready[-1]
+
+        # 버리는 프레임의 바뀐 영역도 다시 그리도록 합침 (크기가 같을 때만 의미 있음)
+        rect = tuple(int(v) for v in self.header[newest, self.field["x"]:self.field["h"] + 1])
+        size = (self.get(newest, "width"), self.get(newest, "height"))
+        for slot in ready[:-1]:
+            if (self.get(slot, "width"), self.get(slot, "height")) == size:
+                old = tuple(int(v) for v in self.header[slot, self.field["x"]:self.field["h"] + 1])
+                rect = union_rect(rect, old)
+            self.set(slot, "state", self.FREE)
+
+        self.set(newest, "state", self.READING)
+        latency = time.monotonic_ns() // 1000 - self.get(newest, "put_us")
+        return (
+            self.frame_view(newest, size[0], size[1]),
+            rect,
+            self.get(newest, "grab_us") / 1e6,
+            self.get(newest, "numpy_us") / 1e6,
+            self.get(newest, "convert_us") / 1e6,
+            latency / 1e6,
+        )
+
+    def release(self, frame):
+        # GUI가 표시를 마친 배열의 슬롯을 FREE로 돌려줌 (다른 곳의 배열이면 무시)
+        address = frame.__array_interface__["data"][0]
+        if address in self.slot_addresses:
+            slot = self.slot_addresses.index(address)
+            if self.get(slot, "state") == self.READING:
+                self.set(slot, "state", self.FREE)
+            if self in self.retained and not self.in_use():
+                self.retained.discard(self)
+                self.close()
+
+    def in_use(self):
+        return any(self.get(slot, "state") == self.READING for slot in range(self.slots))
+
+    def counters(self):
+        return {name: int(self.header[self.slots, i]) for i, name in enumerate(self.COUNTERS)}
+
+    def close(self, unlink=False):
+        # 매핑을 닫으면 그 슬롯을 감싼 배열과 QImage가 해제된 메모리를 가리키게 됨
+        # GUI 프로세스(unlink=True)에서 PIP 창이 아직 READING 슬롯을 표시 중이면
+        # 이름만 정리하고 매핑은 retained에 남겨 두었다가 그 슬롯이 release될 때 닫음
+        if unlink:
+            self.shm.unlink()
+            if self.in_use():
+                self.retained.add(self)
+                return
+        self.header = None
+        self.shm.close()
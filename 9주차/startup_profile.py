@@ -0,0 +1,39 @@
+import importlib
+import sys
+import time
+
+# 시작 시간 계측 (screen_capture_app.py --profile-startup)
+# 기준 시각을 맞추기 위해 screen_capture_app에서 가장 먼저 import함
+START_TIME = time.perf_counter()
+
+enabled = False
+phases = []   # (단계 이름, 시작 후 경과 초)
+imports = []  # (모듈 이름, import 소요 초) - 처음 로드할 때만 기록
+
+
+def mark(name):
+    phases.append((name, time.perf_counter() - START_TIME))
+
+
+def load(name):
+    # 필요한 시점에 모듈을 import (이미 로드되어 있으면 그대로 반환)
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    imports.append((name, time.perf_counter() - start))
+    return module
+
+
+def report(title):
+    # 단계별 경과 시간과 지연 import 소요 시간 출력 (enabled일 때만)
+    if not enabled:
+        return
+    print(f"[시작 계측] {title}")
+    for name, elapsed in phases:
+        print(f"  {elapsed * 1000:8.1f} ms  {name}")
+    if imports:
+        print("  지연 import:")
+        for name, seconds in imports:
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
@@ -0,0 +1,292 @@
+import asyncio
+import threading
+import time
+
+import cv2
+
+from frame_pool import LatestFrame
+
+BOUNDARY = b"frame"
+INDEX_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>PIP 영역 스트리밍</title>
+<style>body {{ background: #222; color: #ddd; font-family: sans-serif; }} img {{ max-width: 100%; display: block; }}</style>
+</head><body>{regions}</body></html>
+"""
+
+
+class StreamSlot(LatestFrame):
+    # 영역 하나의 스트리밍 상태
+    # pending: 아직 인코딩하지 않은 최신 프레임 복사본 (새 프레임이 오면 덮어씀)
+    # viewers: 이 영역을 보고 있는 클라이언트 수 (0이면 인코딩하지 않고 최신 프레임만 보관)
+    # jpeg, clients: 이벤트 루프 스레드에서만 사용 (마지막으로 인코딩한 JPEG와 연결된 클라이언트)
+    def __init__(self):
+        super().__init__()
+        self.viewers = 0
+        self.jpeg = None
+        self.clients = set()
+
+
+class StreamClient:
+    # 클라이언트 하나의 보낼 프레임 자리 (최신 JPEG 하나만 보관)
+    # 앞 프레임을 다 보내기 전에 새 프레임이 오면 앞 프레임은 버리고 개수만 셈
+    def __init__(self, peer):
+        self.peer = peer
+        self.latest = None
+        self.event = asyncio.Event()
+        self.sent_count = 0
+        self.dropped_count = 0
+
+
+class FrameStreamServer:
+    # 캡처한 영역을 같은 네트워크의 다른 기기(노트북, 태블릿 브라우저)에서 볼 수 있게 MJPEG(HTTP)로 보내는 서버
+    # - GUI 스레드는 바뀐 프레임을 영역별 버퍼에 복사만 함 (영역당 최신 프레임 하나만 대기하는 LatestFrame)
+    # - 인코딩 스레드가 프레임마다 JPEG를 한 번만 만들고, 이벤트 루프 스레드가 같은 bytes를 모든 클라이언트에 보냄
+    #   (보는 사람이 늘어도 인코딩 비용은 그대로, 보는 사람이 없는 영역은 인코딩하지 않음)
+    # - 클라이언트마다 보낼 프레임 자리가 하나라, 느린 클라이언트는 중간 프레임을 건너뛰고 다른 클라이언트는 영향 없음
+    # 주소: /            영역 목록 페이지
+    #       /region/N    영역 N의 MJPEG 스트림 (multipart/x-mixed-replace)
+    #       /region/N.jpg 영역 N의 최신 프레임 한 장
+    def __init__(self, host="127.0.0.1", port=8765, quality=80):
+        self.host = host
+        self.port = port
+        self.quality = quality
+
+        self.slots = {}
+        self.condition = threading.Condition()
+        self.running = True
+
+        # 통계
+        self.submitted_count = 0
+        self.replaced_count = 0
+        self.encoded_count = 0
+        self.encode_time = 0.0
+        self.client_stats = []  # 연결이 끝난 클라이언트의 (보낸 수, 버린 수)
+
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.started = threading.Event()
+        self.error = None
+        self.loop_thread = threading.Thread(target=self.run_loop, daemon=True)
+        self.loop_thread.start()
+        self.started.wait()
+        if self.error is not None:
+            self.loop_thread.join()
+            raise self.error
+        self.port = self.server.sockets[0].getsockname()[1]  # port=0이면 실제로 열린 포트
+
+        self.encode_thread = threading.Thread(target=self.run_encoder, daemon=True)
+        self.encode_thread.start()
+
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def submit(self, region_id, frame):
+        # GUI 스레드에서 호출. 인코딩을 기다리는 프레임이 있으면 그 버퍼에 덮어씀
+        with self.condition:
+            slot = self.slots.get(region_id)
+            if slot is None:
+                slot = self.slots[region_id] = StreamSlot()
+            if slot.put(frame):
+                self.replaced_count += 1
+            self.submitted_count += 1
+            if slot.viewers:
+                self.condition.notify()
+
+    def remove_region(self, region_id):
+        with self.condition:
+            slot = self.slots.pop(region_id, None)
+        if slot is not None:
+            # 보고 있던 클라이언트는 연결을 끊음
+            self.loop.call_soon_threadsafe(self.close_clients, slot)
+
+    def next_job(self):
+        # 보는 사람이 있는 영역의 대기 프레임 하나를 꺼냄 (없으면 잠시 기다린 뒤 None)
+        with self.condition:
+            for region_id, slot in self.slots.items():
+                if slot.pending is not None and slot.viewers:
+                    buf = slot.take()
+                    # 꺼낸 영역은 뒤로 보내서 여러 영역이 번갈아 처리되도록 함
+                    self.slots[region_id] = self.slots.pop(region_id)
+                    return region_id, slot, buf
+            self.condition.wait(0.2)
+        return None
+
+    def run_encoder(self):
+        while self.running:
+            job = self.next_job()
+            if job is None:
+                continue
+            region_id, slot, buf = job
+
+            start = time.perf_counter()
+            ok, encoded = cv2.imencode(".jpg", buf[..., :3], [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            self.encode_time += time.perf_counter() - start
+            self.encoded_count += 1
+
+            with self.condition:
+                slot.release(buf)
+            if ok:
+                self.loop.call_soon_threadsafe(self.publish, slot, encoded.tobytes())
+
+    def publish(self, slot, jpeg):
+        # 이벤트 루프 스레드. 같은 JPEG bytes를 각 클라이언트의 자리에 넣음 (복사 없음)
+        slot.jpeg = jpeg
+        for client in slot.clients:
+            if client.latest is not None:
+                client.dropped_count += 1
+            client.latest = jpeg
+            client.event.set()
+
+    def close_clients(self, slot):
+        for client in slot.clients:
+            client.latest = None
+            client.event.set()
+        slot.clients.clear()
+
+    def run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle_client, self.host, self.port)
+            )
+        except OSError as e:
+            self.error = e
+            self.started.set()
+            return
+        self.started.set()
+        self.loop.run_forever()
+
+        # stop()에서 루프를 멈춘 뒤 남은 연결 정리
+        self.server.close()
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    async def handle_client(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            parts = request.split(b"\r\n", 1)[0].split()
+            path = parts[1].decode("latin-1") if len(parts) >= 2 and parts[0] == b"GET" else None
+
+            if path == "/":
+                await self.send_index(writer)
+            elif path is not None and path.startswith("/region/"):
+                name = path[len("/region/"):]
+                snapshot = name.endswith(".jpg")
+                if snapshot:
+                    name = name[:-4]
+                with self.condition:
+                    slot = self.slots.get(int(name)) if name.isascii() and name.isdigit() else None
+                if slot is None:
+                    await self.send_response(writer, b"404 Not Found", b"text/plain", b"no such region\n")
+                elif snapshot:
+                    await self.send_snapshot(slot, writer)
+                else:
+                    await self.send_stream(slot, writer)
+            else:
+                await self.send_response(writer, b"404 Not Found", b"text/plain", b"not found\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # stop()에서 서버를 닫을 때 남은 연결은 취소됨 (정상 종료로 처리)
+        finally:
+            writer.close()
+
+    async def send_response(self, writer, status, content_type, body):
+        writer.write(
+            b"HTTP/1.1 " + status + b"\r\nContent-Type: " + content_type
+            + b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+        )
+        await writer.drain()
+
+    async def send_index(self, writer):
+        with self.condition:
+            region_ids = list(self.slots)
+        regions = "".join(
+            f'<p>영역 {region_id}</p><img src="/region/{region_id}">' for region_id in sorted(region_ids)
+        ) or "<p>캡처 중인 영역이 없습니다</p>"
+        await self.send_response(writer, b"200 OK", b"text/html; charset=utf-8", INDEX_PAGE.format(regions=regions).encode())
+
+    def watch(self, slot, client):
+        # 보는 사람 수를 늘리고, 인코딩된 프레임이 있으면 바로 보낼 수 있게 자리에 넣음
+        slot.clients.add(client)
+        with self.condition:
+            slot.viewers += 1
+            self.condition.notify()
+        if slot.jpeg is not None:
+            client.latest = slot.jpeg
+            client.event.set()
+
+    def unwatch(self, slot, client):
+        slot.clients.discard(client)
+        with self.condition:
+            slot.viewers -= 1
+        self.client_stats.append((client.sent_count, client.dropped_count))
+
+    async def send_snapshot(self, slot, writer):
+        client = StreamClient(writer.get_extra_info("peername"))
+        self.watch(slot, client)
+        try:
+            await asyncio.wait_for(client.event.wait(), 5)
+            if client.latest is not None:
+                await self.send_response(writer, b"200 OK", b"image/jpeg", client.latest)
+                client.sent_count += 1
+        finally:
+            self.unwatch(slot, client)
+
+    async def send_stream(self, slot, writer):
+        client = StreamClient(writer.get_extra_info("peername"))
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=" + BOUNDARY
+            + b"\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        self.watch(slot, client)
+        try:
+            while True:
+                await client.event.wait()
+                client.event.clear()
+                jpeg, client.latest = client.latest, None
+                if jpeg is None:
+                    break  # 영역이 닫힘
+                writer.write(
+                    b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                    + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n"
+                )
+                # 소켓 버퍼가 찰 때까지만 기다림 (이 클라이언트만 멈추고, 그동안 온 프레임은 최신 것만 남음)
+                await writer.drain()
+                client.sent_count += 1
+        finally:
+            self.unwatch(slot, client)
+
+    def clients(self):
+        # 연결 중인 클라이언트 (주소, 보낸 수, 버린 수)
+        with self.condition:
+            slots = list(self.slots.values())
+        return [
+            (client.peer, client.sent_count, client.dropped_count)
+            for slot in slots for client in list(slot.clients)
+        ]
+
+    def stop(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify()
+        self.encode_thread.join()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+
+    def stats(self):
+        clients = self.clients()
+        finished = self.client_stats + [(sent, dropped) for _, sent, dropped in clients]
+        return {
+            "clients": len(clients),
+            "submitted": self.submitted_count,
+            "replaced": self.replaced_count,
+            "encoded": self.encoded_count,
+            "avg_encode_ms": self.encode_time / self.encoded_count * 1000 if self.encoded_count else 0.0,
+            "sent": sum(sent for sent, _ in finished),
+            "client_dropped": sum(dropped for _, dropped in finished),
+        }
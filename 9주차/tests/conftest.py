@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 9주차의 모듈들은 패키지가 아니라 같은 폴더에서 바로 import하므로 상위 폴더를 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
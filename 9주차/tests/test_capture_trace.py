@@ -0,0 +1,147 @@
+import shutil
+import time
+
+import numpy as np
+import pytest
+
+from capture_trace import DELTA, HEADER, INDEX_DTYPE, KEY, KEYFRAME_INTERVAL, TraceReader, TraceSource, TraceWriter
+
+MONITORS = [{"left": 0, "top": 0, "width": 640, "height": 480}] * 2
+RECTS = [(0, 0, 64, 32), (100, 50, 40, 20)]
+
+
+def recorded_frames(count):
+    # 영역마다 grab 순서대로 (시각, 영역, 프레임), 중간중간 직전과 같은 프레임이 섞임
+    rng = np.random.default_rng(1)
+    screens = {rect: rng.integers(0, 256, size=(rect[3], rect[2], 4), dtype=np.uint8) for rect in RECTS}
+    grabs = []
+    for i in range(count):
+        rect = RECTS[i % 2]
+        if i % 5 != 4:
+            screens[rect] = screens[rect].copy()
+            screens[rect][i % rect[3], :, 0] += np.uint8(1 + i)
+        grabs.append((i * 0.01, rect, screens[rect]))
+    return grabs
+
+
+def record(path, grabs):
+    writer = TraceWriter(str(path), MONITORS, "synthetic")
+    for timestamp, (x, y, w, h), frame in grabs:
+        assert writer.write(timestamp, {"left": x, "top": y, "width": w, "height": h}, frame.tobytes())
+        wait_until(lambda: writer.frames.empty())
+    wait_until(lambda: len(writer.entries) == len(grabs))
+    return writer
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "쓰기 스레드가 멈춤"
+        time.sleep(0.002)
+
+
+@pytest.fixture
+def grabs():
+    return recorded_frames(2 * KEYFRAME_INTERVAL + 21)  # 영역마다 KEY가 두 번 이상, 마지막은 중복이 아닌 프레임
+
+
+def check_frames(reader, grabs, order):
+    for i in order:
+        np.testing.assert_array_equal(reader.frame(i), grabs[i][2])
+
+
+def test_round_trip(tmp_path, grabs):
+    path = tmp_path / "session.trace"
+    writer = record(path, grabs)
+    writer.note_region((0, 0, 64, 32))
+    writer.close()
+
+    reader = TraceReader(str(path))
+    assert reader.complete
+    assert len(reader) == len(grabs)
+    assert [reader.rect(i) for i in range(len(reader))] == [rect for _, rect, _ in grabs]
+    check_frames(reader, grabs, range(len(grabs)))                      # 순서대로
+    check_frames(reader, grabs, [len(grabs) - 1, 3, 70, 0, 41, 42, 5])  # 건너뛰며
+
+    info = reader.info()
+    assert info["keyframes"] == int(np.count_nonzero(reader.index["kind"] == KEY)) >= 4
+    assert info["duplicates"] == writer.duplicate_count > 0
+    assert info["keyframes"] + info["deltas"] + info["duplicates"] == len(grabs)
+    assert info["regions"] == [[0, 0, 64, 32]]
+    assert reader.meta["backend"] == "synthetic"
+
+
+def test_deltas_and_duplicates_are_small(tmp_path, grabs):
+    path = tmp_path / "session.trace"
+    record(path, grabs).close()
+    index = TraceReader(str(path)).index
+    keys = index["length"][index["kind"] == KEY]
+    deltas = index["length"][(index["kind"] == DELTA) & (index["length"] > 0)]
+    assert deltas.max() < keys.min()
+
+
+def test_unfinished_trace_is_rebuilt_by_scanning(tmp_path, grabs):
+    # close 전에 프로그램이 죽은 파일 = flush된 뒤의 파일 내용 그대로 (헤더의 인덱스 위치가 0)
+    path = tmp_path / "session.trace"
+    crashed = tmp_path / "crashed.trace"
+    writer = record(path, grabs)
+    writer.note_region((100, 50, 40, 20))
+    wait_until(lambda: not writer.pending_regions)
+    writer.write(1.0, {"left": 0, "top": 0, "width": 64, "height": 32}, grabs[-2][2].tobytes())
+    wait_until(lambda: len(writer.entries) == len(grabs) + 1)
+    writer.file.flush()
+    shutil.copy(path, crashed)
+    writer.close()
+
+    reader = TraceReader(str(crashed))
+    assert not reader.complete
+    assert len(reader) == len(grabs) + 1
+    assert reader.meta["regions"] == [[100, 50, 40, 20]]
+    check_frames(reader, grabs, range(len(grabs)))
+
+
+@pytest.mark.parametrize("cut", ["entry", "payload"])
+def test_truncated_last_record_is_dropped(tmp_path, grabs, cut):
+    path = tmp_path / "session.trace"
+    writer = record(path, grabs)
+    writer.file.flush()
+    data = path.read_bytes()
+    writer.close()
+
+    # 마지막 레코드(항목 + 압축된 프레임)의 중간에서 잘린 파일
+    _, payload_offset, payload_length = writer.entries[-1][:3]
+    assert payload_length > 0
+    end = payload_offset - INDEX_DTYPE.itemsize // 2 if cut == "entry" else payload_offset + payload_length // 2
+    truncated = tmp_path / "truncated.trace"
+    truncated.write_bytes(data[:end])
+
+    reader = TraceReader(str(truncated))
+    assert not reader.complete
+    assert len(reader) == len(grabs) - 1
+    check_frames(reader, grabs, range(len(grabs) - 1))
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"NOTATRACE" + bytes(HEADER.size))
+    with pytest.raises(ValueError):
+        TraceReader(str(path))
+
+
+def test_trace_source_replays_grabs_in_order(tmp_path, grabs):
+    path = tmp_path / "session.trace"
+    record(path, grabs).close()
+    source = TraceSource(str(path), speed=None)
+
+    x, y, w, h = RECTS[1]
+    for _, rect, frame in [g for g in grabs if g[1] == RECTS[1]][:5]:
+        shot = source.grab({"left": x, "top": y, "width": w, "height": h})
+        np.testing.assert_array_equal(np.frombuffer(shot.raw, dtype=np.uint8).reshape(h, w, 4), frame)
+
+    # 녹화된 영역 안쪽 영역은 그 영역의 프레임에서 잘라서 돌려줌
+    shot = source.grab({"left": 10, "top": 5, "width": 20, "height": 10})
+    first = grabs[0][2]
+    np.testing.assert_array_equal(np.frombuffer(shot.raw, dtype=np.uint8).reshape(10, 20, 4), first[5:15, 10:30])
+
+    with pytest.raises(OSError):
+        source.grab({"left": 600, "top": 400, "width": 10, "height": 10})
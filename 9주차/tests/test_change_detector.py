@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from change_detector import ChangeDetector
+
+
+def blank(w=200, h=100):
+    frame = np.zeros((h, w, 4), dtype=np.uint8)
+    frame[..., 3] = 255
+    return frame
+
+
+def test_first_frame_is_full_change():
+    detector = ChangeDetector()
+    assert detector.detect(blank()) == (0, 0, 200, 100)
+
+
+def test_unchanged_frame_is_skipped():
+    detector = ChangeDetector()
+    frame = blank()
+    detector.detect(frame)
+    assert detector.detect(frame.copy()) is None
+    assert detector.stats()["skipped"] == 1
+
+
+@pytest.mark.parametrize("x, y, expected", [
+    (0, 0, (0, 0, 32, 32)),
+    (1, 1, (0, 0, 32, 32)),        # 홀수 행/열 (2칸씩 건너뛰던 샘플링이 놓치던 위치)
+    (37, 5, (32, 0, 32, 32)),
+    (63, 33, (32, 32, 32, 32)),
+    (199, 99, (192, 96, 8, 4)),    # 오른쪽 아래 끝 타일은 프레임 경계에서 잘림
+])
+def test_single_pixel_change_bbox(x, y, expected):
+    detector = ChangeDetector(tile_size=32)
+    frame = blank()
+    detector.detect(frame)
+    frame[y, x, 0] = 1  # 파란색 채널 1만 바뀐 픽셀
+    assert detector.detect(frame) == expected
+
+
+def test_bbox_spans_all_changed_pixels():
+    detector = ChangeDetector(tile_size=16)
+    frame = blank()
+    detector.detect(frame)
+    frame[3, 150, 2] = 7
+    frame[70, 20, 1] = 7
+    assert detector.detect(frame) == (16, 0, 144, 80)
+
+
+def test_change_is_reported_once():
+    # 바뀐 행은 이전 프레임으로 복사되므로 같은 프레임이 다시 오면 변화 없음
+    detector = ChangeDetector()
+    frame = blank()
+    detector.detect(frame)
+    frame[50, 100, 1] = 200
+    assert detector.detect(frame) is not None
+    assert detector.detect(frame) is None
+
+
+def test_size_change_resets_to_full_frame():
+    detector = ChangeDetector()
+    detector.detect(blank())
+    assert detector.detect(blank(120, 60)) == (0, 0, 120, 60)
+
+
+def test_reset_forces_full_frame():
+    detector = ChangeDetector()
+    frame = blank()
+    detector.detect(frame)
+    detector.reset()
+    assert detector.detect(frame) == (0, 0, 200, 100)
+
+
+def test_strided_view_is_supported():
+    # 속도 우선 축소(bgra[::n, ::n])처럼 연속되지 않은 뷰도 비교 가능
+    detector = ChangeDetector(tile_size=8)
+    frame = blank(400, 200)
+    detector.detect(frame[::2, ::2])
+    frame[20, 40, 0] = 9
+    assert detector.detect(frame[::2, ::2]) == (16, 8, 8, 8)
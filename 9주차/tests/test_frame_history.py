@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+import pytest
+
+from frame_history import FrameHistory
+
+
+def wait_stored(history, count, timeout=5.0):
+    # 압축 스레드가 count개를 기록할 때까지 기다림
+    deadline = time.monotonic() + timeout
+    while history.stored_count < count:
+        assert time.monotonic() < deadline, "기록 스레드가 멈춤"
+        time.sleep(0.005)
+
+
+def frames(count, h=60, w=80):
+    # 가사 화면처럼 매번 일부 띠만 바뀌는 프레임들
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(h, w, 4), dtype=np.uint8)
+    result = []
+    for i in range(count):
+        frame = frame.copy()
+        frame[(i * 7) % h, :, :3] += np.uint8(1 + i)
+        result.append(frame)
+    return result
+
+
+@pytest.fixture
+def history():
+    history = FrameHistory(max_seconds=60, max_bytes=64 * 1024 * 1024)
+    yield history
+    history.stop()
+
+
+def submit_all(history, items):
+    for frame in items:
+        assert history.submit(frame)
+        wait_stored(history, history.stored_count + 1)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip_every_frame(compress):
+    history = FrameHistory(max_seconds=60, compress=compress)
+    try:
+        items = frames(25)  # KEYFRAME_INTERVAL(10)을 두 번 넘김
+        submit_all(history, items)
+        first, last = history.seq_range()
+        assert (first, last) == (0, 24)
+        for seq in range(first, last + 1):  # 앞으로 한 칸씩 (차이만 이어서 적용)
+            np.testing.assert_array_equal(history.frame(seq)[1], items[seq])
+        for seq in (24, 3, 17, 9, 10, 0):   # 뒤로/건너뛰며
+            np.testing.assert_array_equal(history.frame(seq)[1], items[seq])
+    finally:
+        history.stop()
+
+
+def test_deltas_are_smaller_than_keyframes(history):
+    submit_all(history, frames(10))
+    keys = [e.nbytes for e in history.entries if e.key]
+    deltas = [e.nbytes for e in history.entries if not e.key]
+    assert len(keys) == 1 and len(deltas) == 9
+    assert max(deltas) < keys[0]
+
+
+def test_byte_budget_evicts_whole_key_groups():
+    items = frames(40)
+    probe = FrameHistory(max_seconds=60)
+    submit_all(probe, items[:10])
+    group_bytes = probe.total_bytes
+    probe.stop()
+
+    history = FrameHistory(max_seconds=60, max_bytes=int(group_bytes * 1.5))
+    try:
+        submit_all(history, items)
+        assert history.total_bytes <= history.max_bytes
+        first, last = history.seq_range()
+        assert last == 39
+        assert first % FrameHistory.KEYFRAME_INTERVAL == 0  # 항상 key부터 남음
+        assert history.frame(first - 1) is None
+        np.testing.assert_array_equal(history.frame(first)[1], items[first])
+    finally:
+        history.stop()
+
+
+def test_time_budget_evicts_old_frames():
+    history = FrameHistory(max_seconds=0.2)
+    try:
+        submit_all(history, frames(3))
+        time.sleep(0.6)  # 새 프레임이 없어도 기록 스레드가 주기적으로 정리
+        assert history.seq_range() is None
+    finally:
+        history.stop()
+
+
+def test_stats_report_working_buffers_outside_budget(history):
+    submit_all(history, frames(3))
+    stats = history.stats()
+    assert stats["frames"] == 3
+    assert stats["bytes"] == history.total_bytes
+    assert stats["working_bytes"] >= 2 * 60 * 80 * 4  # 직전 프레임 + XOR 버퍼 + 대기열 버퍼
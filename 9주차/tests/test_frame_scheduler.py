@@ -0,0 +1,41 @@
+import pytest
+
+from frame_scheduler import AdaptiveScheduler
+
+
+@pytest.mark.parametrize("min_fps, max_fps, expected", [
+    (3, 60, (3, 60)),
+    (0, 60, (1, 60)),       # 0 fps는 1로 올림
+    (-5, -1, (1, 1)),
+    (30, 10, (10, 10)),     # min > max면 min을 max로 낮춤
+    (60, 60, (60, 60)),
+])
+def test_constructor_clamps_like_set_fps_range(min_fps, max_fps, expected):
+    scheduler = AdaptiveScheduler(min_fps, max_fps)
+    assert (scheduler.min_fps, scheduler.max_fps) == expected
+
+    other = AdaptiveScheduler()
+    other.set_fps_range(min_fps, max_fps)
+    assert (other.min_fps, other.max_fps) == expected
+    assert scheduler.interval == other.interval
+
+
+def test_interval_stays_in_range():
+    scheduler = AdaptiveScheduler(5, 50)
+    assert 1 / 50 <= scheduler.interval <= 1 / 5
+    scheduler.set_fps_range(20, 25)
+    assert 1 / 25 <= scheduler.interval <= 1 / 20
+
+
+def test_change_goes_to_max_fps_and_idle_backs_off_to_min():
+    scheduler = AdaptiveScheduler(4, 40)
+    assert scheduler.record(True, 0.0) == pytest.approx(1 / 40)
+    for _ in range(50):
+        interval = scheduler.record(False, 0.0)
+    assert interval == pytest.approx(1 / 4)
+
+
+def test_interval_never_shorter_than_capture_cost():
+    scheduler = AdaptiveScheduler(1, 60)
+    interval = scheduler.record(True, 0.1)
+    assert interval == pytest.approx(0.1 * AdaptiveScheduler.COST_HEADROOM)
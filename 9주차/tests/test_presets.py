@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from presets import PresetStore, covered_by_monitors, read_region, read_session, validate_area
+
+
+def monitors(*screens):
+    # mss와 같은 형식 (0번은 모든 모니터를 덮는 가상 화면)
+    mons = [{"left": x, "top": y, "width": w, "height": h} for x, y, w, h in screens]
+    left = min(m["left"] for m in mons)
+    top = min(m["top"] for m in mons)
+    right = max(m["left"] + m["width"] for m in mons)
+    bottom = max(m["top"] + m["height"] for m in mons)
+    return [{"left": left, "top": top, "width": right - left, "height": bottom - top}] + mons
+
+
+DUAL = monitors((0, 0, 1920, 1080), (1920, 0, 2560, 1440))
+
+
+def saved(area, index=2, left=1920, top=0, width=2560, height=1440):
+    return read_region({
+        "area": list(area),
+        "monitor": {"index": index, "left": left, "top": top, "width": width, "height": height},
+    })
+
+
+def test_area_on_same_monitor_is_kept():
+    assert validate_area(saved((2000, 100, 800, 80)), DUAL) == (2000, 100, 800, 80)
+
+
+def test_area_follows_moved_monitor():
+    # 2번 모니터가 1번 왼쪽으로 옮겨진 경우
+    moved = monitors((0, 0, 1920, 1080), (-2560, 0, 2560, 1440))
+    assert validate_area(saved((2000, 100, 800, 80)), moved) == (-2480, 100, 800, 80)
+
+
+def test_area_follows_same_size_monitor_with_other_index():
+    swapped = monitors((0, 0, 2560, 1440), (2560, 0, 1920, 1080))
+    assert validate_area(saved((2000, 100, 800, 80)), swapped) == (80, 100, 800, 80)
+
+
+def test_area_on_missing_monitor_is_rejected():
+    single = monitors((0, 0, 1920, 1080))
+    assert validate_area(saved((2000, 100, 800, 80)), single) is None
+
+
+def test_area_without_monitor_info_is_checked_as_is():
+    single = monitors((0, 0, 1920, 1080))
+    assert validate_area(read_region({"area": [10, 10, 100, 100]}), single) == (10, 10, 100, 100)
+    assert validate_area(read_region({"area": [1900, 10, 100, 100]}), single) is None
+
+
+def test_area_spanning_monitors_is_accepted():
+    assert validate_area(read_region({"area": [1800, 100, 400, 80]}), DUAL) == (1800, 100, 400, 80)
+
+
+def test_covered_by_monitors():
+    assert covered_by_monitors((1800, 100, 400, 80), DUAL)
+    assert not covered_by_monitors((1800, 1000, 400, 200), DUAL)  # 1번 모니터 아래 빈 공간
+    assert not covered_by_monitors((0, 0, 0, 10), DUAL)
+    # 가상 화면(monitors[0])만 있는 목록은 그것을 모니터 하나로 봄
+    assert covered_by_monitors((0, 0, 100, 100), DUAL[:1])
+
+
+@pytest.mark.parametrize("region", [
+    None, 5, "x", [], {},
+    {"area": "0,0,10,10"},
+    {"area": [0, 0, 10]},
+    {"area": [0, 0, 10, "10"]},
+    {"area": [0, 0, 10.5, 10]},
+    {"area": [0, 0, 10, True]},
+])
+def test_malformed_region_is_rejected(region):
+    assert read_region(region) is None
+
+
+def test_optional_fields_fall_back_to_defaults():
+    region = read_region({
+        "area": [0, 0, 10, 10],
+        "monitor": {"index": "1"},
+        "geometry": [1, 2, 3],
+        "opacity": "half",
+    })
+    assert region == {"area": (0, 0, 10, 10), "monitor": None, "geometry": None, "opacity": 1.0}
+
+
+def test_read_session_counts_malformed_entries():
+    entries, invalid = read_session({"regions": [{"area": [0, 0, 10, 10], "opacity": 0.5}, {"area": 1}, 7]})
+    assert invalid == 2
+    assert entries == [{"area": (0, 0, 10, 10), "monitor": None, "geometry": None, "opacity": 0.5}]
+
+
+@pytest.mark.parametrize("session", [None, [1, 2], "x", {}, {"regions": None}, {"regions": {"a": 1}}])
+def test_read_session_without_region_list(session):
+    assert read_session(session) == ([], 0)
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", "\"text\"", "null", "{broken",
+                                     '{"presets": [1], "last_session": "x"}'])
+def test_store_ignores_unusable_files(tmp_path, content):
+    path = tmp_path / "presets.json"
+    path.write_text(content, encoding="utf-8")
+    store = PresetStore(str(path))
+    assert store.presets == {}
+    assert store.last_session is None
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "presets.json")
+    session = {"regions": [{"area": [0, 0, 10, 10]}], "min_fps": 3, "max_fps": 60}
+    store = PresetStore(path)
+    store.put("가사", session)
+    store.set_last_session(session)
+
+    loaded = PresetStore(path)
+    assert loaded.names() == ["가사"]
+    assert loaded.get("가사") == session
+    assert loaded.last_session == session
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["presets"]["가사"] == session
@@ -0,0 +1,113 @@
+import gc
+
+import numpy as np
+import pytest
+
+from shm_ring import SharedFrameRing
+
+
+@pytest.fixture
+def rings():
+    # GUI 쪽(create)과 캡처 프로세스 쪽(attach) 링을 한 프로세스에서 같은 공유 메모리로 엶
+    reader = SharedFrameRing.create(64, 32, slots=3)
+    writer = SharedFrameRing.attach(reader.name, 64, 32, slots=3)
+    yield reader, writer
+    gc.collect()  # 슬롯을 감싼 배열이 남아 있으면 공유 메모리를 닫을 수 없음
+    writer.close()
+    SharedFrameRing.retained.discard(reader)
+    if reader.header is not None:
+        reader.header = None
+        reader.shm.close()
+        reader.shm.unlink()
+
+
+def states(ring):
+    return [ring.get(slot, "state") for slot in range(ring.slots)]
+
+
+def write(writer, value, rect=(0, 0, 64, 32)):
+    slot = writer.acquire_slot()
+    assert slot is not None
+    writer.frame_view(slot, 64, 32)[:] = value
+    return slot, writer.publish(slot, 64, 32, rect, 0.001, 0.0002, 0.003)
+
+
+def test_slot_state_cycle(rings):
+    reader, writer = rings
+    F, W, R, G = SharedFrameRing.FREE, SharedFrameRing.WRITING, SharedFrameRing.READY, SharedFrameRing.READING
+    assert states(reader) == [F, F, F]
+
+    slot = writer.acquire_slot()
+    assert states(reader)[slot] == W
+    assert reader.take() is None  # 쓰는 중인 슬롯은 가져가지 않음
+
+    assert writer.publish(slot, 64, 32, (0, 0, 64, 32), 0.001, 0.0002, 0.003) is True
+    assert states(reader)[slot] == R
+
+    frame, rect, grab, numpy_time, convert, latency = reader.take()
+    assert states(reader)[slot] == G
+    assert rect == (0, 0, 64, 32)
+    assert (grab, numpy_time, convert) == pytest.approx((0.001, 0.0002, 0.003))
+    assert latency >= 0
+
+    reader.release(frame)
+    assert states(reader)[slot] == F
+
+
+def test_publish_notifies_only_when_no_frame_is_waiting(rings):
+    reader, writer = rings
+    assert write(writer, 1)[1] is True
+    assert write(writer, 2)[1] is False  # 이미 READY 슬롯이 있으면 다시 알리지 않음
+
+
+def test_take_returns_newest_and_frees_older_ready_slots(rings):
+    reader, writer = rings
+    write(writer, 1, rect=(0, 0, 8, 8))
+    newest, _ = write(writer, 2, rect=(32, 16, 8, 8))
+
+    frame, rect, *_ = reader.take()
+    assert int(frame[0, 0, 0]) == 2
+    assert rect == (0, 0, 40, 24)  # 버린 프레임의 바뀐 영역도 합쳐서 다시 그림
+    assert states(reader).count(SharedFrameRing.READING) == 1
+    assert states(reader)[newest] == SharedFrameRing.READING
+    assert states(reader).count(SharedFrameRing.READY) == 0
+    reader.release(frame)
+
+
+def test_acquire_fails_when_every_slot_is_busy(rings):
+    reader, writer = rings
+    write(writer, 1)
+    frame, *_ = reader.take()
+    write(writer, 2)
+    assert writer.acquire_slot() is not None
+    assert writer.acquire_slot() is None  # READING, READY, WRITING
+    reader.release(frame)
+    assert writer.acquire_slot() is not None
+
+
+def test_release_ignores_foreign_arrays(rings):
+    reader, writer = rings
+    write(writer, 1)
+    frame, *_ = reader.take()
+    reader.release(np.zeros((32, 64, 4), dtype=np.uint8))
+    assert reader.in_use()
+    reader.release(frame)
+    assert not reader.in_use()
+
+
+def test_counters_are_shared(rings):
+    reader, writer = rings
+    writer.count("captured", 3)
+    writer.count("skipped")
+    assert reader.counters() == {"captured": 3, "skipped": 1, "dropped": 0}
+
+
+def test_close_while_reading_keeps_mapping_until_release(rings):
+    reader, writer = rings
+    write(writer, 1)
+    frame, *_ = reader.take()
+    reader.close(unlink=True)
+    assert reader in SharedFrameRing.retained
+    assert int(frame[0, 0, 0]) == 1  # 표시 중인 슬롯은 계속 읽을 수 있음
+    reader.release(frame)
+    assert reader not in SharedFrameRing.retained
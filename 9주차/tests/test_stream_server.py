@@ -0,0 +1,145 @@
+import socket
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from stream_server import FrameStreamServer
+
+
+@pytest.fixture
+def server():
+    server = FrameStreamServer("127.0.0.1", port=0)  # 빈 포트를 골라서 엶
+    yield server
+    server.stop()
+
+
+def frame(value, w=64, h=48):
+    bgra = np.full((h, w, 4), value, dtype=np.uint8)
+    bgra[..., 3] = 255
+    return bgra
+
+
+def connect(port, path):
+    # path는 bytes (요청 줄에 ASCII가 아닌 바이트를 그대로 넣어 보기 위해)
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    sock.sendall(b"GET " + path + b" HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    return sock
+
+
+def request(port, path):
+    # 서버가 연결을 닫을 때까지 읽은 응답 (상태 줄, 본문)
+    with connect(port, path) as sock:
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    head, _, body = data.partition(b"\r\n\r\n")
+    return head.split(b"\r\n", 1)[0], body
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "시간 초과"
+        time.sleep(0.01)
+
+
+def read_parts(sock, count):
+    # MJPEG 스트림에서 JPEG count장을 읽어서 반환
+    data = b""
+    parts = []
+    while len(parts) < count:
+        chunk = sock.recv(65536)
+        assert chunk, "스트림이 끊김"
+        data += chunk
+        while True:
+            start = data.find(b"Content-Length: ")
+            if start < 0:
+                break
+            end = data.find(b"\r\n\r\n", start)
+            if end < 0:
+                break
+            length = int(data[start + 16:data.index(b"\r\n", start)])
+            if len(data) < end + 4 + length:
+                break
+            parts.append(data[end + 4:end + 4 + length])
+            data = data[end + 4 + length:]
+    return parts
+
+
+def test_index_lists_regions(server):
+    server.submit(3, frame(0))
+    server.submit(1, frame(0))
+    status, body = request(server.port, b"/")
+    assert status == b"HTTP/1.1 200 OK"
+    assert body.index(b'src="/region/1"') < body.index(b'src="/region/3"')
+
+
+def test_snapshot_is_a_decodable_jpeg(server):
+    server.submit(1, frame(200))
+    status, body = request(server.port, b"/region/1.jpg")
+    assert status == b"HTTP/1.1 200 OK"
+    image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape == (48, 64, 3)
+    assert abs(int(image.mean()) - 200) <= 2
+
+
+@pytest.mark.parametrize("path", [
+    b"/region/9",            # 없는 영역
+    b"/region/x",
+    b"/region/-1",
+    b"/region/\xb2",         # latin-1 '²' (isdigit()는 True지만 int()는 실패)
+    b"/region/\xb9\xb2.jpg",
+    "/region/١".encode(),    # 아랍 숫자 1 (UTF-8)
+    b"/nothing",
+])
+def test_unknown_or_non_ascii_region_is_404(server, path):
+    server.submit(1, frame(0))
+    status, _ = request(server.port, path)
+    assert status == b"HTTP/1.1 404 Not Found"
+    # 잘못된 요청 뒤에도 서버는 계속 응답함
+    assert request(server.port, b"/region/1.jpg")[0] == b"HTTP/1.1 200 OK"
+
+
+def test_stream_sends_new_frames_and_encodes_once_for_all_clients(server):
+    server.submit(1, frame(0))
+    socks = [connect(server.port, b"/region/1") for _ in range(3)]
+    try:
+        wait_until(lambda: len(server.clients()) == 3)
+        for sock in socks:
+            assert len(read_parts(sock, 1)) == 1  # 연결하면 현재 프레임부터 받음
+
+        encoded = server.stats()["encoded"]
+        server.submit(1, frame(120))
+        for sock in socks:
+            jpeg = read_parts(sock, 1)[0]
+            image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            assert abs(int(image.mean()) - 120) <= 2
+        # 보는 사람이 셋이어도 프레임 하나는 한 번만 인코딩
+        assert server.stats()["encoded"] == encoded + 1
+    finally:
+        for sock in socks:
+            sock.close()
+
+
+def test_region_without_viewers_is_not_encoded(server):
+    for value in range(5):
+        server.submit(1, frame(value))
+    time.sleep(0.3)
+    assert server.stats()["encoded"] == 0
+    assert server.stats()["replaced"] == 4  # 대기 중인 프레임은 최신 것 하나만 남음
+
+
+def test_removing_region_ends_its_streams(server):
+    server.submit(1, frame(0))
+    with connect(server.port, b"/region/1") as sock:
+        read_parts(sock, 1)
+        server.remove_region(1)
+        sock.settimeout(5)
+        while sock.recv(65536):
+            pass  # 서버가 연결을 닫으면 빈 bytes
+    wait_until(lambda: server.clients() == [])
@@ -0,0 +1,124 @@
+import collections
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+import xshm_grabber
+from xshm_grabber import XShmGrabber, take_x_errors
+
+# 실제 X 서버가 필요한 테스트는 $DISPLAY가 있을 때만 실행
+# 화면 없는 Linux: xvfb-run -s "-screen 0 1920x1080x24" python -m pytest -q tests/test_xshm_grabber.py
+needs_display = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not os.environ.get("DISPLAY"), reason="X 디스플레이($DISPLAY) 없음"
+)
+
+
+@pytest.fixture
+def grabber():
+    try:
+        grabber = XShmGrabber()
+    except OSError as e:
+        pytest.skip(f"XShm 사용 불가: {e}")
+    yield grabber
+    grabber.close()
+
+
+def as_bgra(shot):
+    return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+
+def raw_address(raw):
+    return np.frombuffer(raw, dtype=np.uint8).__array_interface__["data"][0]
+
+
+@needs_display
+def test_grab_matches_mss(grabber):
+    from mss import mss
+
+    monitor = {"left": 10, "top": 20, "width": 64, "height": 48}
+    ours = as_bgra(grabber.grab(monitor)).copy()
+    with mss() as sct:
+        theirs = np.frombuffer(sct.grab(monitor).raw, dtype=np.uint8).reshape(48, 64, 4)
+    np.testing.assert_array_equal(ours[..., :3], theirs[..., :3])
+
+
+@needs_display
+def test_same_size_reuses_one_shm_image(grabber):
+    first = grabber.grab({"left": 0, "top": 0, "width": 32, "height": 16})
+    second = grabber.grab({"left": 5, "top": 5, "width": 32, "height": 16})
+    assert raw_address(first.raw) == raw_address(second.raw)
+    assert (32, 16) in grabber.images
+
+
+@needs_display
+def test_sizes_in_use_are_kept_regardless_of_count(grabber):
+    sizes = [(8 + i, 8) for i in range(12)]
+    for _ in range(3):
+        for w, h in sizes:
+            grabber.grab({"left": 0, "top": 0, "width": w, "height": h})
+    assert all(size in grabber.images for size in sizes)
+
+
+@needs_display
+def test_out_of_screen_area_raises(grabber):
+    w, h = grabber.root_size
+    with pytest.raises(OSError):
+        grabber.grab({"left": w - 10, "top": 0, "width": 20, "height": 10})
+
+
+def test_x_errors_are_kept_per_display():
+    # 오류 처리기는 프로세스 전체에 하나라 디스플레이별로 나눠서 꺼내야 함 (X 서버 없이 확인)
+    with xshm_grabber.x_errors_lock:
+        xshm_grabber.x_errors.extend([(1, 10), (2, 20), (1, 11)])
+    assert take_x_errors(1) == [10, 11]
+    assert take_x_errors(1) == []
+    assert take_x_errors(2) == [20]
+
+
+class FakeShmImage:
+    # X 서버 없이 XShmGrabber의 이미지 정리 규칙만 확인하기 위한 가짜 ShmImage
+    released = []
+
+    def __init__(self, grabber, width, height):
+        self.size = (width, height)
+        self.image = None
+        self.raw = bytearray(width * height * 4)
+        self.last_used = 0.0
+
+    def release(self, detach=True):
+        self.released.append(self.size)
+
+
+class FakeXext:
+    def XShmGetImage(self, *args):
+        return 1
+
+
+def test_idle_images_are_released(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(xshm_grabber, "ShmImage", FakeShmImage)
+    monkeypatch.setattr(xshm_grabber.time, "monotonic", lambda: clock[0])
+    FakeShmImage.released = []
+
+    grabber = XShmGrabber.__new__(XShmGrabber)
+    grabber.display = None
+    grabber.root = None
+    grabber.xext = FakeXext()
+    grabber.root_size = (1920, 1080)
+    grabber.images = collections.OrderedDict()
+    grabber.lock = threading.Lock()
+
+    grab = lambda w, h: grabber.grab({"left": 0, "top": 0, "width": w, "height": h})
+    grab(100, 50)
+    grab(200, 50)
+    clock[0] += XShmGrabber.IDLE_SECONDS - 1
+    grab(200, 50)
+    assert FakeShmImage.released == []  # 아직 IDLE_SECONDS가 지나지 않음
+
+    clock[0] += 2
+    grab(200, 50)
+    assert FakeShmImage.released == [(100, 50)]
+    assert list(grabber.images) == [(200, 50)]
@@ -0,0 +1,223 @@
+import collections
+import threading
+import time
+
+import numpy as np
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from capture_engine import CaptureEngine
+from frame_pool import LatestFrame
+
+try:
+    import pytesseract
+except ImportError:  # OCR은 선택 기능 (pytesseract와 tesseract가 설치된 경우에만 사용)
+    pytesseract = None
+
+
+def perceptual_hash(bgra, hash_size=16):
+    # 영역의 difference hash (가로로 이웃한 밝기 비교, hash_size * hash_size 비트 정수)
+    # 작은 흑백 이미지로 줄여서 만들기 때문에 압축 노이즈나 미세한 색 변화에는 거의 바뀌지 않음
+    gray = cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class OcrCache:
+    # perceptual hash를 키로 OCR 결과를 보관하는 LRU 캐시
+    # 후렴처럼 같은 가사 줄이 다시 나오면 OCR 없이 이전 결과를 재사용함
+    # 정확히 같은 해시가 없으면 max_distance 비트 이내로 가까운 해시도 같은 화면으로 봄
+    def __init__(self, max_size=256, max_distance=4):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.entries = collections.OrderedDict()
+
+        # 통계
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get(self, key):
+        text = self.entries.get(key)
+        if text is None:
+            key = next((k for k in self.entries if hamming(k, key) <= self.max_distance), None)
+            text = self.entries.get(key) if key is not None else None
+        if text is None:
+            self.miss_count += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hit_count += 1
+        return text
+
+    def put(self, key, text):
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class OcrSlot(LatestFrame):
+    # 영역 하나의 OCR 대기 상태 (pending: 아직 OCR하지 않은 최신 프레임 복사본, area: 원본 캡처 영역)
+    def __init__(self):
+        super().__init__()
+        self.area = None
+        self.last_hash = None
+        self.text = ""
+
+
+class TextExtractor(QThread):
+    # 캡처한 가사 영역에서 텍스트를 추출하는 백그라운드 OCR 스레드
+    # - GUI 스레드는 바뀐 프레임을 영역별 버퍼에 복사만 하고 바로 돌아감 (영역당 최신 프레임 하나만 대기)
+    # - OCR은 min_interval초에 한 번까지만 실행해서 CPU 사용량을 묶어 둠
+    # - 직전 프레임과 해시가 가까우면 건너뛰고, 전에 본 화면이면 캐시된 결과를 사용
+    # - 받은 프레임은 PIP 창 크기로 줄어 있을 수 있어서, source_factory로 이 스레드에서 만든 캡처 백엔드로
+    #   영역을 원본 해상도로 다시 grab하고 해시와 OCR 모두 그 프레임으로 수행 (없으면 받은 프레임 사용)
+    # - 추출한 텍스트가 바뀔 때만 text_ready로 알리고 검색용 기록에 추가
+    text_ready = pyqtSignal(int, str)
+    extract_error = pyqtSignal(str)
+
+    def __init__(self, lang="kor+eng", min_interval=0.5, cache_size=256, history_size=500, source_factory=None,
+                 parent=None):
+        super().__init__(parent)
+        self.lang = lang
+        self.source_factory = source_factory
+        self.min_interval = min_interval
+        self.cache = OcrCache(cache_size)
+        self.history = collections.deque(maxlen=history_size)  # (시각, 영역 번호, 텍스트)
+
+        self.slots = {}
+        self.condition = threading.Condition()
+        self.running = True
+
+        # 통계
+        self.submitted_count = 0
+        self.dropped_count = 0
+        self.unchanged_count = 0
+        self.ocr_count = 0
+        self.ocr_time = 0.0
+
+    def submit(self, region_id, frame, area=None):
+        # GUI 스레드에서 호출. 대기 중인 프레임이 있으면 그 버퍼에 덮어씀
+        # area: 영역의 원본 캡처 좌표 (OCR할 때 원본 해상도로 다시 grab하는 데 사용)
+        with self.condition:
+            slot = self.slots.get(region_id)
+            if slot is None:
+                slot = self.slots[region_id] = OcrSlot()
+            slot.area = area
+            if slot.put(frame):
+                self.dropped_count += 1
+            self.submitted_count += 1
+            self.condition.notify()
+
+    def remove_region(self, region_id):
+        with self.condition:
+            self.slots.pop(region_id, None)
+
+    def next_job(self):
+        # 대기 중인 프레임 하나를 꺼냄 (없으면 잠시 기다린 뒤 None)
+        with self.condition:
+            for region_id, slot in self.slots.items():
+                if slot.pending is not None:
+                    buf = slot.take()
+                    # 꺼낸 영역은 뒤로 보내서 여러 영역이 번갈아 처리되도록 함
+                    self.slots[region_id] = self.slots.pop(region_id)
+                    return region_id, slot, buf
+            self.condition.wait(0.2)
+        return None
+
+    def run(self):
+        last_start = 0.0
+        engine = None
+        try:
+            # 캡처 백엔드(mss 등)는 사용하는 스레드 안에서 만들어야 함
+            if self.source_factory is not None:
+                engine = CaptureEngine(self.source_factory())
+            while self.running:
+                job = self.next_job()
+                if job is None:
+                    continue
+                region_id, slot, buf = job
+
+                # 캐시에 넣는 텍스트가 해시를 만든 화면의 것이 되도록 해시와 OCR에 같은 프레임을 씀
+                frame = self.full_frame(engine, slot.area, buf)
+                key = perceptual_hash(frame)
+                text = None
+                if slot.last_hash is not None and hamming(key, slot.last_hash) <= self.cache.max_distance:
+                    # 가사 줄이 그대로이고 배경만 조금 바뀐 경우
+                    self.unchanged_count += 1
+                else:
+                    text = self.cache.get(key)
+                    if text is None:
+                        # OCR 간격 제한. 기다리는 동안 더 새 프레임이 들어왔으면 이 프레임은 버림
+                        delay = last_start + self.min_interval - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                        if slot.pending is None:
+                            last_start = time.perf_counter()
+                            text = self.recognize(frame)
+                            self.ocr_time += time.perf_counter() - last_start
+                            self.ocr_count += 1
+                            self.cache.put(key, text)
+                    if text is not None:
+                        slot.last_hash = key
+
+                with self.condition:
+                    slot.release(buf)
+                if text is not None and text != slot.text:
+                    slot.text = text
+                    if text:
+                        self.history.append((time.time(), region_id, text))
+                    self.text_ready.emit(region_id, text)
+        except Exception as e:
+            self.extract_error.emit(str(e))
+        finally:
+            if engine is not None:
+                engine.close()
+
+    def full_frame(self, engine, area, frame):
+        # 영역을 원본 해상도로 grab한 프레임 (백엔드가 없거나 grab에 실패하면 받은 프레임)
+        if engine is None or area is None:
+            return frame
+        try:
+            return engine.snapshot(area)
+        except OSError:
+            return frame
+
+    def recognize(self, bgra):
+        # 흑백 변환 후 작은 글자는 키워서 이진화한 이미지로 OCR
+        gray = cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY)
+        if gray.shape[0] < 60:
+            scale = 60 / gray.shape[0]
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        text = pytesseract.image_to_string(binary, lang=self.lang, config="--psm 6")
+        return " ".join(line.strip() for line in text.splitlines() if line.strip())
+
+    def search(self, query):
+        # 추출 기록에서 query를 포함하는 항목을 최신순으로 반환
+        query = query.strip().lower()
+        if not query:
+            return []
+        return [entry for entry in reversed(self.history) if query in entry[2].lower()]
+
+    def stop(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify()
+        self.wait()
+
+    def stats(self):
+        return {
+            "submitted": self.submitted_count,
+            "dropped": self.dropped_count,
+            "unchanged": self.unchanged_count,
+            "ocr_runs": self.ocr_count,
+            "avg_ocr_ms": self.ocr_time / self.ocr_count * 1000 if self.ocr_count else 0.0,
+            "cache_hits": self.cache.hit_count,
+            "cache_misses": self.cache.miss_count,
+            "history": len(self.history),
+        }
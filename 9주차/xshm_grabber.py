@@ -0,0 +1,269 @@
+import collections
+import ctypes
+import ctypes.util
+import threading
+import time
+
+from frame_source import FrameShot, Grabber
+
+# Linux/X11 MIT-SHM(XShmGetImage) 캡처 백엔드 (ctypes로 libX11, libXext 직접 호출)
+# 영역 크기마다 공유 메모리 XImage를 한 번 만들어 두고, X 서버가 grab마다 같은 버퍼에 바로 써 줌
+# (mss처럼 grab마다 새 bytes를 만들지 않으므로 프레임당 할당과 복사가 없음)
+# 화면 없는 환경에서는 Xvfb로 확인 가능: xvfb-run -s "-screen 0 1920x1080x24" python bench_grabbers.py
+
+ZPIXMAP = 2
+ALL_PLANES = ctypes.c_ulong(-1).value
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XImageFuncs(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_void_p) for name in
+                ("create_image", "destroy_image", "get_pixel", "put_pixel", "sub_image", "add_pixel")]
+
+
+class XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+        ("obdata", ctypes.c_void_p),
+        ("f", XImageFuncs),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong),
+        ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+
+def load_library(name):
+    path = ctypes.util.find_library(name)
+    if path is None:
+        raise OSError(f"lib{name}를 찾을 수 없습니다")
+    return ctypes.CDLL(path, use_errno=True)
+
+
+def setup_prototypes(x11, xext, libc):
+    display_p, image_p, info_p = ctypes.c_void_p, ctypes.POINTER(XImage), ctypes.POINTER(XShmSegmentInfo)
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = display_p
+    x11.XCloseDisplay.argtypes = [display_p]
+    x11.XDefaultScreen.argtypes = [display_p]
+    x11.XDefaultRootWindow.argtypes = [display_p]
+    x11.XDefaultRootWindow.restype = ctypes.c_ulong
+    x11.XDefaultVisual.argtypes = [display_p, ctypes.c_int]
+    x11.XDefaultVisual.restype = ctypes.c_void_p
+    x11.XDefaultDepth.argtypes = [display_p, ctypes.c_int]
+    x11.XDisplayWidth.argtypes = [display_p, ctypes.c_int]
+    x11.XDisplayHeight.argtypes = [display_p, ctypes.c_int]
+    x11.XSync.argtypes = [display_p, ctypes.c_int]
+    x11.XDestroyImage.argtypes = [image_p]
+    x11.XSetErrorHandler.argtypes = [ERROR_HANDLER]
+    x11.XSetErrorHandler.restype = ctypes.c_void_p
+
+    xext.XShmQueryExtension.argtypes = [display_p]
+    xext.XShmCreateImage.argtypes = [
+        display_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p, info_p, ctypes.c_uint, ctypes.c_uint,
+    ]
+    xext.XShmCreateImage.restype = image_p
+    xext.XShmAttach.argtypes = [display_p, info_p]
+    xext.XShmDetach.argtypes = [display_p, info_p]
+    xext.XShmGetImage.argtypes = [display_p, ctypes.c_ulong, image_p, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+
+    libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmdt.argtypes = [ctypes.c_void_p]
+    libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+
+# X 오류가 나면 기본 처리기처럼 프로세스를 끝내지 않고 (디스플레이, 오류 코드)로 기록만 해 둠
+# 처리기와 목록은 프로세스 전체에 하나라서, 각 XShmGrabber는 자기 디스플레이의 오류만 꺼내서 예외로 바꿈
+x_errors = []
+x_errors_lock = threading.Lock()
+
+
+@ERROR_HANDLER
+def on_x_error(display, event):
+    with x_errors_lock:
+        x_errors.append((event.contents.display, event.contents.error_code))
+    return 0
+
+
+def take_x_errors(display):
+    # display에서 난 오류 코드만 꺼냄 (다른 디스플레이의 오류는 그대로 남김)
+    with x_errors_lock:
+        errors = [code for source, code in x_errors if source == display]
+        x_errors[:] = [(source, code) for source, code in x_errors if source != display]
+    return errors
+
+
+class ShmImage:
+    # 영역 크기 하나에 대한 공유 메모리 XImage
+    # raw는 공유 메모리 위의 ctypes 배열이라 np.frombuffer로 복사 없이 감쌀 수 있음
+    def __init__(self, grabber, width, height):
+        self.grabber = grabber
+        self.info = XShmSegmentInfo()
+        self.image = grabber.xext.XShmCreateImage(
+            grabber.display, grabber.visual, grabber.depth, ZPIXMAP, None, ctypes.byref(self.info), width, height
+        )
+        if not self.image:
+            raise OSError("XShmCreateImage 실패")
+        image = self.image.contents
+        if image.bits_per_pixel != 32 or image.bytes_per_line != width * 4:
+            grabber.x11.XDestroyImage(self.image)
+            raise OSError(f"32비트 BGRA 화면이 아닙니다 (bits_per_pixel={image.bits_per_pixel})")
+
+        size = image.bytes_per_line * height
+        libc = grabber.libc
+        self.info.shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if self.info.shmid < 0:
+            grabber.x11.XDestroyImage(self.image)
+            raise OSError(ctypes.get_errno(), "shmget 실패")
+        address = libc.shmat(self.info.shmid, None, 0)
+        if address is None or address == ctypes.c_void_p(-1).value:
+            libc.shmctl(self.info.shmid, IPC_RMID, None)
+            grabber.x11.XDestroyImage(self.image)
+            raise OSError(ctypes.get_errno(), "shmat 실패")
+        self.info.shmaddr = image.data = address
+        self.info.readOnly = 0
+
+        attached = grabber.xext.XShmAttach(grabber.display, ctypes.byref(self.info))
+        grabber.x11.XSync(grabber.display, 0)
+        # X 서버도 붙은 뒤 삭제를 예약해 두면 프로세스가 비정상 종료해도 세그먼트가 남지 않음
+        libc.shmctl(self.info.shmid, IPC_RMID, None)
+        errors = take_x_errors(grabber.display)
+        if not attached or errors:
+            self.release(detach=False)
+            raise OSError("XShmAttach 실패 (원격 X 서버이거나 MIT-SHM을 쓸 수 없음)")
+        self.raw = (ctypes.c_ubyte * size).from_address(address)
+        self.last_used = time.monotonic()
+
+    def release(self, detach=True):
+        grabber = self.grabber
+        if detach:
+            grabber.xext.XShmDetach(grabber.display, ctypes.byref(self.info))
+        # XDestroyImage가 공유 메모리를 free하지 않도록 data를 비우고 직접 shmdt
+        self.image.contents.data = None
+        grabber.x11.XDestroyImage(self.image)
+        grabber.libc.shmdt(self.info.shmaddr)
+
+
+class XShmGrabber(Grabber):
+    # MIT-SHM 확장을 사용하는 X11 캡처 백엔드
+    # - 영역 크기별 ShmImage를 보관하고, IDLE_SECONDS 동안 grab하지 않은 크기만 정리
+    #   (영역, 묶음, 조각처럼 계속 grab하는 크기는 개수와 관계없이 유지되고, 스냅샷이나 자르기 전 크기만 사라짐)
+    # - grab 결과의 raw는 같은 크기를 다시 grab할 때 덮어쓰므로 reuses_buffers = True
+    name = "xshm"
+    reuses_buffers = True
+    IDLE_SECONDS = 5.0
+
+    def __init__(self, display_name=None):
+        self.x11 = load_library("X11")
+        self.xext = load_library("Xext")
+        self.libc = load_library("c")
+        setup_prototypes(self.x11, self.xext, self.libc)
+
+        self.display = self.x11.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise OSError("X 디스플레이를 열 수 없습니다")
+        if not self.xext.XShmQueryExtension(self.display):
+            self.x11.XCloseDisplay(self.display)
+            take_x_errors(self.display)
+            self.display = None
+            raise OSError("X 서버가 MIT-SHM 확장을 지원하지 않습니다")
+        self.x11.XSetErrorHandler(on_x_error)
+
+        screen = self.x11.XDefaultScreen(self.display)
+        self.root = self.x11.XDefaultRootWindow(self.display)
+        self.visual = self.x11.XDefaultVisual(self.display, screen)
+        self.depth = self.x11.XDefaultDepth(self.display, screen)
+        self.root_size = (self.x11.XDisplayWidth(self.display, screen), self.x11.XDisplayHeight(self.display, screen))
+
+        # 모니터 배치는 mss와 같은 형식이어야 하므로 mss(XRandR)에서 한 번만 읽어 옴
+        from mss import mss
+
+        with mss() as sct:
+            self.monitors = [dict(mon) for mon in sct.monitors]
+
+        self.images = collections.OrderedDict()  # (너비, 높이) -> ShmImage
+        self.lock = threading.Lock()
+
+        # 공유 메모리를 쓸 수 없는 환경(원격 X 서버 등)이면 여기서 실패해서 다음 백엔드로 넘어가게 함
+        try:
+            self.grab({"left": 0, "top": 0, "width": 1, "height": 1})
+        except OSError:
+            self.close()
+            raise
+
+    def grab(self, monitor):
+        x, y = monitor["left"], monitor["top"]
+        w, h = monitor["width"], monitor["height"]
+        if x < 0 or y < 0 or x + w > self.root_size[0] or y + h > self.root_size[1] or w <= 0 or h <= 0:
+            raise OSError(f"화면 밖 영역입니다: ({x}, {y}, {w}, {h})")
+
+        with self.lock:
+            now = time.monotonic()
+            shm_image = self.images.get((w, h))
+            if shm_image is None:
+                shm_image = ShmImage(self, w, h)
+                self.images[(w, h)] = shm_image
+            shm_image.last_used = now
+            self.images.move_to_end((w, h))
+
+            # 가장 오래 쓰지 않은 것부터 확인하므로 보통은 맨 앞 하나만 보고 끝남
+            while True:
+                oldest = next(iter(self.images.values()))
+                if oldest is shm_image or now - oldest.last_used < self.IDLE_SECONDS:
+                    break
+                self.images.popitem(last=False)[1].release()
+
+            ok = self.xext.XShmGetImage(self.display, self.root, shm_image.image, x, y, ALL_PLANES)
+            errors = take_x_errors(self.display)
+            if not ok or errors:
+                raise OSError(f"XShmGetImage 실패: ({x}, {y}, {w}, {h})")
+        return FrameShot(shm_image.raw, w, h)
+
+    def close(self):
+        with self.lock:
+            if self.display is None:
+                return
+            for shm_image in self.images.values():
+                shm_image.release()
+            self.images.clear()
+            self.x11.XCloseDisplay(self.display)
+            take_x_errors(self.display)
+            self.display = None